@@ -173,6 +173,8 @@ var headless_last_connected_at := 0.0
 
 var headless_ever_connected := false
 
+var headless_persistent := false
+
 
 
 var headless_round_max_steps := -1
@@ -432,7 +434,9 @@ func _process(delta: float) -> void:
 
 		return
 
-	if headless_ever_connected:
+	# Persistente (pool do orquestrador): o trainer sai e a instância espera o próximo; só o quit_idle encerra.
+
+	if headless_ever_connected and not headless_persistent:
 
 		get_tree().quit()
 
@@ -482,6 +486,10 @@ func _apply_headless_user_args() -> void:
 
 		,
 
+		"persistent": false
+
+		,
+
 		"rewards_path": null,
 
 		"super_reward_path": null,
@@ -534,6 +542,10 @@ func _apply_headless_user_args() -> void:
 
 			overrides["quit_idle"] = float(arg.get_slice("=", 1))
 
+		elif arg == "--persistent":
+
+			overrides["persistent"] = true
+
 		elif arg.begins_with("--record-path="):
 
 			overrides["record_path"] = arg.get_slice("=", 1)
@@ -608,6 +620,8 @@ func _apply_headless_user_args() -> void:
 
 		headless_quit_idle_seconds = max(0.0, float(overrides["quit_idle"]))
 
+	headless_persistent = bool(overrides["persistent"])
+
 	if overrides["record_path"] != null:
 
 		training_record_path = String(overrides["record_path"])
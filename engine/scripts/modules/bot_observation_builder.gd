@@ -3,6 +3,18 @@ class_name BotObservationBuilder
 
 const OBS_VERSION := 2
 
+# obs_format "vector": mesma observação achatada em floats, nesta ordem (a lista vai uma vez na mensagem obs_schema).
+# Booleanos viram 0/1 e distâncias sem contato (INF) viram -1.
+const VECTOR_ACTOR_FIELDS := [
+	"position.x", "position.y", "velocity.x", "velocity.y", "facing", "on_floor", "on_wall", "is_dead", "arrows",
+	"dash_parry_timer", "dash_press_timer", "aim_hold_active", "aim_hold_dir.x", "aim_hold_dir.y", "shoot_was_pressed",
+	"last_dash_velocity.x", "last_dash_velocity.y", "dash_jump_used",
+	"nearest_arrow.delta_position.x", "nearest_arrow.delta_position.y", "nearest_arrow.distance",
+	"nearest_arrow.velocity.x", "nearest_arrow.velocity.y", "nearest_arrow.is_stuck",
+	"sensors.wall_ahead", "sensors.front_wall_distance", "sensors.ground_distance", "sensors.ceiling_distance",
+	"sensors.ledge_ahead", "sensors.ledge_ground_distance"
+]
+
 const CollisionLayers = preload("res://engine/scripts/modules/collision_layers.gd")
 
 var config_path := ""
@@ -48,6 +60,68 @@ func build(main_node: Node, player: Node, opponent: Node, frame_number: int = 0,
 		}
 	}
 
+func vector_fields() -> PackedStringArray:
+	var fields := PackedStringArray(["frame", "delta", "delta_position.x", "delta_position.y", "distance"])
+	for section in ["self", "opponent"]:
+		for field in VECTOR_ACTOR_FIELDS:
+			fields.append("%s.%s" % [section, field])
+	fields.append_array(["match.round_active", "match.match_over", "match.wins.1", "match.wins.2"])
+	return fields
+
+func vector_schema() -> Dictionary:
+	return {"type": "obs_schema", "obs_version": OBS_VERSION, "fields": vector_fields()}
+
+func to_vector(obs: Dictionary) -> PackedFloat32Array:
+	var out := PackedFloat32Array()
+	out.append(float(obs.get("frame", 0)))
+	out.append(float(obs.get("delta", 0.0)))
+	var delta_position: Vector2 = obs.get("delta_position", Vector2.ZERO)
+	out.append(delta_position.x)
+	out.append(delta_position.y)
+	out.append(float(obs.get("distance", 0.0)))
+	_append_actor_vector(out, obs.get("self", {}))
+	_append_actor_vector(out, obs.get("opponent", {}))
+	var match_state: Dictionary = obs.get("match", {})
+	out.append(_flag(match_state.get("round_active", false)))
+	out.append(_flag(match_state.get("match_over", false)))
+	var wins: Dictionary = match_state.get("wins", {})
+	out.append(float(wins.get(1, wins.get("1", 0))))
+	out.append(float(wins.get(2, wins.get("2", 0))))
+	return out
+
+func _append_actor_vector(out: PackedFloat32Array, actor: Dictionary) -> void:
+	var position: Vector2 = actor.get("position", Vector2.ZERO)
+	var velocity: Vector2 = actor.get("velocity", Vector2.ZERO)
+	var aim_hold_dir: Vector2 = actor.get("aim_hold_dir", Vector2.ZERO)
+	var last_dash_velocity: Vector2 = actor.get("last_dash_velocity", Vector2.ZERO)
+	out.append_array([position.x, position.y, velocity.x, velocity.y, float(actor.get("facing", 1))])
+	out.append_array([_flag(actor.get("on_floor", false)), _flag(actor.get("on_wall", false)), _flag(actor.get("is_dead", false))])
+	out.append(float(actor.get("arrows", 0)))
+	out.append(float(actor.get("dash_parry_timer", 0.0)))
+	out.append(float(actor.get("dash_press_timer", 0.0)))
+	out.append(_flag(actor.get("aim_hold_active", false)))
+	out.append_array([aim_hold_dir.x, aim_hold_dir.y, _flag(actor.get("shoot_was_pressed", false))])
+	out.append_array([last_dash_velocity.x, last_dash_velocity.y, _flag(actor.get("dash_jump_used", false))])
+	var arrow: Dictionary = actor.get("nearest_arrow", {})
+	var arrow_delta: Vector2 = arrow.get("delta_position", Vector2.ZERO)
+	var arrow_velocity: Vector2 = arrow.get("velocity", Vector2.ZERO)
+	out.append_array([arrow_delta.x, arrow_delta.y, _finite(arrow.get("distance", INF))])
+	out.append_array([arrow_velocity.x, arrow_velocity.y, _flag(arrow.get("is_stuck", false))])
+	var sensors: Dictionary = actor.get("sensors", {})
+	out.append(_flag(sensors.get("wall_ahead", false)))
+	out.append(_finite(sensors.get("front_wall_distance", INF)))
+	out.append(_finite(sensors.get("ground_distance", INF)))
+	out.append(_finite(sensors.get("ceiling_distance", INF)))
+	out.append(_flag(sensors.get("ledge_ahead", false)))
+	out.append(_finite(sensors.get("ledge_ground_distance", INF)))
+
+func _flag(value: Variant) -> float:
+	return 1.0 if bool(value) else 0.0
+
+func _finite(value: Variant) -> float:
+	var number := float(value)
+	return number if is_finite(number) else -1.0
+
 func _read_state(node: Node) -> Dictionary:
 	if node != null and node.has_method("get_state"):
 		var state: Dictionary = node.get_state()
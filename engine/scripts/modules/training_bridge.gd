@@ -2,6 +2,10 @@ extends RefCounted
 class_name TrainingBridge
 
 const DEFAULT_PORT := 9009
+# v2: o trainer pode pedir step_mode "lean" (métricas completas só no done ou via get_metrics)
+# e obs_format "vector" (obs achatada em floats, com os nomes numa mensagem obs_schema).
+const PROTOCOL_VERSION := 2
+const CAPABILITIES := ["lean_steps", "obs_vector"]
 
 var server: TCPServer = TCPServer.new()
 var peer: StreamPeerTCP = null
@@ -57,7 +61,7 @@ func poll() -> void:
 		pending_hello = false
 		return
 	if pending_hello:
-		send({"type": "hello", "protocol": 1})
+		send({"type": "hello", "protocol": PROTOCOL_VERSION, "capabilities": CAPABILITIES})
 		pending_hello = false
 	var available: int = peer.get_available_bytes()
 	if available <= 0:
@@ -116,6 +120,8 @@ func _to_json_safe(value: Variant) -> Variant:
 		return null
 	if value is bool or value is int or value is float or value is String:
 		return value
+	if value is PackedFloat32Array:
+		return Array(value)
 	if value is Vector2:
 		var v: Vector2 = value as Vector2
 		return {"x": float(v.x), "y": float(v.y)}
@@ -98,6 +98,18 @@ var log_path := "user://training_metrics.csv"
 
 var ga_state: Dictionary = {}
 
+var step_mode := "full"
+
+var obs_format := "dict"
+
+var action_repeat := 1
+
+var repeat_frames := 0
+
+var repeat_elapsed := 0.0
+
+var repeat_reward := {"1": 0.0, "2": 0.0}
+
 var pending_save_models: Array[Dictionary] = []
 
 
@@ -114,6 +126,10 @@ var last_alive := {1: true, 2: true}
 
 var connected_sent := false
 
+var bridge_sessions := 0
+
+var bridge_accepts := 0
+
 var episode_index := 0
 
 var episode_steps := 0
@@ -261,6 +277,8 @@ func start(port: int) -> void:
 
 	connected_sent = false
 
+	bridge_accepts = _bridge_accept_count()
+
 	_apply_time_scale()
 
 	external_policies_applied = false
@@ -381,6 +399,18 @@ func _bridge_is_connected() -> bool:
 
 
 
+func _bridge_accept_count() -> int:
+
+	var state: Variant = _bridge_call("get_debug_state")
+
+	if state is Dictionary:
+
+		return int(state.get("accept_count", 0))
+
+	return 0
+
+
+
 func set_watch_mode(enabled_value: bool, speed: float) -> void:
 
 	watch_mode = enabled_value
@@ -539,9 +569,43 @@ func step(delta: float) -> void:
 
 			external_policies_applied = true
 
+	if connected_sent and not _bridge_is_connected():
+
+		# Trainer desconectou: numa instância persistente o próximo recebe hello de novo e estado de conexão limpo.
+
+		connected_sent = false
+
+	var accepts := _bridge_accept_count()
+
+	if accepts != bridge_accepts:
+
+		# Conexão nova aceita no bridge: sessão nova mesmo que a queda do trainer anterior e a chegada deste
+
+		# tenham caído entre dois frames (nenhum frame viu o bridge desconectado).
+
+		bridge_accepts = accepts
+
+		connected_sent = false
+
 	if _bridge_is_connected() and not connected_sent:
 
-		_bridge_send({"type": "hello", "protocol": 1})
+		step_mode = "full"
+
+		obs_format = "dict"
+
+		action_repeat = 1
+
+		_reset_action_repeat()
+
+		bridge_sessions += 1
+
+		if bridge_sessions > 1:
+
+			_apply_actions({"1": {}, "2": {}})
+
+			_request_reset()
+
+		_bridge_send({"type": "hello", "protocol": TrainingBridge.PROTOCOL_VERSION, "capabilities": TrainingBridge.CAPABILITIES})
 
 		connected_sent = true
 
@@ -588,13 +652,43 @@ func _tick_training(step_delta: float) -> void:
 
 	_update_episode_metrics(rewards, done, alive_p1, alive_p2)
 
+	# action_repeat: a última ação segue valendo por K frames e só sai um step por janela (ou no done).
+
+	repeat_frames += 1
+
+	repeat_elapsed += dt
+
+	for key in repeat_reward.keys():
+
+		repeat_reward[key] = float(repeat_reward[key]) + float(rewards.get(key, 0.0))
+
+	if not done and repeat_frames < action_repeat:
+
+		frame_number += 1
+
+		return
+
+	var window_frames := repeat_frames
+
+	var window_elapsed := repeat_elapsed
+
+	rewards = repeat_reward
+
+	_reset_action_repeat()
+
 	var debug_bridge := OS.has_method("get_cmdline_user_args") and OS.get_cmdline_user_args().has("--debug-bridge")
 
-	var obs_out_p1 := obs_p1
+	var obs_out_p1: Variant = obs_p1
+
+	var obs_out_p2: Variant = obs_p2
+
+	if obs_format == "vector" and not debug_bridge:
+
+		obs_out_p1 = observation_builder.to_vector(obs_p1)
 
-	var obs_out_p2 := obs_p2
+		obs_out_p2 = observation_builder.to_vector(obs_p2)
 
-	if not debug_bridge:
+	elif not debug_bridge:
 
 		obs_out_p1 = obs_p1.duplicate(false)
 
@@ -604,6 +698,20 @@ func _tick_training(step_delta: float) -> void:
 
 		obs_out_p2.erase("raw")
 
+	if window_frames > 1:
+
+		if obs_out_p1 is Dictionary:
+
+			obs_out_p1["delta"] = window_elapsed
+
+			obs_out_p2["delta"] = window_elapsed
+
+		else:
+
+			obs_out_p1[1] = window_elapsed
+
+			obs_out_p2[1] = window_elapsed
+
 	var payload := {
 
 		"type": "step",
@@ -614,13 +722,21 @@ func _tick_training(step_delta: float) -> void:
 
 		"reward": rewards,
 
-		"done": done,
+		"done": done
 
-		"info": _build_info(),
+	}
 
-		"metrics": get_metrics()
+	if action_repeat > 1:
 
-	}
+		payload["frames"] = window_frames
+
+	# No modo lean os steps intermediários vão só com obs/reward/done; métricas completas no done ou via get_metrics.
+
+	if done or debug_bridge or step_mode != "lean":
+
+		payload["info"] = _build_info()
+
+		payload["metrics"] = get_metrics()
 
 	if debug_bridge:
 
@@ -634,7 +750,7 @@ func _tick_training(step_delta: float) -> void:
 
 		}
 
-	_record_step(payload)
+	_record_step(payload, {} if obs_out_p1 is Dictionary else {"1": obs_p1, "2": obs_p2})
 
 	_bridge_send(payload)
 
@@ -648,13 +764,13 @@ func _tick_training(step_delta: float) -> void:
 
 
 
-func _record_step(step_payload: Dictionary) -> void:
+func _record_step(step_payload: Dictionary, obs_dicts: Dictionary = {}) -> void:
 
 	if not recording_enabled or recorder == null:
 
 		return
 
-	var obs_value: Variant = step_payload.get("obs")
+	var obs_value: Variant = obs_dicts if not obs_dicts.is_empty() else step_payload.get("obs")
 
 	if not (obs_value is Dictionary):
 
@@ -682,7 +798,7 @@ func _record_step(step_payload: Dictionary) -> void:
 
 		"done": bool(step_payload.get("done", false)),
 
-		"info": step_payload.get("info", {}),
+		"info": step_payload["info"] if step_payload.has("info") else _build_info(),
 
 		"actions_frame": {"1": _get_player_frame(player_one), "2": _get_player_frame(player_two)}
 
@@ -718,6 +834,8 @@ func reset_episode() -> void:
 
 	_reset_tracking()
 
+	_reset_action_repeat()
+
 	_reset_episode_metrics()
 
 	if reward_shaper != null and reward_shaper.has_method("reset"):
@@ -730,6 +848,16 @@ func reset_episode() -> void:
 
 
 
+func _reset_action_repeat() -> void:
+
+	repeat_frames = 0
+
+	repeat_elapsed = 0.0
+
+	repeat_reward = {"1": 0.0, "2": 0.0}
+
+
+
 func _ensure_reward_shaper() -> void:
 
 	if reward_shaper == null:
@@ -1408,6 +1536,24 @@ func _apply_config(message: Dictionary) -> void:
 
 		time_scale = float(message["time_scale"])
 
+	if message.has("action_repeat"):
+
+		action_repeat = maxi(1, int(message["action_repeat"]))
+
+		_reset_action_repeat()
+
+	if message.has("step_mode"):
+
+		step_mode = "lean" if String(message["step_mode"]) == "lean" else "full"
+
+	if message.has("obs_format"):
+
+		obs_format = "vector" if String(message["obs_format"]) == "vector" else "dict"
+
+		if obs_format == "vector":
+
+			_bridge_send(observation_builder.vector_schema())
+
 	if message.has("ga_state") and message["ga_state"] is Dictionary:
 
 		ga_state = (message["ga_state"] as Dictionary).duplicate(true)
@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Linhas de step com --debug-bridge passam fácil dos 64 KiB padrão do StreamReader.
+LINE_LIMIT = 16 * 1024 * 1024
+QUEUE_SIZE = 256
+WRITE_HIGH_WATER = 1024 * 1024
+READ_CHUNK = 256 * 1024
+# Política de descarte quando o trainer fica para trás: "none" entrega tudo; "latest_step" entrega só o step mais
+# novo de cada arena (steps com done e as outras mensagens nunca são descartados).
+DROP_NONE = "none"
+DROP_LATEST_STEP = "latest_step"
+DROP_POLICIES = (DROP_NONE, DROP_LATEST_STEP)
+CAP_LEAN_STEPS = "lean_steps"
+CAP_OBS_VECTOR = "obs_vector"
+
+Message = Dict[str, Any]
+
+
+def encode_message(payload: Message) -> bytes:
+    return (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def decode_line(raw: bytes) -> Tuple[Optional[Message], str]:
+    return _decode_text(raw.decode("utf-8", errors="ignore"))
+
+
+def _decode_text(text: str) -> Tuple[Optional[Message], str]:
+    text = text.strip()
+    # O Godot às vezes prefixa a linha com lixo de log; o JSON começa no primeiro "{".
+    if "{" in text and not text.startswith("{"):
+        text = text[text.index("{") :]
+    if not text:
+        return None, ""
+    try:
+        message = json.loads(text)
+    except json.JSONDecodeError:
+        return None, text
+    if not isinstance(message, dict):
+        return None, text
+    return message, ""
+
+
+def decode_lines(region: bytes | memoryview) -> Tuple[List[Message], List[str]]:
+    # Um bloco de linhas completas: decodifica o UTF-8 uma vez e, se todas as linhas são objetos limpos, faz um
+    # json.loads só (array). Qualquer linha estranha (lixo de log, JSON quebrado) cai no caminho linha a linha.
+    lines = [line for line in str(region, "utf-8", errors="ignore").split("\n") if line.strip()]
+    if lines and all(line.lstrip().startswith("{") for line in lines):
+        try:
+            batch = json.loads("[" + ",".join(lines) + "]")
+        except json.JSONDecodeError:
+            batch = None
+        if isinstance(batch, list) and len(batch) == len(lines) and all(isinstance(m, dict) for m in batch):
+            return batch, []
+    messages: List[Message] = []
+    invalid: List[str] = []
+    for line in lines:
+        message, bad = _decode_text(line)
+        if message is not None:
+            messages.append(message)
+        elif bad:
+            invalid.append(bad)
+    return messages, invalid
+
+
+def coalesce_steps(items: List[Tuple[int, Optional[Message]]]) -> Tuple[List[Tuple[int, Optional[Message]]], int]:
+    # Mantém só o último step sem done de cada arena; done, mensagens de outro tipo e a ordem relativa ficam.
+    latest: Dict[int, int] = {}
+    for i, (arena_id, message) in enumerate(items):
+        if message is not None and message.get("type") == "step":
+            latest[arena_id] = i
+    kept: List[Tuple[int, Optional[Message]]] = []
+    dropped = 0
+    for i, (arena_id, message) in enumerate(items):
+        if message is not None and message.get("type") == "step" and i != latest[arena_id] and not message.get("done", False):
+            dropped += 1
+            continue
+        kept.append((arena_id, message))
+    return kept, dropped
+
+
+class LineBuffer:
+    # Buffer de recepção em bytearray: os chunks entram no fim, as linhas completas são achadas numa passada só
+    # (sem reescanear o pedaço incompleto) e saem de uma vez pela frente. Sem cópia por linha como no split().
+    def __init__(self, limit: int = LINE_LIMIT) -> None:
+        self.data = bytearray()
+        self.limit = int(limit)
+        self._scanned = 0
+
+    def feed(self, chunk: bytes) -> Tuple[List[Message], List[str]]:
+        data = self.data
+        data += chunk
+        end = data.rfind(b"\n", self._scanned)
+        if end < 0:
+            self._scanned = len(data)
+            if len(data) > self.limit:
+                raise ValueError(f"linha maior que {self.limit} bytes")
+            return [], []
+        with memoryview(data) as view:
+            out = decode_lines(view[: end + 1])
+        del data[: end + 1]
+        self._scanned = 0
+        return out
+
+    def flush(self) -> Tuple[List[Message], List[str]]:
+        # Fim da conexão: a última linha pode vir sem \n.
+        if not self.data:
+            return [], []
+        out = decode_lines(bytes(self.data))
+        self.data.clear()
+        self._scanned = 0
+        return out
+
+
+def supports(hello: Message, capability: str) -> bool:
+    # Protocolo 1 não anuncia nada; a partir do 2 o Godot lista as capacidades no hello.
+    try:
+        protocol = int(hello.get("protocol", 1))
+    except (TypeError, ValueError):
+        return False
+    capabilities = hello.get("capabilities")
+    return protocol >= 2 and isinstance(capabilities, list) and capability in capabilities
+
+
+class BridgeConnection:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        arena_id: int = 0,
+        connect_timeout: float = 2.0,
+        connect_retries: int = 60,
+        connect_wait: float = 0.1,
+        idle_timeout: float = 0.0,
+        reconnect: int = 0,
+    ) -> None:
+        self.host = str(host)
+        self.port = int(port)
+        self.arena_id = int(arena_id)
+        self.connect_timeout = max(0.1, float(connect_timeout))
+        self.connect_retries = max(1, int(connect_retries))
+        self.connect_wait = max(0.0, float(connect_wait))
+        self.idle_timeout = float(idle_timeout)
+        self.reconnects_left = max(0, int(reconnect))
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.closed = False
+        self.error = ""
+
+    async def connect(self) -> None:
+        last_exc: Optional[BaseException] = None
+        for _ in range(self.connect_retries):
+            try:
+                self.reader, self.writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port, limit=LINE_LIMIT),
+                    self.connect_timeout,
+                )
+                self.closed = False
+                return
+            except (OSError, asyncio.TimeoutError) as exc:
+                last_exc = exc
+                await asyncio.sleep(self.connect_wait)
+        raise ConnectionError(f"Falha ao conectar (porta {self.port}): {last_exc}")
+
+    def send(self, payload: Message) -> None:
+        if self.writer is None or self.closed:
+            return
+        self.writer.write(encode_message(payload))
+
+    async def drain(self) -> None:
+        writer = self.writer
+        if writer is None or self.closed or writer.transport.get_write_buffer_size() < WRITE_HIGH_WATER:
+            return
+        try:
+            await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+
+    async def read(self) -> bytes:
+        assert self.reader is not None
+        if self.idle_timeout > 0.0:
+            return await asyncio.wait_for(self.reader.read(READ_CHUNK), self.idle_timeout)
+        return await self.reader.read(READ_CHUNK)
+
+    async def close(self) -> None:
+        writer = self.writer
+        self.writer = None
+        self.reader = None
+        if writer is None:
+            return
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+class BridgeHub:
+    def __init__(
+        self,
+        connections: Sequence[BridgeConnection],
+        queue_size: int = QUEUE_SIZE,
+        on_invalid: Optional[Callable[[int, str], None]] = None,
+        drop_policy: str = DROP_NONE,
+    ) -> None:
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"drop_policy inválida: {drop_policy!r} (use {', '.join(DROP_POLICIES)})")
+        self.connections = list(connections)
+        self.on_invalid = on_invalid
+        self.drop_policy = drop_policy
+        self.dropped_steps = 0
+        # Fila limitada: se o trainer atrasar, os readers param de ler e o TCP segura o Godot (back-pressure).
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, int(queue_size)))
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        await asyncio.gather(*(conn.connect() for conn in self.connections))
+        self._tasks = [asyncio.ensure_future(self._read_loop(conn)) for conn in self.connections]
+
+    async def _read_loop(self, conn: BridgeConnection) -> None:
+        buffer = LineBuffer()
+        while True:
+            try:
+                chunk = await conn.read()
+            except asyncio.TimeoutError:
+                conn.error = f"Timeout aguardando mensagens do jogo (porta {conn.port})"
+                chunk = b""
+            except (ConnectionError, OSError, ValueError) as exc:
+                conn.error = f"Conexão perdida (porta {conn.port}): {exc}"
+                chunk = b""
+            try:
+                messages, invalid = buffer.feed(chunk) if chunk else buffer.flush()
+            except ValueError as exc:
+                conn.error = f"Conexão perdida (porta {conn.port}): {exc}"
+                messages, invalid = [], []
+                chunk = b""
+            if self.on_invalid is not None:
+                for text in invalid:
+                    self.on_invalid(conn.arena_id, text)
+            await self._deliver(conn.arena_id, messages)
+            if not chunk:
+                buffer = LineBuffer()
+                if conn.reconnects_left > 0:
+                    conn.reconnects_left -= 1
+                    await conn.close()
+                    try:
+                        await conn.connect()
+                    except ConnectionError as exc:
+                        conn.error = str(exc)
+                    else:
+                        conn.error = ""
+                        await self.queue.put((conn.arena_id, {"type": "reconnected", "port": conn.port}))
+                        continue
+                conn.closed = True
+                await self.queue.put((conn.arena_id, None))
+                return
+
+    async def _deliver(self, arena_id: int, messages: List[Message]) -> None:
+        items: List[Tuple[int, Optional[Message]]] = [(arena_id, message) for message in messages]
+        if self.drop_policy == DROP_LATEST_STEP and len(items) > 1:
+            items, dropped = coalesce_steps(items)
+            self.dropped_steps += dropped
+        for item in items:
+            await self.queue.put(item)
+
+    async def drain(self) -> None:
+        await asyncio.gather(*(conn.drain() for conn in self.connections))
+
+    async def next_batch(self, timeout: Optional[float]) -> List[Tuple[int, Optional[Message]]]:
+        await self.drain()
+        await asyncio.sleep(0)
+        out: List[Tuple[int, Optional[Message]]] = []
+        if self.queue.empty():
+            try:
+                out.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                return out
+        while not self.queue.empty():
+            out.append(self.queue.get_nowait())
+        if self.drop_policy == DROP_LATEST_STEP and len(out) > 1:
+            out, dropped = coalesce_steps(out)
+            self.dropped_steps += dropped
+        return out
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for conn in self.connections:
+            if conn.writer is not None:
+                try:
+                    await conn.writer.drain()
+                except (ConnectionError, OSError):
+                    pass
+            await conn.close()
+
+
+class BridgeClient:
+    # Fachada síncrona: os trainers continuam com laço próprio e o I/O roda num event loop privado.
+    def __init__(
+        self,
+        host: str,
+        ports: Sequence[int],
+        connect_timeout: float = 2.0,
+        connect_retries: int = 60,
+        connect_wait: float = 0.1,
+        idle_timeout: float = 0.0,
+        reconnect: int = 0,
+        queue_size: int = QUEUE_SIZE,
+        on_invalid: Optional[Callable[[int, str], None]] = None,
+        drop_policy: str = DROP_NONE,
+    ) -> None:
+        self._loop = asyncio.new_event_loop()
+        self.connections = [
+            BridgeConnection(host, port, i, connect_timeout, connect_retries, connect_wait, idle_timeout, reconnect)
+            for i, port in enumerate(ports)
+        ]
+        self.hub = self._run(self._make_hub(queue_size, on_invalid, drop_policy))
+        self._started = False
+
+    async def _make_hub(self, queue_size: int, on_invalid: Optional[Callable[[int, str], None]], drop_policy: str) -> BridgeHub:
+        return BridgeHub(self.connections, queue_size, on_invalid, drop_policy)
+
+    def _run(self, coro: Any) -> Any:
+        return self._loop.run_until_complete(coro)
+
+    @property
+    def ports(self) -> List[int]:
+        return [conn.port for conn in self.connections]
+
+    @property
+    def dropped_steps(self) -> int:
+        return int(self.hub.dropped_steps)
+
+    @property
+    def closed(self) -> bool:
+        return any(conn.closed for conn in self.connections)
+
+    def connect(self) -> None:
+        self._run(self.hub.start())
+        self._started = True
+
+    def send(self, payload: Message, arena_id: int = 0) -> None:
+        self.connections[arena_id].send(payload)
+
+    def poll(self, timeout: Optional[float] = 0.0) -> List[Tuple[int, Message]]:
+        if not self._started:
+            return []
+        out: List[Tuple[int, Message]] = []
+        for arena_id, message in self._run(self.hub.next_batch(timeout)):
+            if message is not None:
+                out.append((arena_id, message))
+                continue
+            error = self.connections[arena_id].error
+            if error:
+                raise ConnectionError(error)
+        return out
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+        try:
+            self._run(self.hub.close())
+        finally:
+            self._loop.close()
+            self._started = False
+
+    def __enter__(self) -> "BridgeClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -1,13 +1,9 @@
 import argparse
 import json
-import socket
 import sys
 import time
 
-
-def send_json_line(sock: socket.socket, payload: dict) -> None:
-	data = (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
-	sock.sendall(data)
+from bridge_client import BridgeClient
 
 
 def main() -> int:
@@ -23,69 +19,56 @@ def main() -> int:
 	args = parser.parse_args()
 
 	deadline = time.time() + float(args.duration)
+	client = BridgeClient(args.host, [int(args.port)], connect_timeout=float(args.timeout), connect_retries=1)
 	try:
-		sock = socket.create_connection((args.host, int(args.port)), timeout=float(args.timeout))
-	except OSError as exc:
+		client.connect()
+	except ConnectionError as exc:
 		print(f"Falha ao conectar em {args.host}:{args.port}: {exc}")
+		client.close()
 		return 2
 
-	sock.settimeout(float(args.timeout))
-	f = sock.makefile("rwb")
-
 	seen = {"hello": False, "step": False, "metrics": False}
 	try:
-		send_json_line(sock, {"type": "config", "watch_mode": bool(args.watch), "time_scale": float(args.time_scale)})
-		send_json_line(sock, {"type": "get_metrics"})
-		while time.time() < deadline:
+		client.send({"type": "config", "watch_mode": bool(args.watch), "time_scale": float(args.time_scale)})
+		client.send({"type": "get_metrics"})
+		while time.time() < deadline and not client.closed:
 			try:
-				line = f.readline()
-			except TimeoutError:
-				continue
-			if not line:
+				messages = client.poll(min(float(args.timeout), max(0.0, deadline - time.time())))
+			except ConnectionError:
 				break
-			try:
-				msg = json.loads(line.decode("utf-8", errors="ignore").strip())
-			except json.JSONDecodeError:
-				continue
-			if not isinstance(msg, dict):
-				continue
-			msg_type = str(msg.get("type", ""))
-			if msg_type == "hello":
-				seen["hello"] = True
-			elif msg_type == "step":
-				seen["step"] = True
-				try:
-					obs = msg.get("obs") if isinstance(msg.get("obs"), dict) else {}
-					p1 = obs.get("1") if isinstance(obs.get("1"), dict) else {}
-					dt = float(p1.get("delta", 0.0) or 0.0)
-					print(json.dumps({"step_delta": dt, "time_scale": float(args.time_scale)}, ensure_ascii=False))
-					if args.assert_delta:
-						if dt <= 0.0:
-							print("ERRO: obs.delta <= 0")
-							return 4
-						if float(args.time_scale) > 1.5 and dt < 0.03:
-							print("ERRO: obs.delta parece não refletir time_scale")
-							return 5
-				except Exception:
-					if args.assert_delta:
-						print("ERRO: falha ao ler obs.delta")
-						return 6
-				if args.reply_actions:
-					send_json_line(sock, {"type": "action", "actions": {"1": {}, "2": {}}})
-			elif msg_type == "metrics":
-				seen["metrics"] = True
-			print(json.dumps({"type": msg_type, "keys": sorted(list(msg.keys()))}, ensure_ascii=False))
+			for _, msg in messages:
+				msg_type = str(msg.get("type", ""))
+				if msg_type == "hello":
+					seen["hello"] = True
+				elif msg_type == "step":
+					seen["step"] = True
+					try:
+						obs = msg.get("obs") if isinstance(msg.get("obs"), dict) else {}
+						p1 = obs.get("1") if isinstance(obs.get("1"), dict) else {}
+						dt = float(p1.get("delta", 0.0) or 0.0)
+						print(json.dumps({"step_delta": dt, "time_scale": float(args.time_scale)}, ensure_ascii=False))
+						if args.assert_delta:
+							if dt <= 0.0:
+								print("ERRO: obs.delta <= 0")
+								return 4
+							if float(args.time_scale) > 1.5 and dt < 0.03:
+								print("ERRO: obs.delta parece não refletir time_scale")
+								return 5
+					except Exception:
+						if args.assert_delta:
+							print("ERRO: falha ao ler obs.delta")
+							return 6
+					if args.reply_actions:
+						client.send({"type": "action", "actions": {"1": {}, "2": {}}})
+				elif msg_type == "metrics":
+					seen["metrics"] = True
+				print(json.dumps({"type": msg_type, "keys": sorted(list(msg.keys()))}, ensure_ascii=False))
+				if seen["step"] and seen["metrics"]:
+					break
 			if seen["step"] and seen["metrics"]:
 				break
 	finally:
-		try:
-			f.close()
-		except Exception:
-			pass
-		try:
-			sock.close()
-		except Exception:
-			pass
+		client.close()
 
 	if seen["step"]:
 		print("OK: recebeu 'step' do jogo")
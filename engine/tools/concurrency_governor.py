@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+PROC = Path("/proc")
+# O loadavg é uma média de 1 minuto: depois de reduzir por load, espera ele refletir a redução.
+LOAD_SETTLE_SEC = 60.0
+
+
+def _sysconf(name: str, default: int) -> int:
+    try:
+        return int(os.sysconf(name))
+    except (AttributeError, ValueError, OSError):
+        return default
+
+
+CLK_TCK = _sysconf("SC_CLK_TCK", 100)
+PAGE_SIZE = _sysconf("SC_PAGE_SIZE", 4096)
+
+
+def proc_available() -> bool:
+    return (PROC / "self" / "stat").exists()
+
+
+def proc_cpu_seconds(pid: int) -> Optional[float]:
+    try:
+        raw = (PROC / str(pid) / "stat").read_text()
+    except OSError:
+        return None
+    # O nome do processo (entre parênteses) pode ter espaços: os campos começam depois do último ")".
+    fields = raw[raw.rfind(")") + 2 :].split()
+    try:
+        return (int(fields[11]) + int(fields[12])) / float(CLK_TCK)
+    except (IndexError, ValueError):
+        return None
+
+
+def proc_rss_bytes(pid: int) -> Optional[int]:
+    try:
+        fields = (PROC / str(pid) / "statm").read_text().split()
+        return int(fields[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def mem_available_bytes() -> Optional[int]:
+    try:
+        with open(PROC / "meminfo", "r", encoding="ascii", errors="ignore") as file:
+            for line in file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, IndexError, ValueError):
+        return None
+    return None
+
+
+def load_per_cpu() -> Optional[float]:
+    try:
+        return os.getloadavg()[0] / float(os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+@dataclass
+class GovernorSample:
+    at: float
+    running: int
+    cpu_percent: float = 0.0
+    rss_bytes: int = 0
+    mem_available: Optional[int] = None
+    load: Optional[float] = None
+    steps_per_sec: float = 0.0
+    reporting: int = 0
+
+    @property
+    def cpu_per_worker(self) -> float:
+        return self.cpu_percent / self.running if self.running > 0 else 0.0
+
+    @property
+    def rss_per_worker(self) -> int:
+        return self.rss_bytes // self.running if self.running > 0 else 0
+
+    @property
+    def steps_per_worker(self) -> float:
+        return self.steps_per_sec / self.reporting if self.reporting > 0 else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "running": int(self.running),
+            "cpu_percent": round(self.cpu_percent, 1),
+            "rss_mb": round(self.rss_bytes / (1024 * 1024), 1),
+            "mem_available_mb": round(self.mem_available / (1024 * 1024), 1) if self.mem_available is not None else None,
+            "load_per_cpu": round(self.load, 3) if self.load is not None else None,
+            "steps_per_sec": round(self.steps_per_sec, 1),
+        }
+
+
+@dataclass
+class _Probe:
+    value: Optional[int] = None
+    before: Optional[GovernorSample] = None
+    cooldown: int = 0
+
+
+class ConcurrencyGovernor:
+    # Ajusta o número de workers locais entre minimum e maximum olhando o que eles gastam de verdade:
+    # CPU/RSS dos processos (/proc), MemAvailable, load por CPU e steps/s que os trainers mandam pelo result stream.
+    # Sobe um worker por vez enquanto há folga e as vagas estão cheias; recua quando falta memória, a máquina
+    # satura ou o último aumento não trouxe throughput (e aí segura um teto por alguns intervalos).
+    def __init__(
+        self,
+        minimum: int,
+        maximum: int,
+        start: int,
+        interval: float = 10.0,
+        mem_reserve_mb: float = 1024.0,
+        max_load: float = 1.0,
+        tolerance: float = 0.85,
+        on_event: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum))
+        self.current = min(self.maximum, max(self.minimum, int(start)))
+        self.interval = max(1.0, float(interval))
+        self.mem_reserve = int(max(0.0, float(mem_reserve_mb)) * 1024 * 1024)
+        self.max_load = max(0.1, float(max_load))
+        self.tolerance = min(1.0, max(0.0, float(tolerance)))
+        self.on_event = on_event
+        self.use_proc = proc_available()
+        self.ceiling = self.maximum
+        self.last: Optional[GovernorSample] = None
+        self._cpu_seen: Dict[int, float] = {}
+        self._last_at = time.monotonic()
+        self._probe = _Probe()
+        self._load_hold = 0
+
+    def _event(self, text: str) -> None:
+        if self.on_event is not None:
+            self.on_event(text)
+
+    def sample(self, pids: Iterable[int], running: int, step_rates: Iterable[float]) -> GovernorSample:
+        now = time.monotonic()
+        elapsed = max(1e-6, now - self._last_at)
+        self._last_at = now
+        rates = [float(r) for r in step_rates]
+        sample = GovernorSample(at=now, running=int(running), steps_per_sec=sum(rates), reporting=len(rates))
+        if self.use_proc:
+            cpu_used = 0.0
+            seen: Dict[int, float] = {}
+            for pid in set(pids):
+                cpu = proc_cpu_seconds(pid)
+                if cpu is None:
+                    continue
+                seen[pid] = cpu
+                # Processo novo neste intervalo: só entra no delta a partir da próxima amostra.
+                if pid in self._cpu_seen:
+                    cpu_used += max(0.0, cpu - self._cpu_seen[pid])
+                sample.rss_bytes += proc_rss_bytes(pid) or 0
+            self._cpu_seen = seen
+            sample.cpu_percent = 100.0 * cpu_used / elapsed
+            sample.mem_available = mem_available_bytes()
+        sample.load = load_per_cpu()
+        self.last = sample
+        return sample
+
+    def update(self, pids: Iterable[int], running: int, saturated: bool, step_rates: Iterable[float]) -> int:
+        if time.monotonic() - self._last_at < self.interval:
+            return self.current
+        first = self.last is None
+        sample = self.sample(pids, running, step_rates)
+        if first:
+            # Primeira amostra só serve de base para os deltas de CPU.
+            return self.current
+        target, reason = self._decide(sample, saturated)
+        if target != self.current:
+            self._event(
+                f"governor: concurrency {self.current} -> {target} ({reason}) | "
+                + " ".join(f"{k}={v}" for k, v in sample.to_dict().items())
+            )
+            self.current = target
+        return self.current
+
+    def _decide(self, sample: GovernorSample, saturated: bool) -> Tuple[int, str]:
+        probe = self._probe
+        if probe.cooldown > 0:
+            probe.cooldown -= 1
+            if probe.cooldown == 0:
+                self.ceiling = self.maximum
+        self._load_hold = max(0, self._load_hold - 1)
+        cpus = float(os.cpu_count() or 1)
+        rss_next = sample.rss_per_worker
+
+        if sample.mem_available is not None and sample.mem_available < self.mem_reserve:
+            step = max(1, self.current // 4)
+            probe.value = None
+            return max(self.minimum, self.current - step), "memória abaixo da reserva"
+        if sample.load is not None and sample.load > self.max_load * 1.25:
+            probe.value = None
+            if self._load_hold > 0:
+                return self.current, ""
+            self._load_hold = max(1, int(LOAD_SETTLE_SEC / self.interval))
+            return max(self.minimum, self.current - 1), f"load/cpu {sample.load:.2f}"
+
+        if probe.value is not None:
+            if not saturated or probe.before is None or probe.before.reporting == 0:
+                # Sem fila ou sem steps/s para comparar: não há o que avaliar.
+                probe.value = None
+            elif sample.reporting < probe.value:
+                # A vaga nova ainda não está rodando (e reportando); espera antes de subir de novo.
+                return self.current, ""
+            else:
+                before = probe.before
+                probe.value = None
+                gained = sample.steps_per_sec > before.steps_per_sec * 1.02
+                per_worker_ok = sample.steps_per_worker >= before.steps_per_worker * self.tolerance
+                if not gained or not per_worker_ok:
+                    self.ceiling = max(self.minimum, self.current - 1)
+                    probe.cooldown = 6
+                    return self.ceiling, "throughput por worker caiu"
+
+        if not saturated or self.current >= min(self.maximum, self.ceiling):
+            return self.current, ""
+        if sample.mem_available is not None and sample.mem_available - rss_next < self.mem_reserve:
+            return self.current, ""
+        if sample.load is not None and sample.load > self.max_load:
+            return self.current, ""
+        if self.use_proc and sample.running > 0 and sample.cpu_percent + sample.cpu_per_worker > cpus * 100.0 * self.max_load:
+            return self.current, ""
+        probe.value = self.current + 1
+        probe.before = sample
+        return self.current + 1, "folga de CPU/memória"
+
+    def to_dict(self) -> Dict:
+        out = {"concurrency": int(self.current), "min": int(self.minimum), "max": int(self.maximum), "ceiling": int(self.ceiling)}
+        if self.last is not None:
+            out.update(self.last.to_dict())
+        return out
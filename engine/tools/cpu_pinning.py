@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+SYS_CPU = Path("/sys/devices/system/cpu")
+IONICE_CLASSES = {"realtime": "1", "best-effort": "2", "idle": "3"}
+
+
+def _read_int(path: Path, default: int) -> int:
+    try:
+        return int(path.read_text().strip())
+    except (OSError, ValueError):
+        return default
+
+
+def ordered_cpus() -> List[int]:
+    # CPUs permitidas ao processo, na ordem (socket, core físico, cpu): vizinhos na lista dividem cache
+    # (hyperthreads do mesmo core ficam lado a lado), então um par Godot/trainer cai no mesmo core/L2.
+    try:
+        allowed = sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return []
+
+    def topology(cpu: int) -> Tuple[int, int, int]:
+        base = SYS_CPU / f"cpu{cpu}" / "topology"
+        return _read_int(base / "physical_package_id", 0), _read_int(base / "core_id", cpu), cpu
+
+    return sorted(allowed, key=topology)
+
+
+def _thread_ids(pid: int) -> List[int]:
+    # sched_setaffinity/setpriority valem por thread no Linux: o Godot já subiu as threads dele quando o pid chega aqui.
+    try:
+        return [int(name) for name in os.listdir(f"/proc/{pid}/task")]
+    except (OSError, ValueError):
+        return [pid]
+
+
+class CpuPinning:
+    # Cada worker local ocupa uma lane; a lane N recebe um bloco fixo de cores_per_worker CPUs (com rodízio quando
+    # há mais lanes que blocos). As primeiras `reserved` CPUs ficam para o orquestrador. cores_per_worker 0 = sem
+    # afinidade, só nice/ionice.
+    def __init__(
+        self,
+        cores_per_worker: int,
+        reserved: int = 0,
+        nice: int = 0,
+        ionice_class: str = "",
+        ionice_level: int = 4,
+        on_event: Optional[Callable[[str], None]] = None,
+        force_nice: bool = False,
+    ) -> None:
+        self.on_event = on_event
+        cpus = ordered_cpus() if int(cores_per_worker) > 0 else []
+        reserved = max(0, min(int(reserved), len(cpus) - 1)) if cpus else 0
+        self.reserved_cpus = cpus[:reserved]
+        self.cpus = cpus[reserved:]
+        self.cores_per_worker = max(1, min(int(cores_per_worker), len(self.cpus) or 1))
+        self.nice = int(nice)
+        # Com orchestrator_nice o orquestrador muda a própria prioridade e os filhos herdariam a dele: aí o nice
+        # dos workers é sempre explícito (worker_nice, mesmo 0).
+        self.set_nice = self.nice != 0 or bool(force_nice)
+        self.ionice_class = IONICE_CLASSES.get(str(ionice_class or "").strip().lower(), "")
+        self.ionice_level = min(7, max(0, int(ionice_level)))
+        self.ionice = shutil.which("ionice") if self.ionice_class else None
+        self._applied: Dict[int, int] = {}
+        self._warned: Set[str] = set()
+        if int(cores_per_worker) > 0 and not self.cpus:
+            self._warn("affinity", "cpu_affinity: sched_setaffinity indisponível nesta plataforma; só nice/ionice")
+        if self.ionice_class and not self.ionice:
+            self._warn("ionice", "cpu_affinity: comando ionice não encontrado; worker_ionice_class ignorado")
+
+    def _warn(self, key: str, text: str) -> None:
+        if key in self._warned:
+            return
+        self._warned.add(key)
+        if self.on_event is not None:
+            self.on_event(text)
+
+    @property
+    def blocks(self) -> int:
+        return max(1, len(self.cpus) // self.cores_per_worker)
+
+    def cores_for(self, lane: int) -> List[int]:
+        if not self.cpus:
+            return []
+        start = (int(lane) % self.blocks) * self.cores_per_worker
+        return self.cpus[start : start + self.cores_per_worker]
+
+    def apply(self, pids: Iterable[int], lane: int) -> None:
+        # Idempotente por (pid, lane): o pool chama a cada job e só processos novos ou trocados de lane pagam o custo.
+        fresh = [int(pid) for pid in pids if self._applied.get(int(pid)) != int(lane)]
+        if not fresh:
+            return
+        cores = set(self.cores_for(lane))
+        tids: List[int] = []
+        for pid in fresh:
+            self._applied[pid] = int(lane)
+            for tid in _thread_ids(pid):
+                tids.append(tid)
+                if cores:
+                    try:
+                        os.sched_setaffinity(tid, cores)
+                    except OSError as exc:
+                        self._warn(f"affinity:{exc.errno}", f"cpu_affinity: sched_setaffinity falhou ({exc})")
+                if self.set_nice:
+                    try:
+                        os.setpriority(os.PRIO_PROCESS, tid, self.nice)
+                    except (AttributeError, OSError) as exc:
+                        self._warn("nice", f"cpu_affinity: worker_nice {self.nice} não aplicado ({exc})")
+        if self.ionice:
+            cmd = [self.ionice, "-c", self.ionice_class]
+            if self.ionice_class != IONICE_CLASSES["idle"]:
+                cmd += ["-n", str(self.ionice_level)]
+            try:
+                subprocess.run(cmd + ["-p"] + [str(tid) for tid in tids], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+            except OSError as exc:
+                self._warn("ionice-run", f"cpu_affinity: ionice falhou ({exc})")
+
+    @property
+    def preexec(self) -> Optional[Callable[[], None]]:
+        # Para o preexec_fn do spawn: o nice vale antes do exec, então nenhuma thread do filho nasce com a prioridade
+        # do orquestrador. O apply() continua reaplicando (pool reaproveitado, troca de lane).
+        return child_priority(self.nice) if self.set_nice else None
+
+    def forget(self, pids: Iterable[int]) -> None:
+        for pid in pids:
+            self._applied.pop(int(pid), None)
+
+
+def child_priority(nice: int) -> Optional[Callable[[], None]]:
+    if os.name == "nt" or not hasattr(os, "setpriority"):
+        return None
+    nice = int(nice)
+
+    def _apply() -> None:
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, nice)
+        except OSError:
+            pass
+
+    return _apply
+
+
+def raise_own_priority(nice: int, cpus: List[int], on_event: Optional[Callable[[str], None]] = None) -> None:
+    # Orquestrador (supervisor, status, logs) acima dos workers: nice negativo exige privilégio; sem ele, fica o aviso
+    # e os workers com worker_nice > 0 já deixam o orquestrador relativamente na frente.
+    if int(nice) != 0:
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, int(nice))
+        except (AttributeError, OSError) as exc:
+            if on_event is not None:
+                on_event(f"cpu_affinity: orchestrator_nice {nice} não aplicado ({exc})")
+    if cpus:
+        try:
+            os.sched_setaffinity(0, set(cpus))
+        except (AttributeError, OSError) as exc:
+            if on_event is not None:
+                on_event(f"cpu_affinity: orquestrador não fixado nas CPUs reservadas ({exc})")
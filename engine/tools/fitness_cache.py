@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+CACHE_VERSION = 1
+CACHE_POLICIES = ("never", "every_n", "blend")
+
+
+def weights_digest(weights: Iterable[Any]) -> str:
+    h = hashlib.sha1()
+    for w in weights:
+        arr = np.ascontiguousarray(np.asarray(w, dtype="<f4"))
+        h.update(str(arr.shape).encode("ascii"))
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+def genes_digest(genes: Dict[str, Any]) -> str:
+    raw = json.dumps(genes, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+def context_digest(payload: Any) -> str:
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+@dataclass
+class FitnessRecord:
+    fitness: float
+    samples: int = 1
+    generation: int = 0
+    stats: Dict[str, Any] = field(default_factory=dict)
+    updated_at: float = 0.0
+
+
+class FitnessCache:
+    def __init__(self, policy: str = "never", every_n: int = 5, context: str = "", max_entries: int = 20000) -> None:
+        policy = str(policy or "never").strip().lower()
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"política de cache inválida: {policy} (use {', '.join(CACHE_POLICIES)})")
+        self.policy = policy
+        self.every_n = max(1, int(every_n))
+        self.context = str(context or "")
+        self.max_entries = int(max_entries)
+        self.entries: Dict[str, FitnessRecord] = {}
+        self.dirty: set = set()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, genome_sig: str, opponent_sig: str) -> str:
+        return f"{genome_sig}|{opponent_sig}|{self.context}"
+
+    def lookup(self, genome_sig: str, opponent_sig: str, generation: int) -> Optional[FitnessRecord]:
+        record = self.entries.get(self.key(genome_sig, opponent_sig))
+        if record is None or not self._is_fresh(record, generation):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return record
+
+    def _is_fresh(self, record: FitnessRecord, generation: int) -> bool:
+        if self.policy == "never":
+            return True
+        # every_n e blend reavaliam no mesmo ritmo; blend só muda como a nova amostra é incorporada.
+        return int(generation) - int(record.generation) < self.every_n
+
+    def store(self, genome_sig: str, opponent_sig: str, fitness: float, samples: int, generation: int, stats: Optional[Dict[str, Any]] = None) -> FitnessRecord:
+        key = self.key(genome_sig, opponent_sig)
+        previous = self.entries.get(key)
+        samples = max(1, int(samples))
+        value = float(fitness)
+        if self.policy == "blend" and previous is not None:
+            total = int(previous.samples) + samples
+            value = (float(previous.fitness) * int(previous.samples) + value * samples) / float(total)
+            samples = total
+        record = FitnessRecord(
+            fitness=value,
+            samples=samples,
+            generation=int(generation),
+            stats=dict(stats or {}),
+            updated_at=time.time(),
+        )
+        self.entries[key] = record
+        self.dirty.add(key)
+        return record
+
+    def merge(self, other: "FitnessCache", mark_dirty: bool = False) -> None:
+        for key, record in other.entries.items():
+            mine = self.entries.get(key)
+            if mine is None or (record.samples, record.updated_at) > (mine.samples, mine.updated_at):
+                self.entries[key] = record
+                if mark_dirty:
+                    self.dirty.add(key)
+
+    def _prune(self) -> None:
+        if self.max_entries <= 0 or len(self.entries) <= self.max_entries:
+            return
+        ordered = sorted(self.entries.items(), key=lambda kv: kv[1].updated_at, reverse=True)
+        self.entries = dict(ordered[: self.max_entries])
+        self.dirty &= set(self.entries)
+
+    def to_dict(self, dirty_only: bool = False) -> Dict[str, Any]:
+        keys = [k for k in self.entries if k in self.dirty] if dirty_only else list(self.entries)
+        return {
+            "version": CACHE_VERSION,
+            "entries": {key: asdict(self.entries[key]) for key in keys},
+        }
+
+    def load(self, path: str | Path, mark_dirty: bool = False) -> int:
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                payload = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return 0
+        if not isinstance(payload, dict) or int(payload.get("version", 0)) != CACHE_VERSION:
+            return 0
+        entries = payload.get("entries", {})
+        if not isinstance(entries, dict):
+            return 0
+        loaded = FitnessCache(self.policy, self.every_n, self.context, 0)
+        for key, raw in entries.items():
+            if not isinstance(raw, dict):
+                continue
+            try:
+                loaded.entries[str(key)] = FitnessRecord(
+                    fitness=float(raw.get("fitness", 0.0)),
+                    samples=int(raw.get("samples", 1)),
+                    generation=int(raw.get("generation", 0)),
+                    stats=raw.get("stats", {}) if isinstance(raw.get("stats"), dict) else {},
+                    updated_at=float(raw.get("updated_at", 0.0)),
+                )
+            except (TypeError, ValueError):
+                continue
+        self.merge(loaded, mark_dirty=mark_dirty)
+        return len(loaded.entries)
+
+    def save(self, path: str | Path, dirty_only: bool = False) -> None:
+        # dirty_only grava só o que este processo avaliou, para o cache de cada worker não duplicar o compartilhado.
+        self._prune()
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(target.name + f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self.to_dict(dirty_only)), encoding="utf-8")
+        os.replace(tmp_path, target)
+
+
+def merge_cache_files(target: str | Path, sources: List[str | Path], max_entries: int = 20000) -> int:
+    cache = FitnessCache(max_entries=max_entries)
+    cache.load(target)
+    for src in sources:
+        cache.load(src)
+    cache.save(target)
+    return len(cache.entries)
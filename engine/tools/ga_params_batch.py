@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import argparse
+import math
+import random
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from ga_params_schema_v1 import gene_layout
+
+# Forma em lote do ParamGenome.act: K linhas = K pares (genoma, observação), cada decisão do act vira uma máscara.
+# Serve para várias arenas do trainer ga_params no mesmo passo e para pontuar um conjunto de genes contra
+# situações gravadas (M genomas × S situações por broadcast). O resultado é o mesmo do caminho escalar, desde que
+# cada linha receba o mesmo sorteio de dash (`rolls`) que o rng.random() do act consumiria naquele frame.
+
+INF = float("inf")
+SENSOR_KEYS = ("front_wall_distance", "ground_distance", "ceiling_distance", "ledge_ground_distance")
+
+
+class ObsBatch(NamedTuple):
+    dx: np.ndarray
+    dy: np.ndarray
+    distance: np.ndarray
+    facing: np.ndarray
+    arrows: np.ndarray
+    inactive: np.ndarray
+    wall_ahead: np.ndarray
+    ledge_ahead: np.ndarray
+    front_wall_distance: np.ndarray
+    ground_distance: np.ndarray
+    ceiling_distance: np.ndarray
+    ledge_ground_distance: np.ndarray
+
+
+class ActionBatch(NamedTuple):
+    axis: np.ndarray
+    aim_x: np.ndarray
+    aim_y: np.ndarray
+    jump_pressed: np.ndarray
+    shoot_pressed: np.ndarray
+    shoot_is_pressed: np.ndarray
+    melee_pressed: np.ndarray
+    dash_pressed: np.ndarray
+
+
+def _vec2(value: Any) -> Tuple[float, float]:
+    if isinstance(value, dict) and "x" in value and "y" in value:
+        return float(value["x"]), float(value["y"])
+    if isinstance(value, (list, tuple)) and len(value) >= 2:
+        return float(value[0]), float(value[1])
+    return 0.0, 0.0
+
+
+def stack_observations(observations: Sequence[Dict[str, Any]]) -> ObsBatch:
+    # Mesma leitura do act(): sensores ausentes ou 0 viram inf, facing 0 vira 1. A distância sai do math.hypot,
+    # como no escalar (np.hypot pode diferir no último bit e virar uma comparação de alcance).
+    rows: List[Tuple[float, ...]] = []
+    for obs in observations:
+        obs = obs if isinstance(obs, dict) else {}
+        self_state = obs.get("self", {}) if isinstance(obs.get("self"), dict) else {}
+        match_state = obs.get("match", {}) if isinstance(obs.get("match"), dict) else {}
+        sensors = self_state.get("sensors", {}) if isinstance(self_state.get("sensors"), dict) else {}
+        dx, dy = _vec2(obs.get("delta_position", [0.0, 0.0]))
+        inactive = bool(self_state.get("is_dead", False)) or ("round_active" in match_state and not bool(match_state.get("round_active")))
+        rows.append(
+            (
+                dx,
+                dy,
+                math.hypot(dx, dy),
+                float(int(self_state.get("facing", 1) or 1)),
+                float(int(self_state.get("arrows", 0) or 0)),
+                float(inactive),
+                float(bool(sensors.get("wall_ahead", False))),
+                float(bool(sensors.get("ledge_ahead", False))),
+                *(float(sensors.get(key, INF) or INF) for key in SENSOR_KEYS),
+            )
+        )
+    table = np.array(rows, dtype=np.float64).reshape(len(rows), len(ObsBatch._fields))
+    bool_fields = ("inactive", "wall_ahead", "ledge_ahead")
+    return ObsBatch(*(table[:, i] != 0.0 if name in bool_fields else table[:, i] for i, name in enumerate(ObsBatch._fields)))
+
+
+class ControlState:
+    # Estado por linha do act(): segurar/soltar o tiro e os cooldowns de intenção.
+    __slots__ = (
+        "shoot_hold_remaining",
+        "shoot_cooldown_remaining",
+        "shoot_release_frame",
+        "dash_cooldown_remaining",
+        "jump_cooldown_remaining",
+        "melee_cooldown_remaining",
+        "last_jump_intent",
+        "last_melee_intent",
+    )
+
+    def __init__(self, shape: int | Tuple[int, ...]) -> None:
+        for name in self.__slots__:
+            dtype = np.bool_ if name.startswith(("last_", "shoot_release")) else np.float64
+            setattr(self, name, np.zeros(shape, dtype=dtype))
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.shoot_hold_remaining.shape
+
+    def reset(self, mask: np.ndarray | None = None) -> None:
+        # Linha cujo episódio acabou volta ao estado de reset_controls() sem mexer nas outras.
+        for name in self.__slots__:
+            arr = getattr(self, name)
+            if mask is None:
+                arr[...] = 0
+            else:
+                arr[mask] = 0
+
+
+def _genes(genes: np.ndarray) -> Dict[str, np.ndarray]:
+    layout = gene_layout()
+    genes = np.asarray(genes, dtype=np.float64)
+    cols = {key.replace(".", "_"): genes[..., idx] for key, idx in layout.index.items()}
+    for key, is_bool in zip(layout.keys, layout.is_bool.tolist()):
+        if is_bool:
+            cols[key.replace(".", "_")] = cols[key.replace(".", "_")] != 0.0
+    return cols
+
+
+def act_batch(genes: np.ndarray, obs: ObsBatch, state: ControlState, rolls: np.ndarray, dt: float | np.ndarray) -> ActionBatch:
+    # genes (..., n_genes) no gene_layout(); obs, rolls e dt fazem broadcast até state.shape. O estado é atualizado
+    # no lugar, só nas linhas vivas (morto/fora de rodada não gasta cooldown, como no act()).
+    p = _genes(genes)
+    shape = state.shape
+    live = np.broadcast_to(~obs.inactive, shape)
+    dt = np.asarray(dt, dtype=np.float64)
+    s = state
+
+    shoot_cd = np.where(live, np.maximum(0.0, s.shoot_cooldown_remaining - dt), s.shoot_cooldown_remaining)
+    dash_cd = np.where(live, np.maximum(0.0, s.dash_cooldown_remaining - dt), s.dash_cooldown_remaining)
+    jump_cd = np.where(live, np.maximum(0.0, s.jump_cooldown_remaining - dt), s.jump_cooldown_remaining)
+    melee_cd = np.where(live, np.maximum(0.0, s.melee_cooldown_remaining - dt), s.melee_cooldown_remaining)
+
+    dx = obs.dx
+    dy = obs.dy
+    facing = obs.facing
+    abs_dx = np.abs(dx)
+    abs_dy = np.abs(dy)
+    distance_v = obs.distance
+
+    keep_distance = p["movement_keep_distance"]
+    deadzone_x = p["movement_approach_deadzone_x"]
+    toward = np.where(dx > 0, 1.0, -1.0)
+    far = abs_dx > np.maximum(deadzone_x, keep_distance)
+    near = abs_dx < keep_distance * p["movement_backoff_ratio"]
+    tiny = abs_dx < np.maximum(2.0, deadzone_x)
+    axis = np.where(far, toward, np.where(near, np.where(tiny, -facing, -toward), 0.0))
+
+    avoid_ledges = p["safety_avoid_ledges"]
+    avoid_walls = p["safety_avoid_walls"]
+    forward = (axis != 0.0) & (np.where(axis > 0, 1.0, -1.0) == facing)
+    blocked = (avoid_ledges & obs.ledge_ahead) | (
+        avoid_ledges & ~obs.ledge_ahead & (obs.ledge_ground_distance > p["safety_max_safe_drop_distance"])
+    )
+    blocked |= (avoid_walls & obs.wall_ahead) | (avoid_walls & (obs.front_wall_distance < p["safety_wall_stop_distance"]))
+    axis = np.where(forward & blocked, 0.0, axis)
+    airborne = obs.ground_distance > p["safety_air_ground_distance"]
+
+    has_distance = distance_v > 0
+    safe = np.where(has_distance, distance_v, 1.0)
+    aim_x = np.where(has_distance, dx / safe, 1.0)
+    aim_y = np.where(has_distance, dy / safe, 0.0)
+
+    want_shoot = (
+        (obs.arrows > 0)
+        & (distance_v > p["shoot_min_distance"])
+        & (distance_v < p["shoot_max_distance"])
+        & (abs_dx > p["shoot_dx_min"])
+        & (abs_dy < p["shoot_y_tolerance"])
+    )
+    melee_intent = (distance_v < p["melee_range"]) & (melee_cd <= 0.0)
+    jump_intent = (dy < -p["jump_chase_dy"]) & (abs_dx > 80.0) & (jump_cd <= 0.0)
+    jump_intent &= ~(obs.ceiling_distance < p["safety_ceiling_block_distance"]) & ~airborne
+    dash_intent = p["dash_use"] & (distance_v > p["dash_range"]) & (dash_cd <= 0.0) & (rolls < p["dash_probability"]) & ~airborne
+
+    axis = np.where(want_shoot, 0.0, axis)
+    melee_intent = live & melee_intent & ~want_shoot
+    jump_intent = live & jump_intent & ~want_shoot
+    dash_intent = live & dash_intent & ~want_shoot
+
+    # Máquina do tiro: frame de soltar > segurando > começar a segurar.
+    release = s.shoot_release_frame
+    holding = live & ~release & (s.shoot_hold_remaining > 0.0)
+    start = live & ~release & ~holding & want_shoot & (shoot_cd <= 0.0)
+    hold = np.where(holding, np.maximum(0.0, s.shoot_hold_remaining - dt), s.shoot_hold_remaining)
+    hold = np.where(start, np.maximum(0.01, p["shoot_hold_seconds"]), hold)
+    finished = holding & (hold <= 0.0)
+    shoot_cd = np.where(finished, np.maximum(shoot_cd, p["shoot_intent_cooldown"]), shoot_cd)
+
+    melee_pressed = melee_intent & ~s.last_melee_intent
+    melee_cd = np.where(melee_pressed, np.maximum(melee_cd, p["melee_intent_cooldown"]), melee_cd)
+    jump_pressed = jump_intent & ~s.last_jump_intent
+    jump_cd = np.where(jump_pressed, np.maximum(jump_cd, p["jump_intent_cooldown"]), jump_cd)
+    dash_cd = np.where(dash_intent, np.maximum(dash_cd, p["dash_intent_cooldown"]), dash_cd)
+
+    s.shoot_hold_remaining = np.broadcast_to(hold, shape).copy()
+    s.shoot_cooldown_remaining = np.broadcast_to(shoot_cd, shape).copy()
+    s.shoot_release_frame = np.where(live, finished, release)
+    s.dash_cooldown_remaining = np.broadcast_to(dash_cd, shape).copy()
+    s.jump_cooldown_remaining = np.broadcast_to(jump_cd, shape).copy()
+    s.melee_cooldown_remaining = np.broadcast_to(melee_cd, shape).copy()
+    s.last_jump_intent = np.where(live, jump_intent, s.last_jump_intent)
+    s.last_melee_intent = np.where(live, melee_intent, s.last_melee_intent)
+
+    return ActionBatch(
+        axis=np.broadcast_to(np.where(live, axis, 0.0), shape),
+        aim_x=np.broadcast_to(aim_x, shape),
+        aim_y=np.broadcast_to(aim_y, shape),
+        jump_pressed=jump_pressed,
+        shoot_pressed=start,
+        shoot_is_pressed=holding | start,
+        melee_pressed=melee_pressed,
+        dash_pressed=dash_intent,
+    )
+
+
+def action_dict(actions: ActionBatch, index: int | Tuple[int, ...]) -> Dict[str, Any]:
+    # Uma linha do lote no formato que o act() devolve para o bridge.
+    axis = float(actions.axis[index])
+    return {
+        "axis": axis,
+        "aim": [float(actions.aim_x[index]), float(actions.aim_y[index])],
+        "jump_pressed": bool(actions.jump_pressed[index]),
+        "shoot_pressed": bool(actions.shoot_pressed[index]),
+        "shoot_is_pressed": bool(actions.shoot_is_pressed[index]),
+        "melee_pressed": bool(actions.melee_pressed[index]),
+        "ult_pressed": False,
+        "dash_pressed": ["r1"] if bool(actions.dash_pressed[index]) else [],
+        "actions": {"left": axis < 0.0, "right": axis > 0.0, "up": False, "down": False},
+    }
+
+
+def evaluate_situations(genes: np.ndarray, obs: ObsBatch, dt: float, rng: np.random.Generator) -> ActionBatch:
+    # Primeira decisão de M genomas em S situações gravadas (estado zerado): saída (M, S).
+    genes = np.atleast_2d(np.asarray(genes, dtype=np.float64))
+    shape = (genes.shape[0], obs.dx.shape[0])
+    return act_batch(genes[:, None, :], obs, ControlState(shape), rng.random(shape), dt)
+
+
+def replay_frames(genes: np.ndarray, frames: Sequence[ObsBatch], dt: float, rng: np.random.Generator) -> List[ActionBatch]:
+    # M genomas reagindo à mesma sequência de T frames (cada frame com S linhas); o estado corre entre os frames.
+    genes = np.atleast_2d(np.asarray(genes, dtype=np.float64))
+    if not frames:
+        return []
+    shape = (genes.shape[0], frames[0].dx.shape[0])
+    state = ControlState(shape)
+    return [act_batch(genes[:, None, :], frame, state, rng.random(shape), dt) for frame in frames]
+
+
+class _FixedRoll:
+    # rng do act() escalar que devolve o sorteio de dash que a linha recebeu no lote.
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def random(self) -> float:
+        return self.value
+
+
+def _random_genes(gen: np.random.Generator, count: int) -> np.ndarray:
+    # Floats uniformes nos limites do schema e bools sorteados, para exercitar os dois lados de cada máscara.
+    layout = gene_layout()
+    lo = np.where(np.isfinite(layout.lo), layout.lo, layout.defaults - 1.0)
+    hi = np.where(np.isfinite(layout.hi), layout.hi, layout.defaults + 1.0)
+    floats = lo + (hi - lo) * gen.random((count, len(layout.keys)))
+    return np.where(layout.is_bool, (gen.random((count, len(layout.keys))) < 0.5).astype(np.float64), floats)
+
+
+def _random_obs(rng: random.Random) -> Dict[str, Any]:
+    # Inclui morto/fora de rodada, sensor ausente ou 0 (vira inf), facing 0/None e delta zerado.
+    sensors: Dict[str, Any] = {"wall_ahead": rng.random() < 0.2, "ledge_ahead": rng.random() < 0.2}
+    for key in SENSOR_KEYS:
+        roll = rng.random()
+        if roll >= 0.1:
+            sensors[key] = 0 if roll < 0.2 else rng.uniform(0.0, 150.0)
+    dx = rng.uniform(-900.0, 900.0) if rng.random() > 0.05 else 0.0
+    dy = rng.uniform(-400.0, 400.0) if rng.random() > 0.05 else 0.0
+    return {
+        "delta_position": [dx, dy],
+        "self": {
+            "facing": rng.choice([1, -1, 0, None]),
+            "arrows": rng.choice([0, 1, 3, None]),
+            "is_dead": rng.random() < 0.05,
+            "sensors": sensors,
+        },
+        "match": ({"round_active": rng.random() > 0.05} if rng.random() < 0.5 else {}),
+    }
+
+
+def selftest(rows: int = 200, frames: int = 150, situations: int = 64, seed: int = 0) -> List[str]:
+    # Diferencial contra o ParamGenome.act: ações e estado (ControlState × atributos do genoma) frame a frame, e
+    # evaluate_situations contra o act() de um genoma recém-resetado. Devolve as divergências encontradas.
+    from training_ga_params import ParamGenome
+
+    rng = random.Random(seed)
+    gen = np.random.default_rng(seed)
+    genes = _random_genes(gen, rows)
+    genomes = [ParamGenome(values, {}) for values in genes]
+    genes = np.stack([g.values for g in genomes])
+    state = ControlState(rows)
+    fixed = _FixedRoll()
+    problems: List[str] = []
+    for frame in range(frames):
+        observations = [_random_obs(rng) for _ in range(rows)]
+        dt = rng.choice([0.0, 1.0 / 60.0, 1.0 / 30.0, 0.1, 0.4])
+        rolls = gen.random(rows)
+        actions = act_batch(genes, stack_observations(observations), state, rolls, dt)
+        for k, genome in enumerate(genomes):
+            fixed.value = float(rolls[k])
+            expected = genome.act(observations[k], fixed, dt)
+            got = action_dict(actions, k)
+            if expected != got:
+                problems.append(f"frame {frame} linha {k}: act={expected} lote={got}")
+            for name in ControlState.__slots__:
+                scalar = getattr(genome, name)
+                batch = getattr(state, name)[k]
+                if (bool(scalar) != bool(batch)) if isinstance(scalar, bool) else float(scalar) != float(batch):
+                    problems.append(f"frame {frame} linha {k}: {name} act={scalar} lote={batch}")
+        if len(problems) > 20:
+            return problems
+
+    observations = [_random_obs(rng) for _ in range(situations)]
+    count = min(rows, 32)
+    actions = evaluate_situations(genes[:count], stack_observations(observations), 1.0 / 60.0, np.random.default_rng(seed + 1))
+    rolls = np.random.default_rng(seed + 1).random((count, situations))
+    for m in range(count):
+        for i, obs in enumerate(observations):
+            genomes[m].reset_controls()
+            fixed.value = float(rolls[m, i])
+            expected = genomes[m].act(obs, fixed, 1.0 / 60.0)
+            got = action_dict(actions, (m, i))
+            if expected != got:
+                problems.append(f"situação {i} genoma {m}: act={expected} lote={got}")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Política ga_params em lote")
+    parser.add_argument("--selftest", action="store_true", help="compara act_batch com o ParamGenome.act escalar")
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if not args.selftest:
+        parser.print_help()
+        return 0
+    problems = selftest(int(args.rows), int(args.frames), seed=int(args.seed))
+    for line in problems[:20]:
+        print(line)
+    print(f"selftest: {len(problems)} divergências ({args.rows} linhas × {args.frames} frames + evaluate_situations)")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
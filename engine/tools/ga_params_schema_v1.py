@@ -1,9 +1,13 @@
 from __future__ import annotations
 
 import math
+from collections import namedtuple
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any, Dict, Tuple
 
+import numpy as np
+
 
 @dataclass(frozen=True)
 class GeneSpec:
@@ -75,29 +79,81 @@ def defaults_v1() -> Dict[str, Any]:
     }
 
 
-def clamp_genes(genes: Dict[str, Any]) -> Dict[str, Any]:
+@dataclass(frozen=True)
+class GeneLayout:
+    # schema_v1 compilado uma vez: posição de cada gene no vetor e limites/desvios como vetores NumPy.
+    # Genes bool ficam no vetor como 0.0/1.0 (limites 0..1, sem desvio).
+    keys: Tuple[str, ...]
+    index: Dict[str, int]
+    is_bool: np.ndarray
+    lo: np.ndarray
+    hi: np.ndarray
+    mut_std: np.ndarray
+    defaults: np.ndarray
+    scale: np.ndarray
+
+
+# Genes por atributo (movement.keep_distance -> movement_keep_distance) para o caminho por frame.
+GeneValues = namedtuple("GeneValues", [key.replace(".", "_") for key in schema_v1()])
+
+
+@lru_cache(maxsize=None)
+def gene_layout() -> GeneLayout:
     spec = schema_v1()
-    out: Dict[str, Any] = {}
-    for key, s in spec.items():
+    defaults = defaults_v1()
+    keys = tuple(spec)
+    is_bool = np.array([s.type == "bool" for s in spec.values()], dtype=bool)
+    lo = np.array([0.0 if s.type == "bool" else (-np.inf if s.min is None else float(s.min)) for s in spec.values()])
+    hi = np.array([1.0 if s.type == "bool" else (np.inf if s.max is None else float(s.max)) for s in spec.values()])
+    mut_std = np.array([np.nan if s.mut_std is None else float(s.mut_std) for s in spec.values()])
+    span = hi - lo
+    # Mesma normalização do distance(): diferença dividida pelo intervalo do gene; bool conta 1 por diferença.
+    scale = np.where(is_bool | ~np.isfinite(span) | (span <= 1e-9), 1.0, 1.0 / np.where(span > 1e-9, span, 1.0))
+    default_values = np.array([float(defaults.get(key, 0.0)) for key in keys])
+    for arr in (is_bool, lo, hi, mut_std, default_values, scale):
+        arr.setflags(write=False)
+    return GeneLayout(keys, {key: i for i, key in enumerate(keys)}, is_bool, lo, hi, mut_std, default_values, scale)
+
+
+def genes_to_array(genes: Dict[str, Any]) -> np.ndarray:
+    # Gene ausente ou que não vira número fica com o default, como no clamp_genes.
+    layout = gene_layout()
+    out = layout.defaults.copy()
+    for i, key in enumerate(layout.keys):
         if key not in genes:
-            out[key] = defaults_v1().get(key)
             continue
-        value = genes.get(key)
-        if s.type == "bool":
-            out[key] = bool(value)
+        value = genes[key]
+        if layout.is_bool[i]:
+            out[i] = 1.0 if bool(value) else 0.0
             continue
         try:
-            v = float(value)
+            out[i] = float(value)
         except Exception:
-            v = float(defaults_v1().get(key, 0.0))
-        if s.min is not None:
-            v = max(float(s.min), v)
-        if s.max is not None:
-            v = min(float(s.max), v)
-        out[key] = v
+            pass
     return out
 
 
+def clamp_array(values: np.ndarray) -> np.ndarray:
+    layout = gene_layout()
+    # NaN vai para o mínimo, como o max()/min() escalar fazia.
+    floats = np.clip(np.where(np.isnan(values), layout.lo, values), layout.lo, layout.hi)
+    return np.where(layout.is_bool, (values != 0.0).astype(np.float64), floats)
+
+
+def array_to_genes(values: np.ndarray) -> Dict[str, Any]:
+    layout = gene_layout()
+    return {key: (bool(v) if b else v) for key, v, b in zip(layout.keys, values.tolist(), layout.is_bool.tolist())}
+
+
+def gene_values(values: np.ndarray) -> GeneValues:
+    layout = gene_layout()
+    return GeneValues._make(bool(v) if b else v for v, b in zip(values.tolist(), layout.is_bool.tolist()))
+
+
+def clamp_genes(genes: Dict[str, Any]) -> Dict[str, Any]:
+    return array_to_genes(clamp_array(genes_to_array(genes)))
+
+
 def merge_handmade_into_defaults(handmade_payload: Dict[str, Any]) -> Dict[str, Any]:
     if not isinstance(handmade_payload, dict):
         return defaults_v1()
@@ -197,27 +253,29 @@ def handmade_from_genes(genes: Dict[str, Any], base_handmade: Dict[str, Any] | N
     return out
 
 
+def distance_arrays(a: np.ndarray, b: np.ndarray) -> float:
+    layout = gene_layout()
+    diff = np.where(layout.is_bool, ((a != 0.0) != (b != 0.0)).astype(np.float64), (a - b) * layout.scale)
+    return math.sqrt(max(0.0, float(np.dot(diff, diff))))
+
+
+def normalized_array(values: np.ndarray) -> np.ndarray:
+    # Coordenadas em que o distance() é euclidiano: float dividido pelo intervalo, bool 0/1.
+    layout = gene_layout()
+    return np.where(layout.is_bool, (np.asarray(values) != 0.0).astype(np.float64), np.asarray(values, dtype=np.float64) * layout.scale)
+
+
+def distances_to(a: np.ndarray, others: np.ndarray) -> np.ndarray:
+    diff = normalized_array(others) - normalized_array(a)
+    return np.sqrt(np.einsum("...k,...k->...", diff, diff))
+
+
+def distance_matrix(values: np.ndarray) -> np.ndarray:
+    # (P, n_genes) -> (P, P) de uma vez, no lugar de P² chamadas de distance().
+    norm = normalized_array(np.atleast_2d(values))
+    diff = norm[:, None, :] - norm[None, :, :]
+    return np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+
+
 def distance(a: Dict[str, Any], b: Dict[str, Any]) -> float:
-    spec = schema_v1()
-    d = 0.0
-    for key, s in spec.items():
-        va = a.get(key)
-        vb = b.get(key)
-        if s.type == "bool":
-            d += 1.0 if bool(va) != bool(vb) else 0.0
-            continue
-        try:
-            fa = float(va)
-        except Exception:
-            fa = float(defaults_v1().get(key, 0.0))
-        try:
-            fb = float(vb)
-        except Exception:
-            fb = float(defaults_v1().get(key, 0.0))
-        scale = 1.0
-        if s.max is not None and s.min is not None:
-            span = float(s.max) - float(s.min)
-            if span > 1e-9:
-                scale = 1.0 / span
-        d += (fa - fb) * (fa - fb) * scale * scale
-    return math.sqrt(max(0.0, d))
+    return distance_arrays(genes_to_array(a), genes_to_array(b))
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ga_params_schema_v1 import array_to_genes, clamp_array, gene_layout, genes_to_array
+
+# Otimizador TPE (tree-structured Parzen estimator) sobre o espaço do schema_v1. Cada amostra de fitness é uma
+# partida inteira no Godot, então em vez de mutar às cegas ele usa todo o histórico (genes, fitness): separa os
+# melhores `gamma` (l) do resto (g), sorteia candidatos de l e fica com o que maximiza l(x)/g(x). Floats vivem em
+# [0, 1] pelos limites do GeneSpec; bool é categórico. O histórico é um JSONL que só cresce e é compartilhado entre
+# execuções e workers; na memória fica só uma janela dele (MAX_HISTORY).
+
+HISTORY_VERSION = 1
+LOG_2PI = math.log(2.0 * math.pi)
+# Histórico em memória: os melhores (fração gamma) + os mais recentes até este total. O arquivo guarda tudo.
+MAX_HISTORY = 2000
+PDF_CHUNK = 1 << 20
+
+
+def _search_bounds() -> Tuple[np.ndarray, np.ndarray]:
+    # Gene sem limite no schema busca em volta do default (10 passos de mutação para cada lado).
+    layout = gene_layout()
+    step = np.where(np.isnan(layout.mut_std), 1.0, layout.mut_std) * 10.0
+    lo = np.where(np.isfinite(layout.lo), layout.lo, layout.defaults - step)
+    hi = np.where(np.isfinite(layout.hi), layout.hi, layout.defaults + step)
+    return lo, np.where(hi - lo > 1e-9, hi - lo, 1.0)
+
+
+def _logsumexp(values: np.ndarray, axis: int) -> np.ndarray:
+    peak = np.max(values, axis=axis, keepdims=True)
+    peak = np.where(np.isfinite(peak), peak, 0.0)
+    return np.squeeze(peak, axis=axis) + np.log(np.sum(np.exp(values - peak), axis=axis))
+
+
+class ParzenEstimator:
+    # Mistura de um kernel por observação + prior uniforme (peso `prior_weight`), em coordenadas normalizadas.
+    # `reserve` deixa espaço para os pontos do add() (as "mentiras" do propose) sem refazer o estimador.
+    def __init__(self, points: np.ndarray, is_bool: np.ndarray, prior_weight: float, min_bandwidth: float, reserve: int = 0) -> None:
+        n, dim = points.shape
+        self._buf = np.empty((n + max(0, int(reserve)), dim))
+        self._buf[:n] = points
+        self.n = n
+        self.is_bool = is_bool
+        n_float = max(1, int(np.count_nonzero(~is_bool)))
+        if n > 1:
+            # Regra de Scott por dimensão, com piso para não colapsar em cima de um ponto só.
+            bw = np.std(points, axis=0) * float(n) ** (-1.0 / (n_float + 4))
+        else:
+            bw = np.full(dim, 0.25)
+        self.bandwidth = np.clip(bw, float(min_bandwidth), 0.5)
+        # Bool: chance de trocar o valor do kernel; diminui conforme há mais observações.
+        self.flip = max(0.05, 1.0 / (n + 2.0))
+        self.prior_weight = max(1e-9, float(prior_weight))
+
+    @property
+    def points(self) -> np.ndarray:
+        return self._buf[: self.n]
+
+    def add(self, point: np.ndarray) -> None:
+        # Banda e flip ficam os do conjunto original; só entra mais um kernel na mistura.
+        if self.n >= len(self._buf):
+            self._buf = np.vstack([self._buf, np.empty_like(self._buf[: max(1, self.n)])])
+        self._buf[self.n] = point
+        self.n += 1
+
+    def log_pdf(self, x: np.ndarray) -> np.ndarray:
+        # x (C, D) -> (C,). Os pontos entram em blocos de até PDF_CHUNK elementos (C × bloco × D): memória fixa
+        # qualquer que seja o tamanho do histórico.
+        floats = ~self.is_bool
+        n_bool = int(np.count_nonzero(self.is_bool))
+        inv_bw = 1.0 / self.bandwidth[floats]
+        x_f = x[:, floats] * inv_bw
+        x_b = x[:, self.is_bool]
+        log_norm = -float(np.sum(np.log(self.bandwidth[floats]))) - 0.5 * LOG_2PI * int(np.count_nonzero(floats))
+        log_same = math.log(1.0 - self.flip)
+        log_flip = math.log(self.flip)
+        log_total = math.log(self.n + self.prior_weight)
+        # Prior uniforme no cubo: densidade 1 nos floats, 1/2 por bool.
+        acc = np.full(x.shape[0], math.log(self.prior_weight) - math.log(2.0) * n_bool)
+        step = max(1, PDF_CHUNK // max(1, x.shape[0] * x.shape[1]))
+        points = self.points
+        for start in range(0, self.n, step):
+            block = points[start : start + step]
+            z = x_f[:, None, :] - block[None, :, floats] * inv_bw
+            log_k = -0.5 * np.einsum("cnk,cnk->cn", z, z) + log_norm
+            flips = np.count_nonzero(np.abs(x_b[:, None, :] - block[None, :, self.is_bool]) >= 0.5, axis=-1)
+            log_k += (n_bool - flips) * log_same + flips * log_flip
+            acc = np.logaddexp(acc, _logsumexp(log_k, axis=1))
+        return acc - log_total
+
+    def sample(self, count: int, gen: np.random.Generator) -> np.ndarray:
+        n, dim = self.n, self._buf.shape[1]
+        from_prior = (gen.random(count) < self.prior_weight / (n + self.prior_weight))[:, None]
+        centers = self.points[gen.integers(0, n, size=count)]
+        jitter = np.clip(centers + gen.normal(0.0, 1.0, centers.shape) * self.bandwidth, 0.0, 1.0)
+        bools = np.where(gen.random(centers.shape) < self.flip, 1.0 - centers, centers)
+        out = np.where(self.is_bool, bools, jitter)
+        uniform = gen.random((count, dim))
+        return np.where(from_prior, np.where(self.is_bool, np.round(uniform), uniform), out)
+
+
+def _window(fitness: np.ndarray, limit: int, gamma: float) -> np.ndarray:
+    # Índices (em ordem de chegada) que ficam: os `gamma` melhores de sempre + os mais recentes até `limit`.
+    n = len(fitness)
+    if limit <= 0 or n <= limit:
+        return np.arange(n)
+    top = min(limit, int(math.ceil(gamma * limit)))
+    best = np.argsort(-fitness, kind="stable")[:top]
+    return np.union1d(best, np.arange(n - (limit - top), n))
+
+
+class TPEOptimizer:
+    def __init__(
+        self,
+        history_path: str = "",
+        context: str = "",
+        gamma: float = 0.25,
+        startup: int = 12,
+        candidates: int = 64,
+        prior_weight: float = 1.0,
+        min_bandwidth: float = 0.03,
+        max_history: int = MAX_HISTORY,
+    ) -> None:
+        layout = gene_layout()
+        self.is_bool = layout.is_bool
+        self.lo, self.span = _search_bounds()
+        self.history_path = Path(history_path) if history_path else None
+        self.context = str(context)
+        self.gamma = min(0.9, max(0.01, float(gamma)))
+        self.startup = max(2, int(startup))
+        self.candidates = max(1, int(candidates))
+        self.prior_weight = float(prior_weight)
+        self.min_bandwidth = float(min_bandwidth)
+        self.max_history = max(0, int(max_history))
+        self.points: List[np.ndarray] = []
+        self.fitness: List[float] = []
+        self.loaded = 0
+        if self.history_path is not None:
+            self.loaded = self._load(self.history_path)
+
+    def __len__(self) -> int:
+        return len(self.fitness)
+
+    def _load(self, path: Path) -> int:
+        # Linhas de outro contexto (oponente/fórmula de fitness diferente) não são comparáveis e ficam de fora.
+        if not path.exists():
+            return 0
+        rows: List[Tuple[str, float]] = []
+        with path.open("r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    row = json.loads(line)
+                    genes = row["genes"]
+                    fitness = float(row["fitness"])
+                except Exception:
+                    continue
+                if not isinstance(genes, dict) or not math.isfinite(fitness):
+                    continue
+                if self.context and str(row.get("context", "")) != self.context:
+                    continue
+                rows.append((line, fitness))
+        # Só as linhas da janela viram array (relidas do texto): o arquivo pode ter dezenas de milhares de avaliações.
+        for i in _window(np.array([f for _, f in rows]), self.max_history, self.gamma).tolist():
+            self.points.append(self.normalize(clamp_array(genes_to_array(json.loads(rows[i][0])["genes"]))))
+            self.fitness.append(rows[i][1])
+        return len(rows)
+
+    def normalize(self, values: np.ndarray) -> np.ndarray:
+        return np.where(self.is_bool, values, (values - self.lo) / self.span)
+
+    def denormalize(self, unit: np.ndarray) -> np.ndarray:
+        return clamp_array(np.where(self.is_bool, np.round(unit), self.lo + np.clip(unit, 0.0, 1.0) * self.span))
+
+    def observe(self, samples: Iterable[Tuple[np.ndarray, float]], meta: Optional[dict] = None) -> int:
+        rows = []
+        for values, fitness in samples:
+            fitness = float(fitness)
+            if not math.isfinite(fitness):
+                continue
+            self.points.append(self.normalize(np.asarray(values, dtype=np.float64)))
+            self.fitness.append(fitness)
+            row = {"v": HISTORY_VERSION, "genes": array_to_genes(values), "fitness": fitness, "context": self.context, "t": int(time.time())}
+            if meta:
+                row.update(meta)
+            rows.append(json.dumps(row, ensure_ascii=False))
+        if rows and self.history_path is not None:
+            self.history_path.parent.mkdir(parents=True, exist_ok=True)
+            # Vários workers anexam no mesmo arquivo: o lote inteiro sai num único write() com O_APPEND, então
+            # as linhas de um worker não se misturam com as de outro.
+            fd = os.open(self.history_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, ("\n".join(rows) + "\n").encode("utf-8"))
+            finally:
+                os.close(fd)
+        if self.max_history and len(self.fitness) > self.max_history + self.max_history // 4:
+            keep = _window(np.asarray(self.fitness), self.max_history, self.gamma).tolist()
+            self.points = [self.points[i] for i in keep]
+            self.fitness = [self.fitness[i] for i in keep]
+        return len(rows)
+
+    def propose(self, count: int, gen: np.random.Generator) -> np.ndarray:
+        # (count, n_genes) na escala real. Cada escolhido entra em g como "mentira constante" (fitness ruim) para
+        # o lote não sair com vários candidatos em cima do mesmo pico.
+        count = max(0, int(count))
+        dim = len(self.is_bool)
+        if len(self.fitness) < self.startup:
+            return np.stack([self.denormalize(row) for row in gen.random((count, dim))]) if count else np.empty((0, dim))
+        points = np.stack(self.points)
+        order = np.argsort(-np.asarray(self.fitness), kind="stable")
+        n_good = max(1, min(len(order) - 1, int(math.ceil(self.gamma * len(order)))))
+        good = ParzenEstimator(points[order[:n_good]], self.is_bool, self.prior_weight, self.min_bandwidth)
+        bad = ParzenEstimator(points[order[n_good:]], self.is_bool, self.prior_weight, self.min_bandwidth, reserve=count)
+        out = []
+        for _ in range(count):
+            cand = good.sample(self.candidates, gen)
+            score = good.log_pdf(cand) - bad.log_pdf(cand)
+            best = cand[int(np.argmax(score))]
+            out.append(self.denormalize(best))
+            bad.add(best)
+        return np.stack(out) if out else np.empty((0, dim))
+
+    def stats(self) -> dict:
+        return {"observations": len(self.fitness), "loaded": int(self.loaded), "best": max(self.fitness) if self.fitness else None}
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+GENOME_BIN_SUFFIX = ".genome"
+GENOME_MAGIC = b"PVPGENOM"
+GENOME_FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGN = 64
+
+
+def _align(value: int) -> int:
+    return (value + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def is_binary_genome(path: str | Path) -> bool:
+    try:
+        with open(path, "rb") as file:
+            return file.read(len(GENOME_MAGIC)) == GENOME_MAGIC
+    except OSError:
+        return False
+
+
+def genome_suffix(fmt: str) -> str:
+    return GENOME_BIN_SUFFIX if str(fmt or "").strip().lower() in ("bin", "binary", "genome") else ".json"
+
+
+def _atomic_write(path: Path, chunks: List[bytes]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as file:
+        for chunk in chunks:
+            file.write(chunk)
+    os.replace(tmp_path, path)
+
+
+def _encode_binary(payload: Dict[str, Any]) -> List[bytes]:
+    weights = [np.ascontiguousarray(np.asarray(w, dtype="<f4")) for w in payload.get("weights", [])]
+    tensors: List[Dict[str, Any]] = []
+    offset = 0
+    for w in weights:
+        tensors.append({"shape": list(w.shape), "offset": offset})
+        offset = _align(offset + w.nbytes)
+    extra = {k: v for k, v in payload.items() if k != "weights"}
+    header = {"version": GENOME_FORMAT_VERSION, "dtype": "<f4", "tensors": tensors, "payload": extra}
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    # Offsets dos tensores são relativos ao início dos dados, que fica alinhado logo após o header.
+    header_bytes = header_bytes.ljust(_align(_PREAMBLE.size + len(header_bytes)) - _PREAMBLE.size, b" ")
+    chunks = [_PREAMBLE.pack(GENOME_MAGIC, GENOME_FORMAT_VERSION, len(header_bytes)), header_bytes]
+    cursor = 0
+    for spec, w in zip(tensors, weights):
+        if spec["offset"] > cursor:
+            chunks.append(b"\0" * (spec["offset"] - cursor))
+        chunks.append(w.tobytes())
+        cursor = spec["offset"] + w.nbytes
+    return chunks
+
+
+def _to_json_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(payload)
+    if "weights" in out:
+        out["weights"] = [np.asarray(w, dtype=np.float32).tolist() for w in out["weights"]]
+    return out
+
+
+def write_genome(path: str | Path, payload: Dict[str, Any]) -> None:
+    target = Path(path)
+    # Genomas sem pesos (ex.: ga_params) não se beneficiam do formato binário e ficam sempre em JSON.
+    if target.suffix.lower() == GENOME_BIN_SUFFIX and isinstance(payload.get("weights"), list):
+        _atomic_write(target, _encode_binary(payload))
+        return
+    _atomic_write(target, [json.dumps(_to_json_payload(payload)).encode("utf-8")])
+
+
+def _read_binary_header(file: Any) -> Dict[str, Any]:
+    preamble = file.read(_PREAMBLE.size)
+    if len(preamble) != _PREAMBLE.size:
+        raise ValueError("genoma binário truncado")
+    magic, version, header_len = _PREAMBLE.unpack(preamble)
+    if magic != GENOME_MAGIC:
+        raise ValueError("arquivo não é um genoma binário")
+    if version > GENOME_FORMAT_VERSION:
+        raise ValueError(f"versão de genoma binário não suportada: {version}")
+    header = json.loads(file.read(header_len).decode("utf-8"))
+    if not isinstance(header, dict):
+        raise ValueError("header de genoma binário inválido")
+    header["data_start"] = _align(_PREAMBLE.size + header_len)
+    return header
+
+
+def read_genome_header(path: str | Path) -> Dict[str, Any]:
+    if not is_binary_genome(path):
+        with open(path, "r", encoding="utf-8") as file:
+            payload = json.load(file)
+        if not isinstance(payload, dict):
+            return {}
+        return {k: v for k, v in payload.items() if k != "weights"}
+    with open(path, "rb") as file:
+        header = _read_binary_header(file)
+    extra = header.get("payload", {})
+    return dict(extra) if isinstance(extra, dict) else {}
+
+
+def read_genome(path: str | Path, mmap: bool = True) -> Dict[str, Any]:
+    if not is_binary_genome(path):
+        with open(path, "r", encoding="utf-8") as file:
+            payload = json.load(file)
+        return payload if isinstance(payload, dict) else {}
+    with open(path, "rb") as file:
+        header = _read_binary_header(file)
+    extra = header.get("payload", {})
+    payload: Dict[str, Any] = dict(extra) if isinstance(extra, dict) else {}
+    dtype = np.dtype(str(header.get("dtype", "<f4")))
+    data_start = int(header["data_start"])
+    weights: List[np.ndarray] = []
+    for spec in header.get("tensors", []):
+        shape = tuple(int(x) for x in spec.get("shape", []))
+        offset = data_start + int(spec.get("offset", 0))
+        count = int(np.prod(shape)) if shape else 1
+        if mmap and count > 0:
+            weights.append(np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape))
+        else:
+            with open(path, "rb") as file:
+                file.seek(offset)
+                weights.append(np.fromfile(file, dtype=dtype, count=count).reshape(shape))
+    payload["weights"] = weights
+    return payload
+
+
+def convert_genome(src: str | Path, dst: str | Path) -> None:
+    write_genome(dst, read_genome(src, mmap=False))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Converte genomas entre JSON e o formato binário (.genome)")
+    parser.add_argument("src", help="Genoma de entrada (.json ou .genome)")
+    parser.add_argument("dst", nargs="?", default="", help="Saída; a extensão define o formato (.json ou .genome)")
+    parser.add_argument("--info", action="store_true", help="Só mostra shapes e meta do genoma de entrada")
+    args = parser.parse_args()
+
+    src = Path(args.src)
+    if not src.exists():
+        print(f"[genome_io] arquivo não encontrado: {src}")
+        return 2
+    if args.info or not args.dst:
+        payload = read_genome(src)
+        shapes = [list(np.shape(w)) for w in payload.get("weights", [])]
+        print(json.dumps({"binary": is_binary_genome(src), "bytes": src.stat().st_size, "shapes": shapes, "meta": payload.get("meta", {})}, indent=2))
+        return 0
+    convert_genome(src, args.dst)
+    print(f"[genome_io] {src} -> {args.dst} ({Path(args.dst).stat().st_size} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
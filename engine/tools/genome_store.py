@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+STORE_NAME = "genomes"
+HASH_CHUNK = 1 << 20
+
+
+def file_digest(path: Path) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as file:
+        while True:
+            chunk = file.read(HASH_CHUNK)
+            if not chunk:
+                break
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class GenomeStore:
+    # Blobs imutáveis por sha256 do conteúdo (objects/ab/abcd....genome). top/, liga e best promovido viram
+    # hardlinks para o blob: o mesmo genoma copiado de rodada em rodada ocupa o disco uma vez só. O contador de
+    # links do próprio sistema de arquivos é a contagem de referências; blob com st_nlink 1 não é usado por ninguém
+    # e sai no gc(). Sem hardlink (outro disco, FS sem suporte) o destino vira cópia normal.
+    def __init__(self, root: Path, on_event: Optional[Callable[[str], None]] = None) -> None:
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.on_event = on_event
+        self._warned = False
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+
+    def digest(self, path: Path) -> str:
+        # Um seed do top é linkado para a liga e para o best na mesma rodada: não relê o arquivo se nada mudou.
+        st = os.stat(path)
+        key = (str(path), int(st.st_mtime_ns), int(st.st_size))
+        cached = self._digests.get(key)
+        if cached is None:
+            cached = file_digest(Path(path))
+            self._digests[key] = cached
+        return cached
+
+    def blob_path(self, digest: str, suffix: str) -> Path:
+        return self.objects / digest[:2] / f"{digest}{suffix.lower()}"
+
+    def put(self, src: Path) -> Path:
+        src = Path(src)
+        blob = self.blob_path(self.digest(src), src.suffix)
+        if blob.exists():
+            return blob
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        # Copia (não linka) a origem: o arquivo do worker pode ser regravado; o blob nunca muda depois de criado.
+        tmp = blob.with_name(blob.name + f".{os.getpid()}.tmp")
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, blob)
+        return blob
+
+    def link(self, src: Path, dst: Path) -> str:
+        blob = self.put(src)
+        dst = Path(dst)
+        try:
+            if dst.exists() and os.path.samefile(blob, dst):
+                return blob.stem
+        except OSError:
+            pass
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dst.with_name(dst.name + f".{os.getpid()}.lnk")
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        try:
+            os.link(blob, tmp)
+        except OSError as exc:
+            if not self._warned and self.on_event is not None:
+                self.on_event(f"genome_store: hardlink indisponível ({exc}); copiando para {dst.parent}")
+            self._warned = True
+            shutil.copyfile(blob, tmp)
+        # Troca a entrada do diretório: quem ainda tinha o arquivo antigo aberto (ou linkado) não vê o novo.
+        os.replace(tmp, dst)
+        return blob.stem
+
+    def gc(self) -> Tuple[int, int]:
+        removed = 0
+        freed = 0
+        for bucket in self.objects.iterdir():
+            if not bucket.is_dir():
+                continue
+            for blob in bucket.iterdir():
+                try:
+                    st = blob.stat()
+                except OSError:
+                    continue
+                if blob.name.endswith(".tmp") or st.st_nlink > 1:
+                    continue
+                try:
+                    blob.unlink()
+                except OSError:
+                    continue
+                removed += 1
+                freed += int(st.st_size)
+        self._digests.clear()
+        return removed, freed
+
+    def stats(self) -> Dict[str, int]:
+        blobs = 0
+        size = 0
+        refs = 0
+        for blob in self.objects.glob("*/*"):
+            try:
+                st = blob.stat()
+            except OSError:
+                continue
+            blobs += 1
+            size += int(st.st_size)
+            refs += max(0, int(st.st_nlink) - 1)
+        return {"blobs": blobs, "bytes": size, "refs": refs}
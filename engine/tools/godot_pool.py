@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional
+
+PERSISTENT_ARG = "--persistent"
+
+
+@dataclass
+class PoolSlot:
+    slot_id: int
+    port: int
+    root: Path
+    procs: List[subprocess.Popen] = field(default_factory=list)
+    logs: List[object] = field(default_factory=list)
+    signature: str = ""
+    leased: bool = False
+    jobs: int = 0
+    restarts: int = 0
+    started_at: float = 0.0
+    last_exit: int = 0
+
+    @property
+    def log_path(self) -> Path:
+        return self.root / "godot.log"
+
+    @property
+    def user_dir(self) -> Path:
+        return self.root / "user"
+
+    def alive(self) -> bool:
+        return bool(self.procs) and all(proc.poll() is None for proc in self.procs)
+
+    def exit_code(self) -> int:
+        for proc in self.procs:
+            code = proc.poll()
+            if code is not None:
+                return int(code)
+        return 0
+
+
+class GodotPool:
+    # Instâncias do Godot que sobrevivem entre jobs e rodadas: cada job só conecta um trainer novo na porta do slot,
+    # e o Godot (--persistent) reseta a partida quando o trainer anterior desconecta.
+    def __init__(
+        self,
+        size: int,
+        base_port: int,
+        arenas: int,
+        root: Path,
+        spawn_delay: float = 0.0,
+        early_grace: float = 0.0,
+        shutdown_wait: float = 0.0,
+        on_event: Optional[Callable[[str], None]] = None,
+        preexec_fn: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.preexec_fn = preexec_fn
+        self.arenas = max(1, int(arenas))
+        self.spawn_delay = max(0.0, float(spawn_delay))
+        self.early_grace = max(0.0, float(early_grace))
+        self.shutdown_wait = max(0.0, float(shutdown_wait))
+        self.on_event = on_event
+        # acquire() roda em threads (asyncio.to_thread): o boot frio passa um por vez, como o spawn_gate fora do
+        # pool, para o spawn_delay escalonar os Godots. A janela de saída precoce corre em paralelo.
+        self._spawn_lock = threading.Lock()
+        self.slots = [
+            PoolSlot(slot_id=i, port=int(base_port) + i * self.arenas, root=Path(root) / f"slot_{i}")
+            for i in range(max(1, int(size)))
+        ]
+
+    def _event(self, text: str) -> None:
+        if self.on_event is not None:
+            self.on_event(text)
+
+    def lease(self) -> Optional[PoolSlot]:
+        # Prefere slot já quente; um morto só é escolhido se não sobrar outro (e será reiniciado no acquire).
+        free = [slot for slot in self.slots if not slot.leased]
+        if not free:
+            return None
+        free.sort(key=lambda slot: (not slot.alive(), slot.slot_id))
+        slot = free[0]
+        slot.leased = True
+        return slot
+
+    def acquire(self, slot: PoolSlot, cmds: List[List[str]]) -> bool:
+        signature = "\n".join(" ".join(cmd) for cmd in cmds)
+        if slot.alive() and slot.signature == signature:
+            return True
+        if slot.procs:
+            reason = "cmd mudou" if slot.alive() else f"morreu (code={slot.exit_code()})"
+            self._event(f"pool slot {slot.slot_id} porta {slot.port}: reiniciando ({reason})")
+            self._stop(slot)
+            slot.restarts += 1
+        return self._start(slot, cmds, signature)
+
+    def release(self, slot: PoolSlot, healthy: bool = True) -> None:
+        slot.leased = False
+        slot.jobs += 1
+        if not healthy or not slot.alive():
+            # Sem confiança no estado da instância: derruba já e o próximo acquire sobe uma nova.
+            self._stop(slot)
+
+    def _start(self, slot: PoolSlot, cmds: List[List[str]], signature: str) -> bool:
+        slot.root.mkdir(parents=True, exist_ok=True)
+        with self._spawn_lock:
+            if self.spawn_delay > 0.0:
+                time.sleep(self.spawn_delay)
+            for k, cmd in enumerate(cmds):
+                name = "godot.log" if k == 0 else f"godot_arena_{k}.log"
+                log = open(slot.root / name, "a", encoding="utf-8", errors="ignore")
+                slot.logs.append(log)
+                slot.procs.append(subprocess.Popen(cmd, stdout=log, stderr=log, preexec_fn=self.preexec_fn))
+        slot.signature = signature
+        slot.started_at = time.time()
+        if self.early_grace > 0.0:
+            time.sleep(self.early_grace)
+        if not slot.alive():
+            slot.last_exit = slot.exit_code()
+            self._event(f"pool slot {slot.slot_id} porta {slot.port}: Godot saiu cedo (code={slot.last_exit})")
+            self._stop(slot)
+            return False
+        return True
+
+    def _stop(self, slot: PoolSlot) -> None:
+        for proc in slot.procs:
+            if proc.poll() is None:
+                try:
+                    proc.terminate()
+                except OSError:
+                    pass
+        deadline = time.time() + self.shutdown_wait
+        for proc in slot.procs:
+            try:
+                proc.wait(timeout=max(0.0, deadline - time.time()))
+            except subprocess.TimeoutExpired:
+                try:
+                    proc.kill()
+                except OSError:
+                    pass
+        for log in slot.logs:
+            try:
+                log.close()
+            except Exception:
+                pass
+        slot.procs = []
+        slot.logs = []
+        slot.signature = ""
+
+    def shutdown(self) -> None:
+        for slot in self.slots:
+            slot.leased = False
+            self._stop(slot)
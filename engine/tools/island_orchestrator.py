@@ -1,19 +1,27 @@
 import argparse
 
+import asyncio
+
 import hashlib
+
+import heapq
 import json
 
+import math
+
 import os
 
 import shutil
 
+import sqlite3
+
 import subprocess
 
 import sys
 
 import time
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from pathlib import Path
 
@@ -21,7 +29,21 @@ from typing import Dict, List, Optional, Tuple
 
 
 
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from concurrency_governor import ConcurrencyGovernor
+
+from cpu_pinning import CpuPinning, raise_own_priority
+
+from genome_store import STORE_NAME, GenomeStore
+
+from godot_pool import PERSISTENT_ARG, GodotPool, PoolSlot
+
+from island_queue import AgentLost, RemoteAgent, WorkQueue, pack_files, parse_address, serve_agent, unpack_files
+
+from result_stream import ResultServer
+
+from run_catalog import CATALOG_NAME, RunCatalog
 
 
 
@@ -410,9 +432,9 @@ def _is_sweep_5_0(payload: Dict) -> bool:
 
 
 
-def _summarize_worker_failure(out_dir: Path) -> str:
+def _summarize_worker_failure(out_dir: Path, godot_log: Optional[Path] = None) -> str:
 
-    godot_tail = _tail_text(out_dir / "godot.log", limit=18)
+    godot_tail = _tail_text(godot_log or (out_dir / "godot.log"), limit=18)
 
     trainer_tail = _tail_text(out_dir / "trainer.log", limit=18)
 
@@ -515,9 +537,9 @@ class WorkerRun:
 
     spec: WorkerSpec
 
-    godot_proc: subprocess.Popen
+    godot_proc: Union[subprocess.Popen, asyncio.subprocess.Process]
 
-    trainer_proc: subprocess.Popen
+    trainer_proc: asyncio.subprocess.Process
 
     godot_log: object
 
@@ -525,9 +547,35 @@ class WorkerRun:
 
     started_at: float
 
+    extra_godot: List[Tuple[asyncio.subprocess.Process, object]] = field(default_factory=list)
+    lease: Optional[PoolSlot] = None
+    lane: int = -1
+    # Parado pelo próprio orquestrador (early stop/encerramento): exit != 0 aqui não é falha do trainer/Godot.
+    stopped: bool = False
+
+
+
+
 
+def _proc_running(proc: Union[subprocess.Popen, asyncio.subprocess.Process]) -> bool:
+    # Slots do pool ainda são Popen; os processos dos workers vêm do supervisor asyncio.
+    if isinstance(proc, subprocess.Popen):
+        return proc.poll() is None
+    return proc.returncode is None
 
 
+def stop_extra_godot(run: WorkerRun) -> None:
+    for proc, log in run.extra_godot:
+        if _proc_running(proc):
+            try:
+                proc.terminate()
+            except OSError:
+                pass
+        try:
+            log.close()
+        except Exception:
+            pass
+
 
 def resolve_path(project_root: Path, value: str) -> str:
 
@@ -611,7 +659,7 @@ def _resolve_opponent_pool(project_root: Path, cfg: Dict) -> List[str]:
 
         if pool_dir.exists():
 
-            snaps = sorted(pool_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+            snaps = sorted(_glob_genomes(pool_dir), key=lambda p: p.stat().st_mtime, reverse=True)
 
             if pool_max > 0:
 
@@ -712,6 +760,113 @@ def write_json(path: Path, payload: Dict) -> None:
 
 
 
+GENOME_SUFFIXES = (".json", ".genome")
+
+
+def _uses_weights_trainer(cfg: Dict) -> bool:
+    script = str(cfg.get("trainer_script", "") or "").strip().replace("\\", "/")
+    return (not script) or script.endswith("training_genetic_ga.py")
+
+
+def _trainer_reports_results(cfg: Dict) -> bool:
+    # --report-to só existe nos trainers do repo; um trainer_script externo continua só com o result.json.
+    if not bool(cfg.get("result_stream", True)):
+        return False
+    script = str(cfg.get("trainer_script", "") or "").strip().replace("\\", "/")
+    return (not script) or script.endswith(("training_genetic_ga.py", "training_ga_params.py"))
+
+
+def _arenas_per_worker(cfg: Dict) -> int:
+    # No outer_ga cada worker avalia um único indivíduo; arenas extras só servem ao trainer de população.
+    if not _uses_weights_trainer(cfg) or bool(cfg.get("outer_ga", False)):
+        return 1
+    return max(1, int(cfg.get("arenas_per_worker", 1)))
+
+
+def _genome_suffix(cfg: Dict) -> str:
+    # Só o trainer de pesos (training_genetic_ga) grava .genome; ga_params continua em JSON.
+    if not _uses_weights_trainer(cfg):
+        return ".json"
+    fmt = str(cfg.get("genome_format", "json") or "").strip().lower()
+    return ".genome" if fmt in ("bin", "binary", "genome") else ".json"
+
+
+def _glob_genomes(directory: Path) -> List[Path]:
+    return [p for p in directory.iterdir() if p.is_file() and p.suffix.lower() in GENOME_SUFFIXES]
+
+
+def read_genome_meta(path: Path) -> Dict:
+    if path.suffix.lower() != ".genome":
+        return read_json(path)
+    try:
+        from genome_io import read_genome_header
+
+        return read_genome_header(path)
+    except (OSError, ValueError):
+        return {}
+
+
+def copy_genome(src: Path, dst: Path) -> None:
+    # Godot só lê JSON: ao gravar um destino que não é .genome a partir de um .genome, exporta em vez de copiar.
+    if src.suffix.lower() == ".genome" and dst.suffix.lower() != ".genome":
+        from genome_io import convert_genome
+
+        convert_genome(src, dst)
+        return
+    shutil.copyfile(src, dst)
+
+
+def fitness_cache_path(project_root: Path, cfg: Dict) -> Optional[Path]:
+    if not bool(cfg.get("fitness_cache", False)) or not _uses_weights_trainer(cfg):
+        return None
+    return Path(resolve_path(project_root, cfg["state_dir"])) / "fitness_cache.json"
+
+
+def build_fitness_cache_args(project_root: Path, cfg: Dict, out_dir: Path, rules: Dict, generation_offset: int) -> List[str]:
+    shared = fitness_cache_path(project_root, cfg)
+    if shared is None:
+        return []
+    # Tudo que muda o placar do lado do Godot entra no contexto; o oponente o próprio trainer identifica pelo hash.
+    context_payload = {
+        "rules": rules,
+        "fixed_fps": int(cfg.get("fixed_fps", 60)),
+        "godot_user_args": cfg.get("godot_user_args") if isinstance(cfg.get("godot_user_args"), list) else [],
+    }
+    context = hashlib.sha1(json.dumps(context_payload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    args = [
+        "--fitness-cache",
+        str(out_dir / "fitness_cache.json"),
+        "--fitness-cache-policy",
+        str(cfg.get("fitness_cache_policy", "every_n")),
+        "--fitness-cache-every",
+        str(int(cfg.get("fitness_cache_every", 5))),
+        "--fitness-cache-context",
+        context,
+        "--fitness-cache-generation-offset",
+        str(int(generation_offset)),
+    ]
+    if shared.exists():
+        args.extend(["--fitness-cache-load", str(shared)])
+    return args
+
+
+def merge_worker_fitness_caches(project_root: Path, cfg: Dict, round_dir: Path, workers: int) -> None:
+    shared = fitness_cache_path(project_root, cfg)
+    if shared is None:
+        return
+    sources = [round_dir / f"worker_{wid}" / "fitness_cache.json" for wid in range(workers)]
+    sources = [p for p in sources if p.exists()]
+    if not sources:
+        return
+    try:
+        from fitness_cache import merge_cache_files
+
+        total = merge_cache_files(shared, sources, int(cfg.get("fitness_cache_max_entries", 20000)))
+        append_log(shared.parent / "orchestrator.log", f"fitness cache: {total} entradas em {shared}")
+    except Exception as exc:
+        append_log(shared.parent / "orchestrator.log", f"fitness cache: falha ao consolidar ({exc})")
+
+
 def append_log(path: Path, line: str) -> None:
 
     ensure_dir(path.parent)
@@ -1163,6 +1318,52 @@ def default_config(project_root: Path) -> Dict:
         "league_dir": "",
 
         "league_max": 64,
+        "genome_format": "bin",
+        "fitness_cache": True,
+        "fitness_cache_policy": "every_n",
+        "fitness_cache_every": 5,
+        "fitness_cache_max_entries": 20000,
+        "racing": False,
+        "racing_min_episodes": 1,
+        "racing_margin": 0.05,
+        "racing_max_extra_episodes": -1,
+        "arenas_per_worker": 1,
+        "godot_pool": False,
+        "work_queue_port": 0,
+        "work_queue_host": "0.0.0.0",
+        "work_queue_local": True,
+        "work_queue_heartbeat_sec": 30.0,
+        "work_queue_reconnect_sec": 1.0,
+        "result_stream": True,
+        "adaptive_concurrency": False,
+        "concurrency_min": 1,
+        "concurrency_max": 0,
+        "governor_interval_sec": 10.0,
+        "governor_mem_reserve_mb": 1024.0,
+        "governor_max_load": 1.0,
+        "governor_throughput_tolerance": 0.85,
+        "cpu_affinity": False,
+        "affinity_cores_per_worker": 0,
+        "affinity_reserved_cpus": 0,
+        "worker_nice": 0,
+        "worker_ionice_class": "",
+        "worker_ionice_level": 4,
+        "orchestrator_nice": 0,
+        "catalog": True,
+        "catalog_path": "",
+        "league_keep": "age",
+        "league_min_score": None,
+        "league_max_age_days": 0.0,
+        "genome_store": True,
+        "genome_store_dir": "",
+        "early_stop": False,
+        "early_stop_min_fraction": 0.5,
+        "early_stop_window": 8,
+        "early_stop_min_delta": 0.0,
+        "early_stop_on_sweep": False,
+        "early_stop_sweep_confirm": 2,
+        "early_stop_grace_sec": 0.0,
+        "action_repeat": 1,
 
         "opponent_pool_dir": "",
 
@@ -1192,7 +1393,13 @@ def default_config(project_root: Path) -> Dict:
 
 
 
-def promote_best_genome(project_root: Path, cfg: Dict, summary: Dict) -> None:
+def promote_best_genome(
+    project_root: Path,
+    cfg: Dict,
+    summary: Dict,
+    catalog: Optional[RunCatalog] = None,
+    store: Optional[GenomeStore] = None,
+) -> None:
 
     if not bool(cfg.get("promote_best", True)):
 
@@ -1237,7 +1444,7 @@ def promote_best_genome(project_root: Path, cfg: Dict, summary: Dict) -> None:
         prev_promoted = read_json(promote_path)
         if not isinstance(prev_promoted, dict):
             prev_promoted = {}
-    candidate_payload = read_json(src)
+    candidate_payload = read_genome_meta(src)
     if not isinstance(candidate_payload, dict):
         candidate_payload = {}
 
@@ -1321,15 +1528,17 @@ def promote_best_genome(project_root: Path, cfg: Dict, summary: Dict) -> None:
         pass
 
     if not promote_allowed:
+        record_promotion(catalog, summary, src, "", prev_best, False)
         return
 
     ensure_dir(promote_path.parent)
 
-    tmp_path = promote_path.with_suffix(promote_path.suffix + ".tmp")
-
-    shutil.copyfile(src, tmp_path)
-
-    os.replace(tmp_path, promote_path)
+    if store is not None and (src.suffix.lower() != ".genome" or promote_path.suffix.lower() == ".genome"):
+        store.link(src, promote_path)
+    else:
+        tmp_path = promote_path.with_suffix(promote_path.suffix + ".tmp")
+        copy_genome(src, tmp_path)
+        os.replace(tmp_path, promote_path)
 
 
 
@@ -1390,6 +1599,7 @@ def promote_best_genome(project_root: Path, cfg: Dict, summary: Dict) -> None:
         },
 
     )
+    record_promotion(catalog, summary, src, str(promote_path), prev_best, True)
 
     try:
         promoted = read_json(promote_path)
@@ -1416,6 +1626,7 @@ def promote_best_genome(project_root: Path, cfg: Dict, summary: Dict) -> None:
     try:
 
 
+        league_cfg = str(cfg.get("league_dir", "") or "").strip()
         league_dir = Path(resolve_path(project_root, league_cfg)) if league_cfg else (promote_path.parent / "league")
 
         ensure_dir(league_dir)
@@ -1456,30 +1667,44 @@ def promote_best_genome(project_root: Path, cfg: Dict, summary: Dict) -> None:
 
         if g > 0 and n > 0:
 
-            snap = league_dir / f"G{g:04d}_N{n:06d}_score_{score:.6f}.json"
+            snap = league_dir / f"G{g:04d}_N{n:06d}_score_{score:.6f}{src.suffix}"
 
             if not snap.exists():
-
-                shutil.copyfile(src, snap)
+                if store is not None:
+                    store.link(src, snap)
+                else:
+                    shutil.copyfile(src, snap)
+            if catalog is not None:
+                catalog.add_league(snap, g, n, score)
 
 
 
         league_max = int(cfg.get("league_max", 0))
-
-        if league_max > 0:
-
-            snaps = sorted(league_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
-
+        min_score = cfg.get("league_min_score", None)
+        max_age_sec = float(cfg.get("league_max_age_days", 0.0) or 0.0) * 86400.0
+        if catalog is not None:
+            # Liga indexada: poda por idade (ou score, league_keep) sem glob + mtime; snapshots de antes do
+            # catálogo entram uma vez pelo sync.
+            catalog.sync_league(league_dir, _glob_genomes(league_dir))
+            removed = catalog.prune_league(
+                league_dir,
+                max_count=max(0, league_max),
+                min_score=float(min_score) if min_score is not None else None,
+                max_age_sec=max_age_sec,
+                keep=str(cfg.get("league_keep", "age")),
+            )
+            for path in removed:
+                try:
+                    Path(path).unlink()
+                except OSError:
+                    pass
+        elif league_max > 0:
+            snaps = sorted(_glob_genomes(league_dir), key=lambda p: p.stat().st_mtime)
             excess = len(snaps) - league_max
-
             for p in snaps[: max(0, excess)]:
-
                 try:
-
                     p.unlink()
-
                 except OSError:
-
                     pass
 
     except Exception:
@@ -1521,137 +1746,828 @@ def select_seed(seeds: List[str], idx: int) -> str:
     return seeds[idx % len(seeds)]
 
 
+OUTER_GA_CHUNK_FLOATS = 1 << 22
 
 
+def generate_population(
+    project_root: Path,
+    seed_paths: List[str],
+    population_dir: Path,
+    count: int,
+    mutation_rate: float,
+    mutation_std: float,
+    crossover: bool,
+    seed: int,
+    elite: int = 1,
+    suffix: str = ".json",
+) -> List[str]:
+    # Outer GA: os seeds (top-k da rodada anterior) são lidos uma vez, achatados numa matriz (k, P) e a população
+    # inteira sai de máscaras em lote. Mesmo `seed` => mesma população. Sem pesos (ga_params), devolve [] e cada
+    # worker usa o seed direto (select_seed).
+    import numpy as np
+    from genome_io import read_genome, write_genome
+
+    count = max(0, int(count))
+    shapes: Optional[List[Tuple[int, ...]]] = None
+    rows = []
+    steps: List[int] = []
+    used: List[str] = []
+    for seed_path in seed_paths:
+        try:
+            payload = read_genome(resolve_path(project_root, seed_path), mmap=False)
+        except (OSError, ValueError):
+            continue
+        weights = payload.get("weights")
+        if not isinstance(weights, list) or not weights:
+            continue
+        arrays = [np.asarray(w, dtype=np.float32) for w in weights]
+        layer_shapes = [tuple(a.shape) for a in arrays]
+        if shapes is None:
+            shapes = layer_shapes
+        elif layer_shapes != shapes:
+            # Arquitetura diferente do líder: não dá para cruzar/mutar na mesma matriz.
+            continue
+        rows.append(np.concatenate([a.ravel() for a in arrays]))
+        meta = payload.get("meta") if isinstance(payload.get("meta"), dict) else {}
+        steps.append(int(meta.get("mutation_steps", 0) or 0))
+        used.append(str(seed_path))
+    if not rows or shapes is None or count <= 0:
+        return []
 
-def collect_results(round_dir: Path, workers: int) -> List[Tuple[float, Path, Dict]]:
+    parents = np.stack(rows)
+    k, size = parents.shape
+    splits = np.cumsum([int(np.prod(s)) if s else 1 for s in shapes])[:-1]
+    rng = np.random.default_rng(int(seed))
+    elite = min(max(0, int(elite)), k, count)
+    n = count - elite
+    # Pai A em rodízio (como o select_seed); pai B sorteado só quando há crossover.
+    parent_a = np.concatenate([np.arange(elite), np.arange(n) % k]).astype(np.int64)
+    parent_b = parent_a.copy()
+    if crossover and k > 1 and n > 0:
+        parent_b[elite:] = rng.integers(0, k, size=n)
+    mutate = mutation_rate > 0.0 and mutation_std > 0.0
+
+    shutil.rmtree(population_dir, ignore_errors=True)
+    ensure_dir(population_dir)
+    paths: List[str] = []
+    manifest: List[Dict] = []
+    chunk = max(1, OUTER_GA_CHUNK_FLOATS // max(1, size))
+    for start in range(0, count, chunk):
+        idx = np.arange(start, min(count, start + chunk))
+        batch = parents[parent_a[idx]]
+        children = idx >= elite
+        if crossover and k > 1:
+            mask = rng.random(batch.shape) < 0.5
+            mask[~children] = True
+            batch = np.where(mask, batch, parents[parent_b[idx]])
+        if mutate:
+            mask = rng.random(batch.shape, dtype=np.float32) < float(mutation_rate)
+            mask[~children] = False
+            noise = rng.standard_normal(batch.shape, dtype=np.float32) * np.float32(mutation_std)
+            batch = batch + noise * mask
+        for row, i in zip(batch, idx.tolist()):
+            is_elite = i < elite
+            a = int(parent_a[i])
+            b = int(parent_b[i])
+            mutation_steps = max(steps[a], steps[b]) + (0 if is_elite or not mutate else 1)
+            path = population_dir / f"ind_{i:04d}{suffix}"
+            write_genome(
+                path,
+                {
+                    "weights": [w.reshape(s) for w, s in zip(np.split(row, splits), shapes)],
+                    "meta": {"mutation_steps": int(mutation_steps)},
+                },
+            )
+            paths.append(str(path))
+            manifest.append({"individual": i, "path": str(path), "elite": is_elite, "parent_a": used[a], "parent_b": used[b]})
+    write_json(
+        population_dir / "population.json",
+        {
+            "seed": int(seed),
+            "count": int(count),
+            "elite": int(elite),
+            "parameters": int(size),
+            "mutation_rate": float(mutation_rate),
+            "mutation_std": float(mutation_std),
+            "crossover": bool(crossover),
+            "individuals": manifest,
+        },
+    )
+    return paths
 
-    results: List[Tuple[float, Path, Dict]] = []
 
-    for wid in range(workers):
 
-        result_path = round_dir / f"worker_{wid}" / "result.json"
 
-        payload = read_json(result_path)
 
-        if not payload:
+ResultEntry = Tuple[float, Path, Dict]
 
-            continue
 
-        if not bool(payload.get("ok", False)):
+def result_entry(round_dir: Path, wid: int, payload: Dict, result_path: Path) -> Optional[ResultEntry]:
+    if not payload:
+        return None
+    if not bool(payload.get("ok", False)):
+        return None
+    score = _primary_total_score(payload)
+    if not (score == score) or score in (float("inf"), float("-inf")):
+        return None
+    payload = dict(payload)
+    payload["worker_id"] = int(wid)
+    payload["result_path"] = str(result_path)
+    payload["sweep_5_0"] = bool(_is_sweep_5_0(payload))
+    best_stats = payload.get("best_stats") if isinstance(payload.get("best_stats"), dict) else {}
+    last_round = best_stats.get("last_round") if isinstance(best_stats.get("last_round"), dict) else {}
+    try:
+        payload["best_winner"] = int(last_round.get("winner", 0))
+    except Exception:
+        payload["best_winner"] = 0
+    match_score = last_round.get("match_score") if isinstance(last_round.get("match_score"), dict) else {}
+    kills = last_round.get("kills") if isinstance(last_round.get("kills"), dict) else {}
+    try:
+        payload["best_fitness"] = float(best_stats.get("fitness", 0.0)) if isinstance(best_stats, dict) else 0.0
+    except Exception:
+        payload["best_fitness"] = 0.0
+    try:
+        payload["best_avg_score"] = float(best_stats.get("avg_score", 0.0)) if isinstance(best_stats, dict) else 0.0
+    except Exception:
+        payload["best_avg_score"] = 0.0
+    try:
+        payload["best_score_p1"] = float(match_score.get(1, match_score.get("1", 0.0)))
+        payload["best_score_p2"] = float(match_score.get(2, match_score.get("2", 0.0)))
+    except Exception:
+        payload["best_score_p1"] = 0.0
+        payload["best_score_p2"] = 0.0
+    try:
+        payload["best_kills_p1"] = int(kills.get(1, kills.get("1", 0)))
+        payload["best_kills_p2"] = int(kills.get(2, kills.get("2", 0)))
+    except Exception:
+        payload["best_kills_p1"] = 0
+        payload["best_kills_p2"] = 0
+    save_path = payload.get("save_path", "")
+    genome_path = Path(save_path) if save_path else (round_dir / f"worker_{wid}" / "best.json")
+    if not save_path and not genome_path.exists():
+        genome_path = genome_path.with_suffix(".genome")
+    payload["genome_path"] = str(genome_path)
+    return score, genome_path, payload
+
+
+def result_rank_key(entry: ResultEntry, prefer_winner: bool = False) -> Tuple:
+    score, _genome_path, payload = entry
+    key = (
+        1 if bool(payload.get("sweep_5_0", False)) else 0,
+        float(score),
+        int(payload.get("best_winner", 0)),
+        -int(payload.get("worker_id", 0)),
+    )
+    if prefer_winner:
+        # prefer_winner_selection: vencedores primeiro, depois score; empates seguem a ordem padrão.
+        return (1 if int(payload.get("best_winner", 0)) == 1 else 0, float(score)) + key
+    return key
+
+
+class Leaderboard:
+    # Top-k mantido conforme os resultados chegam (min-heap pela chave de result_rank_key):
+    # fechar a rodada custa O(topk) em vez de reler o result.json de todos os workers.
+    def __init__(self, size: int, prefer_winner: bool = False) -> None:
+        self.size = max(1, int(size))
+        self.prefer_winner = bool(prefer_winner)
+        self.heap: List[Tuple[Tuple, int, ResultEntry]] = []
+        self.offered = 0
+
+    def offer(self, entry: Optional[ResultEntry]) -> bool:
+        if entry is None:
+            return False
+        self.offered += 1
+        wid = int(entry[2].get("worker_id", 0))
+        # Retry do mesmo worker: o resultado novo substitui o anterior, como no result.json.
+        self.discard(wid)
+        key = result_rank_key(entry, self.prefer_winner)
+        if len(self.heap) >= self.size and key <= self.heap[0][0]:
+            return False
+        # O genoma só é conferido no disco quando o resultado entraria no top: um resultado sem genoma (agente que
+        # não devolveu o arquivo) não pode tomar a vaga de um válido.
+        if not entry[1].exists():
+            return False
+        item = (key, wid, entry)
+        if len(self.heap) >= self.size:
+            heapq.heapreplace(self.heap, item)
+        else:
+            heapq.heappush(self.heap, item)
+        return True
 
-            continue
+    def discard(self, wid: int) -> None:
+        if any(item[1] == wid for item in self.heap):
+            self.heap = [item for item in self.heap if item[1] != wid]
+            heapq.heapify(self.heap)
 
-        score = _primary_total_score(payload)
+    def ranked(self) -> List[ResultEntry]:
+        return [item[2] for item in sorted(self.heap, key=lambda item: item[0], reverse=True)]
 
-        if not (score == score) or score in (float("inf"), float("-inf")):
+    def members(self) -> frozenset:
+        return frozenset(item[1] for item in self.heap)
 
-            continue
+    def cutoff(self) -> Optional[float]:
+        # Menor score dentro do top-k (o que um resultado novo precisa bater para entrar).
+        return float(self.heap[0][2][0]) if len(self.heap) >= self.size else None
 
-        payload = dict(payload)
 
-        payload["worker_id"] = int(wid)
+def _sweep_confirmed(payload: Dict, confirm: int) -> bool:
+    # 5-0 que não foi sorte de uma partida: o melhor genoma ganhou todas as `confirm` partidas avaliadas.
+    if not _is_sweep_5_0(payload):
+        return False
+    best_stats = payload.get("best_stats") if isinstance(payload.get("best_stats"), dict) else {}
+    return _clamp_int(best_stats.get("losses", 0)) == 0 and _clamp_int(best_stats.get("wins", 0)) >= max(1, int(confirm))
+
+
+class RoundConvergence:
+    # Fecha a rodada antes do último worker: depois de min_completed conclusões, se as últimas `window` não mudaram
+    # quem está no top-k nem subiram o corte do top-k mais que min_delta, os atrasados dificilmente mudam o top.
+    # Com stop_on_sweep, um 5-0 confirmado também fecha a rodada.
+    def __init__(
+        self,
+        workers: int,
+        min_fraction: float,
+        window: int,
+        min_delta: float = 0.0,
+        stop_on_sweep: bool = False,
+        sweep_confirm: int = 2,
+    ) -> None:
+        self.min_completed = max(1, int(math.ceil(int(workers) * min(1.0, max(0.0, float(min_fraction))))))
+        self.window = max(1, int(window))
+        self.min_delta = max(0.0, float(min_delta))
+        self.stop_on_sweep = bool(stop_on_sweep)
+        self.sweep_confirm = int(sweep_confirm)
+        self.completed = 0
+        self.stable = 0
+        self._members: frozenset = frozenset()
+        self._cutoff: Optional[float] = None
+
+    def observe(self, leaderboard: Leaderboard, payload: Optional[Dict]) -> str:
+        self.completed += 1
+        if self.stop_on_sweep and payload and bool(payload.get("ok", False)) and _sweep_confirmed(payload, self.sweep_confirm):
+            return f"5-0 confirmado em {self.sweep_confirm}+ partidas"
+        members = leaderboard.members()
+        cutoff = leaderboard.cutoff()
+        moved = cutoff is None or self._cutoff is None or cutoff > self._cutoff + self.min_delta
+        if members != self._members or moved:
+            self.stable = 0
+        else:
+            self.stable += 1
+        self._members = members
+        self._cutoff = cutoff
+        if self.completed >= self.min_completed and self.stable >= self.window:
+            return f"top-k estável nas últimas {self.stable} conclusões (corte {cutoff:.4f})"
+        return ""
 
-        payload["result_path"] = str(result_path)
+    def to_dict(self) -> Dict:
+        return {"completed": int(self.completed), "stable": int(self.stable), "window": int(self.window), "min_completed": int(self.min_completed)}
 
-        payload["sweep_5_0"] = bool(_is_sweep_5_0(payload))
 
+def build_convergence(cfg: Dict, workers: int) -> Optional[RoundConvergence]:
+    if not bool(cfg.get("early_stop", False)):
+        return None
+    return RoundConvergence(
+        workers,
+        float(cfg.get("early_stop_min_fraction", 0.5)),
+        int(cfg.get("early_stop_window", 8)),
+        min_delta=float(cfg.get("early_stop_min_delta", 0.0)),
+        stop_on_sweep=bool(cfg.get("early_stop_on_sweep", False)),
+        sweep_confirm=int(cfg.get("early_stop_sweep_confirm", 2)),
+    )
 
 
-        best_stats = payload.get("best_stats") if isinstance(payload.get("best_stats"), dict) else {}
+def build_governor(cfg: Dict, on_event=None) -> Optional[ConcurrencyGovernor]:
+    if not bool(cfg.get("adaptive_concurrency", False)):
+        return None
+    # concurrency_max 0 = um worker por CPU; concurrency continua sendo o ponto de partida.
+    maximum = int(cfg.get("concurrency_max", 0)) or (os.cpu_count() or 8)
+    return ConcurrencyGovernor(
+        int(cfg.get("concurrency_min", 1)),
+        min(maximum, int(cfg["workers"])),
+        int(cfg["concurrency"]),
+        interval=float(cfg.get("governor_interval_sec", 10.0)),
+        mem_reserve_mb=float(cfg.get("governor_mem_reserve_mb", 1024.0)),
+        max_load=float(cfg.get("governor_max_load", 1.0)),
+        tolerance=float(cfg.get("governor_throughput_tolerance", 0.85)),
+        on_event=on_event,
+    )
 
-        last_round = best_stats.get("last_round") if isinstance(best_stats.get("last_round"), dict) else {}
 
-        try:
+def build_cpu_pinning(cfg: Dict, on_event=None) -> Optional[CpuPinning]:
+    affinity = bool(cfg.get("cpu_affinity", False))
+    nice = int(cfg.get("worker_nice", 0))
+    ionice_class = str(cfg.get("worker_ionice_class", "") or "")
+    own_nice = int(cfg.get("orchestrator_nice", 0))
+    if not affinity and nice == 0 and not ionice_class and own_nice == 0:
+        return None
+    # Auto: um core para o trainer e um por instância do Godot do worker.
+    cores = int(cfg.get("affinity_cores_per_worker", 0)) or (_arenas_per_worker(cfg) + 1)
+    return CpuPinning(
+        cores if affinity else 0,
+        reserved=int(cfg.get("affinity_reserved_cpus", 0)),
+        nice=nice,
+        ionice_class=ionice_class,
+        ionice_level=int(cfg.get("worker_ionice_level", 4)),
+        on_event=on_event,
+        force_nice=own_nice != 0,
+    )
 
-            payload["best_winner"] = int(last_round.get("winner", 0))
 
-        except Exception:
+def spawn_kwargs(pinning: Optional[CpuPinning]) -> Dict:
+    # Godot/trainer nascem já com o nice dos workers, não com o do orquestrador (orchestrator_nice é herdado).
+    preexec = pinning.preexec if pinning is not None else None
+    return {"preexec_fn": preexec} if preexec is not None else {}
 
-            payload["best_winner"] = 0
 
-        match_score = last_round.get("match_score") if isinstance(last_round.get("match_score"), dict) else {}
+def open_run_catalog(project_root: Path, cfg: Dict, on_event=None) -> Optional[RunCatalog]:
+    if not bool(cfg.get("catalog", True)):
+        return None
+    path_cfg = str(cfg.get("catalog_path", "") or "").strip()
+    path = Path(resolve_path(project_root, path_cfg)) if path_cfg else Path(resolve_path(project_root, cfg["state_dir"])) / CATALOG_NAME
+    try:
+        return RunCatalog(path)
+    except (OSError, sqlite3.Error) as exc:
+        if on_event is not None:
+            on_event(f"catalog: {path} indisponível ({exc}); seguindo só com os JSON")
+        return None
+
+
+def open_genome_store(project_root: Path, cfg: Dict, on_event=None) -> Optional[GenomeStore]:
+    if not bool(cfg.get("genome_store", True)):
+        return None
+    dir_cfg = str(cfg.get("genome_store_dir", "") or "").strip()
+    root = Path(resolve_path(project_root, dir_cfg)) if dir_cfg else Path(resolve_path(project_root, cfg["state_dir"])) / STORE_NAME
+    try:
+        return GenomeStore(root, on_event=on_event)
+    except OSError as exc:
+        if on_event is not None:
+            on_event(f"genome_store: {root} indisponível ({exc}); seguindo com cópias")
+        return None
 
-        kills = last_round.get("kills") if isinstance(last_round.get("kills"), dict) else {}
 
+def record_promotion(catalog: Optional[RunCatalog], summary: Dict, src: Path, promoted_to: str, prev_best: float, promoted: bool) -> None:
+    if catalog is None:
+        return
+    best_payload = summary.get("best_payload", {}) if isinstance(summary.get("best_payload"), dict) else {}
+    try:
+        catalog.add_promotion(
+            int(summary.get("round", 0)),
+            int(best_payload.get("generation_global", summary.get("generation_global", 0))),
+            int(best_payload.get("individual", -1)),
+            float(summary.get("best", 0.0)),
+            prev_best,
+            promoted,
+            str(src),
+            promoted_to,
+        )
+    except sqlite3.Error:
+        pass
 
 
-        try:
+def _report_id(spec: WorkerSpec) -> str:
+    return f"{spec.worker_id}:{spec.attempt}"
 
-            payload["best_fitness"] = float(best_stats.get("fitness", 0.0)) if isinstance(best_stats, dict) else 0.0
 
-        except Exception:
+def build_worker_cmds(
+    project_root: Path,
+    cfg: Dict,
+    spec: WorkerSpec,
+    godot_exe: str,
+    generation_global: int,
+    base_individual: int,
+    user_dir: Optional[str] = None,
+    persistent: bool = False,
+) -> Tuple[List[str], List[List[str]], List[str]]:
+    # Comandos do worker (Godot principal, arenas extras e trainer); os agentes remotos montam pelo mesmo caminho.
+    arenas = _arenas_per_worker(cfg)
 
-            payload["best_fitness"] = 0.0
+    outer_ga = bool(cfg.get("outer_ga", False))
 
-        try:
+    rules = load_match_rules(project_root, cfg)
+    godot_user_args = [str(a) for a in cfg.get("godot_user_args", [])] if isinstance(cfg.get("godot_user_args"), list) else []
+    if persistent:
+        godot_user_args.append(PERSISTENT_ARG)
 
-            payload["best_avg_score"] = float(best_stats.get("avg_score", 0.0)) if isinstance(best_stats, dict) else 0.0
+    godot_cmd = build_godot_cmd(
 
-        except Exception:
+        project_root,
 
-            payload["best_avg_score"] = 0.0
+        godot_exe,
 
-        try:
+        spec.port,
 
-            payload["best_score_p1"] = float(match_score.get(1, match_score.get("1", 0.0)))
+        float(cfg["time_scale"]),
 
-            payload["best_score_p2"] = float(match_score.get(2, match_score.get("2", 0.0)))
+        float(cfg["quit_idle"]),
 
-        except Exception:
+        int(cfg["fixed_fps"]),
 
-            payload["best_score_p1"] = 0.0
+        int(rules.get("max_steps", 0)),
 
-            payload["best_score_p2"] = 0.0
+        float(rules.get("max_seconds", 0.0)),
 
-        try:
+        int(rules.get("max_kills", 0)),
 
-            payload["best_kills_p1"] = int(kills.get(1, kills.get("1", 0)))
+        user_dir=user_dir,
 
-            payload["best_kills_p2"] = int(kills.get(2, kills.get("2", 0)))
+        extra_user_args=godot_user_args,
 
-        except Exception:
+    )
+    extra_godot_cmds: List[List[str]] = []
+    for k in range(1, arenas):
+        arena_user_dir = None
+        if user_dir is not None:
+            arena_user_dir = str(Path(user_dir) / f"arena_{k}")
+            ensure_dir(Path(arena_user_dir))
+        extra_godot_cmds.append(
+            build_godot_cmd(
+                project_root,
+                godot_exe,
+                spec.port + k,
+                float(cfg["time_scale"]),
+                float(cfg["quit_idle"]),
+                int(cfg["fixed_fps"]),
+                int(rules.get("max_steps", 0)),
+                float(rules.get("max_seconds", 0.0)),
+                int(rules.get("max_kills", 0)),
+                user_dir=arena_user_dir,
+                extra_user_args=godot_user_args,
+            )
+        )
 
-            payload["best_kills_p1"] = 0
 
-            payload["best_kills_p2"] = 0
 
+    generations = int(cfg["generations"])
 
+    episodes_per_genome = int(cfg["episodes_per_genome"])
 
-        save_path = payload.get("save_path", "")
+    population = int(cfg.get("population", 1))
 
-        genome_path = Path(save_path) if save_path else (round_dir / f"worker_{wid}" / "best.json")
+    elite = int(cfg.get("elite", 1))
 
-        if not genome_path.exists():
+    mutation_rate = float(cfg["mutation_rate"])
 
-            continue
+    mutation_std = float(cfg["mutation_std"])
 
-        payload["genome_path"] = str(genome_path)
+    crossover = bool(cfg.get("crossover", False))
 
-        results.append((score, genome_path, payload))
+    sweep_bonus = float(cfg.get("sweep_bonus", 0.0))
 
-    results.sort(
+    if outer_ga:
 
-        key=lambda x: (
+        generations = 1
 
-            1 if bool(x[2].get("sweep_5_0", False)) else 0,
+        population = 1
 
-            float(x[0]),
+        elite = 1
 
-            int(x[2].get("best_winner", 0)),
+        mutation_rate = 0.0
 
-            -int(x[2].get("worker_id", 0)),
+        mutation_std = 0.0
 
-        ),
+        crossover = False
+
+        sweep_bonus = 0.0
+
+    trainer_cmd = build_trainer_cmd(
+
+        project_root,
+
+        resolve_path(project_root, cfg["python_exe"]),
+
+        spec.port,
+
+        resolve_path(project_root, spec.seed_path),
+
+        str(spec.out_dir / f"best{_genome_suffix(cfg)}"),
+
+        str(spec.out_dir / "genetic_log.log"),
+
+        str(spec.out_dir / "result.json"),
+
+        int(generations),
+
+        int(episodes_per_genome),
+
+        int(population),
 
-        reverse=True,
+        int(elite),
 
+        float(mutation_rate),
+
+        float(mutation_std),
+
+        float(cfg.get("win_weight", 0.6)),
+
+        float(cfg.get("reward_scale", 20.0)),
+
+        bool(crossover),
+
+        float(sweep_bonus),
+
+        str(cfg["opponent"]),
+
+        resolve_path(project_root, str(cfg.get("opponent_load_path", ""))),
+
+        _resolve_opponent_pool(project_root, cfg),
+
+        str(cfg.get("opponent_pool_mode", "round_robin")),
+
+        float(cfg["time_scale"]),
+
+        int(cfg["connect_retries"]),
+
+        float(cfg["connect_wait"]),
+
+        float(cfg.get("connect_timeout", 2.0)),
+
+        float(cfg.get("idle_timeout", 30.0)),
+
+        bool(cfg.get("quiet", True)),
+
+        bool(cfg.get("learn_aim", False)),
+
+        int(cfg.get("aim_bins", 9)),
+        str(cfg.get("trainer_script", "")),
+
+    )
+    trainer_cmd.extend(
+        build_fitness_cache_args(
+            project_root,
+            cfg,
+            spec.out_dir,
+            rules,
+            int(generation_global) * max(1, int(generations)),
+        )
     )
 
-    return results
 
 
+    if bool(cfg.get("trainer_live_rounds", False)):
+
+        trainer_cmd.append("--live-rounds")
+
+    if bool(cfg.get("trainer_pretty_md9", False)):
+
+        opp_tag = str(cfg.get("opponent_tag", cfg.get("opponent", "")))
+
+        ind = int(base_individual + (spec.worker_id + 1))
+
+        trainer_cmd.extend(
+
+            [
+
+                "--pretty-md9",
+
+                "--match-title",
+
+                f"G{int(generation_global)} N{ind} vs {opp_tag}",
 
+            ]
+
+        )
+
+    arena_ports = [spec.port + k for k in range(arenas)]
+    if arenas > 1:
+        trainer_cmd.extend(["--ports", ",".join(str(p) for p in arena_ports)])
+    action_repeat = max(1, int(cfg.get("action_repeat", 1)))
+    if action_repeat > 1:
+        trainer_cmd.extend(["--action-repeat", str(action_repeat)])
+    if bool(cfg.get("racing", False)) and _uses_weights_trainer(cfg):
+        trainer_cmd.extend(
+            [
+                "--racing",
+                "--racing-min-episodes",
+                str(int(cfg.get("racing_min_episodes", 1))),
+                "--racing-margin",
+                str(float(cfg.get("racing_margin", 0.05))),
+                "--racing-max-extra-episodes",
+                str(int(cfg.get("racing_max_extra_episodes", -1))),
+            ]
+        )
+    extra_trainer_args = cfg.get("trainer_user_args")
+    if isinstance(extra_trainer_args, list):
+        trainer_cmd.extend([str(a) for a in extra_trainer_args if str(a).strip()])
+
+    return godot_cmd, extra_godot_cmds, trainer_cmd
+
+
+# Chaves da máquina que roda o job: o agente usa as suas, o resto da config vem do coordenador.
+AGENT_LOCAL_KEYS = (
+    "godot_exe",
+    "python_exe",
+    "base_port",
+    "state_dir",
+    "isolate_user_dir",
+    "spawn_delay_sec",
+    "early_godot_exit_grace_sec",
+    "godot_shutdown_wait_sec",
+    "quiet",
+)
+
+AGENT_LOG_TAIL_BYTES = 64 * 1024
+
+
+def build_remote_job(project_root: Path, cfg: Dict, spec: WorkerSpec, generation_global: int, base_individual: int) -> Dict:
+    seed_path = Path(resolve_path(project_root, spec.seed_path))
+    files: Dict[str, Path] = {"seed" + seed_path.suffix: seed_path}
+    opponent_file = ""
+    opponent_cfg = str(cfg.get("opponent_load_path", "")).strip()
+    if opponent_cfg:
+        opponent_path = Path(resolve_path(project_root, opponent_cfg))
+        if opponent_path.exists():
+            opponent_file = "opponent" + opponent_path.suffix
+            files[opponent_file] = opponent_path
+    pool_files: List[str] = []
+    for k, pool_path in enumerate(_resolve_opponent_pool(project_root, cfg)):
+        name = f"pool_{k}{Path(pool_path).suffix}"
+        files[name] = Path(pool_path)
+        pool_files.append(name)
+    return {
+        "worker_id": int(spec.worker_id),
+        "attempt": int(spec.attempt),
+        "generation_global": int(generation_global),
+        "base_individual": int(base_individual),
+        "cfg": {k: v for k, v in cfg.items() if k not in AGENT_LOCAL_KEYS},
+        "rules": load_match_rules(project_root, cfg),
+        "seed_file": "seed" + seed_path.suffix,
+        "opponent_file": opponent_file,
+        "opponent_pool_files": pool_files,
+        "files": pack_files(files),
+    }
+
+
+def store_remote_result(cfg: Dict, spec: WorkerSpec, reply: Dict, agent_name: str) -> int:
+    stored = unpack_files(reply.get("files"), spec.out_dir)
+    exit_code = int(reply.get("exit_code", 1) or 0)
+    result_path = spec.out_dir / "result.json"
+    payload = read_json(result_path) if "result.json" in stored else {}
+    if payload:
+        # Os caminhos do result.json são do agente; o genoma passa a ser a cópia que chegou aqui.
+        genome_path = spec.out_dir / f"best{_genome_suffix(cfg)}"
+        payload["save_path"] = str(genome_path) if genome_path.exists() else ""
+        payload["agent"] = agent_name
+        write_json(result_path, payload)
+        return exit_code
+    write_json(
+        result_path,
+        {
+            "ok": False,
+            "exit_code": exit_code,
+            "error": str(reply.get("error") or "agente não devolveu result.json"),
+            "agent": agent_name,
+            "port": int(spec.port),
+            "attempt": int(spec.attempt),
+            "timestamp": int(time.time()),
+        },
+    )
+    return exit_code
+
+
+def agent_work_root(project_root: Path, cfg: Dict, name: str = "") -> Path:
+    # Cada agente tem a sua pasta (nome ou, sem nome, a base_port, que já é única por host): a lane é apagada a cada
+    # job e dois agentes no mesmo state_dir não podem dividir lane_N.
+    key = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in name) if name else f"port_{int(cfg['base_port'])}"
+    return Path(resolve_path(project_root, cfg["state_dir"])) / "agent" / key
+
+
+async def run_remote_job(
+    project_root: Path, cfg: Dict, job: Dict, lane: int, pinning: Optional[CpuPinning] = None, work_root: Optional[Path] = None
+) -> Dict:
+    job_cfg = dict(job.get("cfg") or {})
+    job_cfg.update({key: cfg[key] for key in AGENT_LOCAL_KEYS if key in cfg})
+    job_cfg["match_rules_path"] = ""
+    job_cfg.update(job.get("rules") or {})
+    work_dir = (work_root if work_root is not None else agent_work_root(project_root, cfg)) / f"lane_{lane}"
+    shutil.rmtree(work_dir, ignore_errors=True)
+    inputs = unpack_files(job.get("files"), work_dir / "inputs")
+    opponent = inputs.get(str(job.get("opponent_file", "")))
+    job_cfg["opponent_load_path"] = str(opponent) if opponent is not None else ""
+    job_cfg["opponent_pool_paths"] = [str(inputs[name]) for name in job.get("opponent_pool_files", []) if name in inputs]
+    job_cfg["opponent_pool_dir"] = ""
+    job_cfg["opponent_pool_include_best"] = False
+    out_dir = work_dir / "out"
+    ensure_dir(out_dir)
+    spec = WorkerSpec(
+        worker_id=int(job.get("worker_id", 0)),
+        port=int(job_cfg["base_port"]) + lane * _arenas_per_worker(job_cfg),
+        seed_path=str(inputs.get(str(job.get("seed_file", "")), "")),
+        out_dir=out_dir,
+        attempt=int(job.get("attempt", 0)),
+    )
+    godot_exe = resolve_executable(str(job_cfg.get("godot_exe", "")))
+    if not godot_exe:
+        return {"exit_code": 127, "error": f"Godot não encontrado no agente: {job_cfg.get('godot_exe')}"}
+    user_dir = None
+    if bool(job_cfg.get("isolate_user_dir", False)):
+        ensure_dir(work_dir / "user")
+        user_dir = str(work_dir / "user")
+    godot_cmd, extra_godot_cmds, trainer_cmd = build_worker_cmds(
+        project_root,
+        job_cfg,
+        spec,
+        godot_exe,
+        int(job.get("generation_global", 0)),
+        int(job.get("base_individual", 0)),
+        user_dir=user_dir,
+    )
+    logs: List[object] = []
+    godot_procs: List[asyncio.subprocess.Process] = []
+    try:
+        for k, cmd in enumerate([godot_cmd] + extra_godot_cmds):
+            log = open(out_dir / ("godot.log" if k == 0 else f"godot_arena_{k}.log"), "w", encoding="utf-8", errors="ignore")
+            logs.append(log)
+            godot_procs.append(await asyncio.create_subprocess_exec(*cmd, stdout=log, stderr=log, **spawn_kwargs(pinning)))
+        early_grace = max(0.0, float(job_cfg.get("early_godot_exit_grace_sec", 0.0)))
+        try:
+            early_exit: Optional[int] = int(await asyncio.wait_for(godot_procs[0].wait(), early_grace) or 0)
+        except asyncio.TimeoutError:
+            early_exit = None
+        if early_exit is not None:
+            exit_code = early_exit or 1
+            write_json(
+                out_dir / "result.json",
+                {
+                    "ok": False,
+                    "exit_code": early_exit,
+                    "error": "Godot exited early",
+                    "details": _summarize_worker_failure(out_dir),
+                    "port": int(spec.port),
+                    "attempt": int(spec.attempt),
+                    "timestamp": int(time.time()),
+                },
+            )
+        else:
+            trainer_log = open(out_dir / "trainer.log", "w", encoding="utf-8", errors="ignore")
+            logs.append(trainer_log)
+            trainer_proc = await asyncio.create_subprocess_exec(*trainer_cmd, stdout=trainer_log, stderr=trainer_log, **spawn_kwargs(pinning))
+            pids = [proc.pid for proc in godot_procs] + [trainer_proc.pid]
+            if pinning is not None:
+                pinning.apply(pids, lane)
+            try:
+                exit_code = int(await trainer_proc.wait() or 0)
+            finally:
+                if trainer_proc.returncode is None:
+                    trainer_proc.terminate()
+                if pinning is not None:
+                    pinning.forget(pids)
+            try:
+                await asyncio.wait_for(godot_procs[0].wait(), max(0.0, float(job_cfg.get("godot_shutdown_wait_sec", 0.0))))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        for proc in godot_procs:
+            if proc.returncode is None:
+                try:
+                    proc.terminate()
+                except OSError:
+                    pass
+        for log in logs:
+            try:
+                log.close()
+            except Exception:
+                pass
+    suffix = _genome_suffix(job_cfg)
+    files = pack_files(
+        {
+            "result.json": out_dir / "result.json",
+            f"best{suffix}": out_dir / f"best{suffix}",
+            "fitness_cache.json": out_dir / "fitness_cache.json",
+        }
+    )
+    files.update(pack_files({"trainer.log": out_dir / "trainer.log", "godot.log": out_dir / "godot.log"}, AGENT_LOG_TAIL_BYTES))
+    return {"exit_code": exit_code, "files": files}
+
+
+def run_agent(project_root: Path, cfg: Dict, coordinator: str, slots: int, name: str = "") -> int:
+    host, port = parse_address(coordinator, int(cfg.get("work_queue_port", 0)))
+    if port <= 0:
+        raise FileNotFoundError("Agente sem coordenador: use --coordinator host:porta ou work_queue_port na config.")
+    slots = int(slots) if int(slots) > 0 else int(cfg["concurrency"])
+    pinning = build_cpu_pinning(cfg, on_event=lambda text: print(f"[agent] {text}", flush=True))
+    raise_own_priority(
+        int(cfg.get("orchestrator_nice", 0)),
+        pinning.reserved_cpus if pinning is not None else [],
+        on_event=lambda text: print(f"[agent] {text}", flush=True),
+    )
+    work_root = agent_work_root(project_root, cfg, name)
+    print(f"Agente de ilhas | coordenador {host}:{port} | slots {slots} | base_port {int(cfg['base_port'])} | {work_root}", flush=True)
+
+    async def run_job(job: Dict, lane: int) -> Dict:
+        print(f"[agent] job {job.get('job_id')} | worker {job.get('worker_id')} attempt {job.get('attempt')} | lane {lane}", flush=True)
+        return await run_remote_job(project_root, cfg, job, lane, pinning, work_root)
+
+    asyncio.run(
+        serve_agent(
+            host,
+            port,
+            slots,
+            run_job,
+            name=name,
+            connect_wait=max(0.1, float(cfg.get("work_queue_reconnect_sec", 1.0))),
+            on_event=lambda text: print(f"[agent] {text}", flush=True),
+        )
+    )
+    return 0
 
 
 def run_round(
@@ -1670,15 +2586,27 @@ def run_round(
 
     dry_run: bool,
 
+    pool: Optional[GodotPool] = None,
+
+    governor: Optional[ConcurrencyGovernor] = None,
+
+    pinning: Optional[CpuPinning] = None,
+    catalog: Optional[RunCatalog] = None,
+    store: Optional[GenomeStore] = None,
+
 ) -> List[str]:
 
     workers = int(cfg["workers"])
 
-    concurrency = min(int(cfg["concurrency"]), workers)
+    concurrency = min(int(cfg["concurrency"]) if governor is None else governor.current, workers)
 
     spawn_batch = max(1, int(cfg.get("spawn_batch", 16)))
 
-    base_port = int(cfg["base_port"]) + round_index * (workers + 10)
+    arenas = _arenas_per_worker(cfg)
+
+    port_stride = workers * arenas + 10
+
+    base_port = int(cfg["base_port"]) + round_index * port_stride
 
     state_dir = Path(resolve_path(project_root, cfg["state_dir"]))
 
@@ -1691,6 +2619,8 @@ def run_round(
         shutil.rmtree(round_dir, ignore_errors=True)
 
     ensure_dir(round_dir)
+    if catalog is not None:
+        catalog.start_round(round_index, generation_global, base_individual, workers)
 
 
 
@@ -1726,7 +2656,18 @@ def run_round(
 
             int(cfg.get("seed", 0)) + int(generation_global) * 100000 + int(round_index),
 
+            elite=int(cfg.get("outer_ga_elite", 1)),
+
+            suffix=_genome_suffix(cfg),
+
         )
+        if catalog is not None and generated_population_paths:
+            manifest = read_json(population_dir / "population.json")
+            catalog.add_origins(
+                (str(item.get("path", "")), str(item.get("parent_a", "")), "" if item.get("elite") else str(item.get("parent_b", "")))
+                for item in manifest.get("individuals", [])
+                if isinstance(item, dict)
+            )
 
 
 
@@ -1740,31 +2681,80 @@ def run_round(
 
 
 
-    for wid in range(workers):
+    # Resultados chegam pelo ResultServer (ou pelo result.json, no pool sem stream e nos agentes) e entram no
+    # Leaderboard na hora; o fim da rodada só lê o top-k.
+    leaderboard = Leaderboard(int(cfg["topk"]), bool(cfg.get("prefer_winner_selection", True)))
 
-        port = base_port + wid
+    streamed: Dict[str, Dict] = {}
 
-        out_dir = round_dir / f"worker_{wid}"
+    live_progress: Dict[int, Dict] = {}
 
-        ensure_dir(out_dir)
+    step_rates: Dict[int, float] = {}
+    convergence = None if dry_run else build_convergence(cfg, workers)
+    # Motivo do fechamento antecipado (early_stop); vazio enquanto a rodada roda até o último worker.
+    early_stop: Dict = {"reason": "", "skipped": 0, "stopped": 0}
 
+    # Lanes de afinidade dos workers locais sem pool (no pool a lane é o slot).
+    pin_lanes: Set[int] = set()
 
+    individuals_dir = round_dir / "individuals"
 
-        if resume_round:
+    ensure_dir(individuals_dir)
 
-            result_path = out_dir / "result.json"
 
-            payload = read_json(result_path)
 
-            if isinstance(payload, dict) and bool(payload.get("ok", False)):
+    def accept_result(wid: int, payload: Dict) -> None:
+        entry = result_entry(round_dir, wid, payload, round_dir / f"worker_{wid}" / "result.json")
+        if entry is None:
+            return
+        score, _genome_path, entry_payload = entry
+        global_n = int(base_individual + (wid + 1))
+        entry_payload["islands_round"] = int(round_index)
+        entry_payload["generation_global"] = int(generation_global)
+        entry_payload["individual"] = int(global_n)
+        record = dict(entry_payload)
+        record.update({"score": float(score), "generation": int(generation_global), "individual": int(global_n)})
+        out_name = f"G{generation_global:04d}_N{global_n:06d}_R{round_index:04d}_wid{wid:03d}_score_{score:.6f}.json"
+        write_json(individuals_dir / out_name, record)
+        if catalog is not None:
+            catalog.add_individual(record, parent_path=parent_of(wid), record_path=str(individuals_dir / out_name))
+        leaderboard.offer(entry)
 
-                completed += 1
+    def parent_of(wid: int) -> str:
+        if outer_ga and wid < len(generated_population_paths):
+            return generated_population_paths[wid]
+        return resolve_path(project_root, select_seed(seed_paths, wid)) if seed_paths else ""
 
-                score = _primary_total_score(payload)
 
-                sweep = _is_sweep_5_0(payload)
 
-                if score == score and score not in (float("inf"), float("-inf")):
+    for wid in range(workers):
+
+        port = base_port + wid * arenas
+
+        out_dir = round_dir / f"worker_{wid}"
+
+        ensure_dir(out_dir)
+
+
+
+        if resume_round:
+
+            result_path = out_dir / "result.json"
+
+            payload = read_json(result_path)
+
+            if isinstance(payload, dict) and bool(payload.get("ok", False)):
+
+                completed += 1
+                accept_result(wid, payload)
+                if convergence is not None and not early_stop["reason"]:
+                    early_stop["reason"] = convergence.observe(leaderboard, payload)
+
+                score = _primary_total_score(payload)
+
+                sweep = _is_sweep_5_0(payload)
+
+                if score == score and score not in (float("inf"), float("-inf")):
 
                     if best_so_far is None:
 
@@ -1868,891 +2858,895 @@ def run_round(
 
 
 
-    write_json(
-
-        status_path,
-
-        {
-
-            "round": int(round_index),
-
-            "workers": int(workers),
-
-            "completed": int(completed),
-
-            "running": 0,
-
-            "queued": int(len(queue)),
-
-            "best_so_far": None,
-
-            "elapsed_sec": 0.0,
-
-            "eta_sec": 0.0,
-
-            "concurrency": int(concurrency),
-
-            "updated_at": int(time.time()),
-
-            "error": "",
-
-        },
-
-    )
-
-
-
-    try:
-
-        while queue or running:
-
-            spawn_budget = min(spawn_batch, concurrency - len(running), len(queue))
-
-            for _ in range(spawn_budget):
-
-                spec = queue.pop(0)
-
-                godot_exe = resolve_executable(str(cfg["godot_exe"]))
+    status: Dict = {
 
-                if not godot_exe:
-
-                    if dry_run:
+        "round": int(round_index),
 
-                        godot_exe = str(cfg["godot_exe"])
+        "workers": int(workers),
 
-                    else:
+        "completed": int(completed),
 
-                        append_log(log_path, f"ERRO: godot_exe inválido: {cfg['godot_exe']}")
+        "running": 0,
 
-                        current = read_json(status_path)
+        "queued": int(len(queue)),
 
-                        current["error"] = f"Godot não encontrado: {cfg['godot_exe']}"
+        "best_so_far": None,
 
-                        current["updated_at"] = int(time.time())
+        "elapsed_sec": 0.0,
 
-                        write_json(status_path, current)
+        "eta_sec": 0.0,
 
-                        raise FileNotFoundError(f"Godot não encontrado: {cfg['godot_exe']}")
+        "concurrency": int(concurrency),
 
+        "updated_at": int(time.time()),
 
+        "error": "",
 
-                user_dir = None
+    }
 
-                if bool(cfg.get("isolate_user_dir", False)):
+    write_json(status_path, status)
 
-                    user_dir_path = spec.out_dir / "user"
 
-                    ensure_dir(user_dir_path)
 
-                    user_dir = str(user_dir_path)
+    # Supervisor por eventos: cada worker é uma task que acorda quando o processo sai (sem polling),
+    # e o status.json é regravado no máximo a cada status_interval, direto do dict em memória.
+    status_interval = 0.5
 
+    spawn_gate = asyncio.Lock()
 
+    # Fila de trabalho (work_queue_port > 0): agentes em outras máquinas pegam specs além das vagas locais.
+    work_queue_port = 0 if dry_run else int(cfg.get("work_queue_port", 0))
 
-                rules = load_match_rules(project_root, cfg)
+    work_queue: Optional[WorkQueue] = None
 
-                godot_cmd = build_godot_cmd(
+    remote: List[WorkerSpec] = []
 
-                    project_root,
+    local_slots = concurrency if work_queue_port <= 0 or bool(cfg.get("work_queue_local", True)) else 0
 
-                    godot_exe,
+    result_server: Optional[ResultServer] = None
 
-                    spec.port,
 
-                    float(cfg["time_scale"]),
 
-                    float(cfg["quit_idle"]),
+    async def launch(spec: WorkerSpec) -> Optional[WorkerRun]:
 
-                    int(cfg["fixed_fps"]),
+        nonlocal completed
 
-                    int(rules.get("max_steps", 0)),
+        godot_exe = resolve_executable(str(cfg["godot_exe"]))
 
-                    float(rules.get("max_seconds", 0.0)),
+        if not godot_exe:
 
-                    int(rules.get("max_kills", 0)),
+            if dry_run:
 
-                    user_dir=user_dir,
+                godot_exe = str(cfg["godot_exe"])
 
-                    extra_user_args=(cfg.get("godot_user_args") if isinstance(cfg.get("godot_user_args"), list) else None),
+            else:
 
-                )
+                append_log(log_path, f"ERRO: godot_exe inválido: {cfg['godot_exe']}")
 
+                status["error"] = f"Godot não encontrado: {cfg['godot_exe']}"
 
+                status["updated_at"] = int(time.time())
 
-                generations = int(cfg["generations"])
+                write_json(status_path, status)
+                raise FileNotFoundError(f"Godot não encontrado: {cfg['godot_exe']}")
 
-                episodes_per_genome = int(cfg["episodes_per_genome"])
 
-                population = int(cfg.get("population", 1))
 
-                elite = int(cfg.get("elite", 1))
+        lease: Optional[PoolSlot] = None
+        if pool is not None and not dry_run:
+            lease = pool.lease()
+            if lease is None:
+                queue.insert(0, spec)
+                return None
+            spec.port = lease.port
 
-                mutation_rate = float(cfg["mutation_rate"])
+        user_dir = None
 
-                mutation_std = float(cfg["mutation_std"])
+        if bool(cfg.get("isolate_user_dir", False)):
 
-                crossover = bool(cfg.get("crossover", False))
+            user_dir_path = lease.user_dir if lease is not None else spec.out_dir / "user"
 
-                sweep_bonus = float(cfg.get("sweep_bonus", 0.0))
+            ensure_dir(user_dir_path)
 
-                if outer_ga:
+            user_dir = str(user_dir_path)
 
-                    generations = 1
 
-                    population = 1
 
-                    elite = 1
-
-                    mutation_rate = 0.0
+        godot_cmd, extra_godot_cmds, trainer_cmd = build_worker_cmds(
+            project_root,
+            cfg,
+            spec,
+            godot_exe,
+            generation_global,
+            base_individual,
+            user_dir=user_dir,
+            persistent=lease is not None,
+        )
+        if dry_run:
 
-                    mutation_std = 0.0
+            print("[dry-run] GODOT:", " ".join(godot_cmd))
+            for extra_cmd in extra_godot_cmds:
+                print("[dry-run] GODOT:", " ".join(extra_cmd))
 
-                    crossover = False
+            print("[dry-run] TRAIN:", " ".join(trainer_cmd))
 
-                    sweep_bonus = 0.0
+            completed += 1
+            return None
+        try:
 
-                trainer_cmd = build_trainer_cmd(
+            godot_log_path = spec.out_dir / "godot.log"
 
-                    project_root,
+            trainer_log_path = spec.out_dir / "trainer.log"
 
-                    resolve_path(project_root, cfg["python_exe"]),
+            trainer_log = open(trainer_log_path, "w", encoding="utf-8", errors="ignore")
 
-                    spec.port,
+            godot_log = None
+            godot_proc: Optional[Union[subprocess.Popen, asyncio.subprocess.Process]] = None
+            early_exit: Optional[int] = None
+            if lease is not None:
+                # Pool: reaproveita a instância quente do slot (só sobe de novo se morreu ou o cmd mudou).
+                if await asyncio.to_thread(pool.acquire, lease, [godot_cmd] + extra_godot_cmds):
+                    godot_proc = lease.procs[0]
+                else:
+                    early_exit = int(lease.last_exit)
+                    await asyncio.to_thread(pool.release, lease, False)
+            else:
+                godot_log = open(godot_log_path, "w", encoding="utf-8", errors="ignore")
 
-                    resolve_path(project_root, spec.seed_path),
+                async with spawn_gate:
+                    # Escalona só o boot; a janela de saída precoce de cada Godot corre em paralelo.
+                    if float(cfg.get("spawn_delay_sec", 0.0)) > 0:
+                        await asyncio.sleep(float(cfg.get("spawn_delay_sec", 0.0)))
+                    godot_proc = await asyncio.create_subprocess_exec(
+                        *godot_cmd, stdout=godot_log, stderr=godot_log, **spawn_kwargs(pinning)
+                    )
+                early_grace = max(0.0, float(cfg.get("early_godot_exit_grace_sec", 0.0)))
+                try:
+                    early_exit = int(await asyncio.wait_for(godot_proc.wait(), early_grace) or 0)
+                except asyncio.TimeoutError:
+                    pass
+            if early_exit is not None:
 
-                    str(spec.out_dir / "best.json"),
+                exit_code = early_exit
 
-                    str(spec.out_dir / "genetic_log.log"),
+                try:
 
-                    str(spec.out_dir / "result.json"),
+                    if godot_log is not None:
+                        godot_log.close()
 
-                    int(generations),
+                except Exception:
 
-                    int(episodes_per_genome),
+                    pass
 
-                    int(population),
+                try:
 
-                    int(elite),
+                    trainer_log.close()
 
-                    float(mutation_rate),
+                except Exception:
 
-                    float(mutation_std),
+                    pass
 
-                    float(cfg.get("win_weight", 0.6)),
+                failure = _summarize_worker_failure(spec.out_dir, lease.log_path if lease is not None else None)
 
-                    float(cfg.get("reward_scale", 20.0)),
+                append_log(
 
-                    bool(crossover),
+                    log_path,
 
-                    float(sweep_bonus),
+                    f"worker {spec.worker_id} godot exited early (attempt {spec.attempt}) | code={exit_code} | port={spec.port}",
 
-                    str(cfg["opponent"]),
+                )
 
-                    resolve_path(project_root, str(cfg.get("opponent_load_path", ""))),
+                write_json(
 
-                    _resolve_opponent_pool(project_root, cfg),
+                    spec.out_dir / "result.json",
 
-                    str(cfg.get("opponent_pool_mode", "round_robin")),
+                    {
 
-                    float(cfg["time_scale"]),
+                        "ok": False,
 
-                    int(cfg["connect_retries"]),
+                        "exit_code": exit_code,
 
-                    float(cfg["connect_wait"]),
+                        "error": "Godot exited early",
 
-                    float(cfg.get("connect_timeout", 2.0)),
+                        "details": failure,
 
-                    float(cfg.get("idle_timeout", 30.0)),
+                        "port": int(spec.port),
 
-                    bool(cfg.get("quiet", True)),
+                        "attempt": int(spec.attempt),
 
-                    bool(cfg.get("learn_aim", False)),
+                        "timestamp": int(time.time()),
 
-                    int(cfg.get("aim_bins", 9)),
-                    str(cfg.get("trainer_script", "")),
+                    },
 
                 )
 
+                max_attempts = int(cfg.get("max_attempts_per_worker", 1))
 
+                if spec.attempt + 1 < max_attempts:
 
-                if bool(cfg.get("trainer_live_rounds", False)):
-
-                    trainer_cmd.append("--live-rounds")
-
-                if bool(cfg.get("trainer_pretty_md9", False)):
-
-                    opp_tag = str(cfg.get("opponent_tag", cfg.get("opponent", "")))
+                    queue.append(
 
-                    ind = int(base_individual + (spec.worker_id + 1))
+                        WorkerSpec(
 
-                    trainer_cmd.extend(
+                            worker_id=spec.worker_id,
 
-                        [
+                            port=spec.port + port_stride,
 
-                            "--pretty-md9",
+                            seed_path=spec.seed_path,
 
-                            "--match-title",
+                            out_dir=spec.out_dir,
 
-                            f"G{int(generation_global)} N{ind} vs {opp_tag}",
+                            attempt=spec.attempt + 1,
 
-                        ]
+                        )
 
                     )
 
-                extra_trainer_args = cfg.get("trainer_user_args")
-                if isinstance(extra_trainer_args, list):
-                    trainer_cmd.extend([str(a) for a in extra_trainer_args if str(a).strip()])
-
-
-
-                if dry_run:
-
-                    print("[dry-run] GODOT:", " ".join(godot_cmd))
-
-                    print("[dry-run] TRAIN:", " ".join(trainer_cmd))
-
+                else:
                     completed += 1
+                return None
+            extra_godot: List[Tuple[asyncio.subprocess.Process, object]] = []
+            for k, extra_cmd in enumerate(extra_godot_cmds if lease is None else [], start=1):
+                extra_log = open(spec.out_dir / f"godot_arena_{k}.log", "w", encoding="utf-8", errors="ignore")
+                extra_godot.append(
+                    (await asyncio.create_subprocess_exec(*extra_cmd, stdout=extra_log, stderr=extra_log, **spawn_kwargs(pinning)), extra_log)
+                )
+            if result_server is not None and _trainer_reports_results(cfg):
+                trainer_cmd = trainer_cmd + ["--report-to", result_server.address, "--report-id", _report_id(spec)]
+            trainer_proc = await asyncio.create_subprocess_exec(*trainer_cmd, stdout=trainer_log, stderr=trainer_log, **spawn_kwargs(pinning))
+            lane = -1
+            if pinning is not None:
+                # Godot(s) e trainer do worker no mesmo bloco de CPUs, com nice/ionice de worker.
+                if lease is not None:
+                    lane = lease.slot_id
+                else:
+                    lane = min(set(range(len(pin_lanes) + 1)) - pin_lanes)
+                    pin_lanes.add(lane)
+                godot_procs = lease.procs if lease is not None else [godot_proc]
+                pinning.apply([proc.pid for proc in godot_procs] + [proc.pid for proc, _log in extra_godot] + [trainer_proc.pid], lane)
+
+            return WorkerRun(
+                spec=spec,
+                godot_proc=godot_proc,
+                trainer_proc=trainer_proc,
+                godot_log=godot_log,
+                trainer_log=trainer_log,
+                started_at=time.time(),
+                extra_godot=extra_godot,
+                lease=lease,
+                lane=lane,
+            )
+        except FileNotFoundError as exc:
 
-                    continue
-
-
-
-                try:
-
-                    godot_log_path = spec.out_dir / "godot.log"
-
-                    trainer_log_path = spec.out_dir / "trainer.log"
-
-                    godot_log = open(godot_log_path, "w", encoding="utf-8", errors="ignore")
-
-                    trainer_log = open(trainer_log_path, "w", encoding="utf-8", errors="ignore")
-
-
-
-                    if float(cfg.get("spawn_delay_sec", 0.0)) > 0:
-
-                        time.sleep(float(cfg.get("spawn_delay_sec", 0.0)))
-
-
-
-                    godot_proc = subprocess.Popen(godot_cmd, stdout=godot_log, stderr=godot_log)
-
-
-
-                    early_grace = max(0.0, float(cfg.get("early_godot_exit_grace_sec", 0.0)))
-
-                    if early_grace > 0.0:
-
-                        time.sleep(early_grace)
+            completed += 1
 
+            append_log(log_path, f"worker {spec.worker_id} spawn fail: {exc}")
 
+            write_json(
 
-                    if godot_proc.poll() is not None:
+                spec.out_dir / "result.json",
 
-                        exit_code = int(godot_proc.poll() or 0)
+                {
 
-                        try:
+                    "ok": False,
 
-                            godot_log.close()
+                    "exit_code": 127,
 
-                        except Exception:
+                    "error": str(exc),
 
-                            pass
+                    "port": int(spec.port),
 
-                        try:
+                    "timestamp": int(time.time()),
 
-                            trainer_log.close()
+                },
 
-                        except Exception:
+            )
 
-                            pass
+        except OSError as exc:
 
-                        failure = _summarize_worker_failure(spec.out_dir)
+            completed += 1
 
-                        append_log(
+            append_log(log_path, f"worker {spec.worker_id} spawn os error: {exc}")
 
-                            log_path,
+            write_json(
 
-                            f"worker {spec.worker_id} godot exited early (attempt {spec.attempt}) | code={exit_code} | port={spec.port}",
+                spec.out_dir / "result.json",
 
-                        )
+                {
 
-                        write_json(
+                    "ok": False,
 
-                            spec.out_dir / "result.json",
+                    "exit_code": 126,
 
-                            {
+                    "error": str(exc),
 
-                                "ok": False,
+                    "port": int(spec.port),
 
-                                "exit_code": exit_code,
+                    "timestamp": int(time.time()),
 
-                                "error": "Godot exited early",
+                },
 
-                                "details": failure,
+            )
+        return None
 
-                                "port": int(spec.port),
 
-                                "attempt": int(spec.attempt),
 
-                                "timestamp": int(time.time()),
+    def settle(spec: WorkerSpec, exit_code: int, godot_log_path: Optional[Path] = None) -> None:
 
-                            },
+        nonlocal completed, best_so_far, best_sweep
 
-                        )
+        # O payload que o trainer mandou pelo socket é o mesmo que ele gravou; sem stream, lê do disco.
+        result_payload = streamed.pop(_report_id(spec), None) or read_json(spec.out_dir / "result.json")
+        if not bool(result_payload.get("ok", False)):
+            leaderboard.discard(spec.worker_id)
 
-                        max_attempts = int(cfg.get("max_attempts_per_worker", 1))
+        if result_payload:
 
-                        if spec.attempt + 1 < max_attempts:
+            score = _primary_total_score(result_payload)
 
-                            queue.append(
+            sweep = _is_sweep_5_0(result_payload)
 
-                                WorkerSpec(
+            prev_best = best_so_far
 
-                                    worker_id=spec.worker_id,
+            prev_sweep = best_sweep
 
-                                    port=spec.port + (workers + 10),
+            if best_so_far is None:
 
-                                    seed_path=spec.seed_path,
+                best_so_far = score
 
-                                    out_dir=spec.out_dir,
+                best_sweep = bool(sweep)
 
-                                    attempt=spec.attempt + 1,
+            else:
 
-                                )
+                if (bool(sweep) and not best_sweep) or (bool(sweep) == best_sweep and score > float(best_so_far)):
 
-                            )
+                    best_so_far = score
 
-                        else:
+                    best_sweep = bool(sweep)
 
-                            completed += 1
 
-                        continue
 
+            if bool(result_payload.get("ok", False)):
+                accept_result(spec.worker_id, result_payload)
 
+                gen_end = int(result_payload.get("generation", 0))
 
-                    trainer_proc = subprocess.Popen(trainer_cmd, stdout=trainer_log, stderr=trainer_log)
+                is_new_best = (
 
-                    running.append(
+                    prev_best is None
 
-                        WorkerRun(
+                    or (bool(sweep) and not bool(prev_sweep))
 
-                            spec=spec,
+                    or (bool(sweep) == bool(prev_sweep) and score > float(prev_best) + 1e-9)
 
-                            godot_proc=godot_proc,
+                )
 
-                            trainer_proc=trainer_proc,
+                if is_new_best:
 
-                            godot_log=godot_log,
+                    global_n = int(base_individual + (spec.worker_id + 1))
 
-                            trainer_log=trainer_log,
+                    msg = (
 
-                            started_at=time.time(),
+                        f"\nIslandsRound {round_index} | NEW BEST ScoreTot {score:.2f} | "
 
-                        )
+                        f"G{generation_global} N{global_n} | wid {spec.worker_id} | gen_end {gen_end}\n"
 
                     )
 
-                except FileNotFoundError as exc:
-
-                    completed += 1
-
-                    append_log(log_path, f"worker {spec.worker_id} spawn fail: {exc}")
-
-                    write_json(
-
-                        spec.out_dir / "result.json",
-
-                        {
-
-                            "ok": False,
-
-                            "exit_code": 127,
-
-                            "error": str(exc),
+                    sys.stdout.write(_c(msg, ANSI_GREEN, color_enabled))
 
-                            "port": int(spec.port),
+                    sys.stdout.flush()
 
-                            "timestamp": int(time.time()),
 
-                        },
 
-                    )
-
-                except OSError as exc:
+                opp_tag = str(cfg.get("opponent_tag", cfg.get("opponent", "")))
 
-                    completed += 1
 
-                    append_log(log_path, f"worker {spec.worker_id} spawn os error: {exc}")
 
-                    write_json(
+                best_stats = result_payload.get("best_stats") if isinstance(result_payload, dict) else None
 
-                        spec.out_dir / "result.json",
+                if not isinstance(best_stats, dict):
 
-                        {
+                    best_stats = {}
 
-                            "ok": False,
+                last_round = best_stats.get("last_round") if isinstance(best_stats.get("last_round"), dict) else {}
 
-                            "exit_code": 126,
+                match_score = last_round.get("match_score") if isinstance(last_round.get("match_score"), dict) else {}
 
-                            "error": str(exc),
+                kills = last_round.get("kills") if isinstance(last_round.get("kills"), dict) else {}
 
-                            "port": int(spec.port),
+                wins = last_round.get("wins") if isinstance(last_round.get("wins"), dict) else {}
 
-                            "timestamp": int(time.time()),
 
-                        },
 
-                    )
+                w = int(last_round.get("winner", result_payload.get("last_winner", 0))) if isinstance(result_payload, dict) else 0
 
+                s1 = float(match_score.get(1, match_score.get("1", result_payload.get("best_score_p1", 0.0))))
 
+                s2 = float(match_score.get(2, match_score.get("2", result_payload.get("best_score_p2", 0.0))))
 
-            now = time.time()
+                k1 = int(kills.get(1, kills.get("1", result_payload.get("best_kills_p1", 0))))
 
-            if now - last_status_write >= 0.5:
+                k2 = int(kills.get(2, kills.get("2", result_payload.get("best_kills_p2", 0))))
 
-                current = read_json(status_path)
 
-                current.update(
 
-                    {
+                w1 = int(wins.get(1, wins.get("1", 0)))
 
-                        "round": int(round_index),
+                w2 = int(wins.get(2, wins.get("2", 0)))
 
-                        "workers": int(workers),
+                rounds_played = max(1, w1 + w2)
 
-                        "completed": int(completed),
+                avg1 = s1 / rounds_played
 
-                        "running": int(len(running)),
 
-                        "queued": int(len(queue)),
 
-                        "best_so_far": float(best_so_far) if best_so_far is not None else None,
+                winner_label = "P1" if w == 1 else ("P2" if w == 2 else "?")
 
-                        "elapsed_sec": float(now - started),
+                sys.stdout.write(
 
-                        "eta_sec": 0.0,
+                    "R%d G%d N%d vs %s | W=%s | ScoreTot=%.2f | ScoreAvg=%.2f | OppTot=%.2f | K=%d-%d | Rounds=%d-%d\n"
 
-                        "concurrency": int(concurrency),
+                    % (
 
-                        "updated_at": int(time.time()),
+                        int(round_index),
 
-                    }
+                        int(generation_global),
 
-                )
+                        int(base_individual + (spec.worker_id + 1)),
 
-                write_json(status_path, current)
+                        opp_tag,
 
-                last_status_write = now
+                        winner_label,
 
+                        s1,
 
+                        avg1,
 
-            if dry_run:
+                        s2,
 
-                break
+                        k1,
 
+                        k2,
 
+                        w1,
 
-            time.sleep(0.05)
+                        w2,
 
-            still_running: List[WorkerRun] = []
+                    )
 
-            for run in running:
+                )
 
-                trainer_done = run.trainer_proc.poll() is not None
+                sys.stdout.flush()
 
-                if not trainer_done:
 
-                    still_running.append(run)
+        max_attempts = int(cfg.get("max_attempts_per_worker", 1))
 
-                    continue
+        # Worker parado pelo early_stop não volta para a fila.
+        should_retry = exit_code != 0 and (spec.attempt + 1) < max_attempts and not early_stop["reason"]
 
+        if should_retry:
 
+            queue.append(
 
-                result_payload = read_json(run.spec.out_dir / "result.json")
+                WorkerSpec(
 
-                if result_payload:
+                    worker_id=spec.worker_id,
 
-                    score = _primary_total_score(result_payload)
+                    port=spec.port + port_stride,
 
-                    sweep = _is_sweep_5_0(result_payload)
+                    seed_path=spec.seed_path,
 
-                    prev_best = best_so_far
+                    out_dir=spec.out_dir,
 
-                    prev_sweep = best_sweep
+                    attempt=spec.attempt + 1,
 
-                    if best_so_far is None:
+                )
 
-                        best_so_far = score
+            )
 
-                        best_sweep = bool(sweep)
+        else:
+            completed += 1
+            if convergence is not None and not early_stop["reason"]:
+                early_stop["reason"] = convergence.observe(leaderboard, result_payload)
 
-                    else:
 
-                        if (bool(sweep) and not best_sweep) or (bool(sweep) == best_sweep and score > float(best_so_far)):
 
-                            best_so_far = score
+        if exit_code != 0 and not early_stop["reason"]:
 
-                            best_sweep = bool(sweep)
+            failure = _summarize_worker_failure(spec.out_dir, godot_log_path)
 
+            if failure:
 
+                append_log(
 
-                    if bool(result_payload.get("ok", False)):
+                    log_path,
 
-                        gen_end = int(result_payload.get("generation", 0))
+                    f"worker {spec.worker_id} trainer exit={exit_code} attempt={spec.attempt} port={spec.port}\n{failure}",
 
-                        is_new_best = (
+                )
 
-                            prev_best is None
 
-                            or (bool(sweep) and not bool(prev_sweep))
 
-                            or (bool(sweep) == bool(prev_sweep) and score > float(prev_best) + 1e-9)
 
-                        )
 
-                        if is_new_best:
 
-                            global_n = int(base_individual + (run.spec.worker_id + 1))
+    async def finish(run: WorkerRun, exit_code: int) -> None:
 
-                            msg = (
+        if run.lease is not None:
+            # Instância do pool volta para o próximo job; se o trainer falhou, o slot é reciclado. Trainer derrubado
+            # pelo early stop (ou pelo orquestrador) sai com erro, mas o Godot continua bom: ele só volta ao estado
+            # inicial quando o trainer desconecta. Godot morto o release recicla de qualquer jeito.
+            healthy = exit_code == 0 or run.stopped or bool(early_stop["reason"])
+            await asyncio.to_thread(pool.release, run.lease, healthy)
+        elif _proc_running(run.godot_proc):
+            graceful_wait = max(0.0, float(cfg.get("godot_shutdown_wait_sec", 0.0)))
+            try:
+                await asyncio.wait_for(run.godot_proc.wait(), graceful_wait)
+            except asyncio.TimeoutError:
+                try:
+                    run.godot_proc.terminate()
+                except OSError:
+                    pass
+        settle(run.spec, exit_code, run.lease.log_path if run.lease is not None else None)
+
+        stop_extra_godot(run)
+        if pinning is not None:
+            pinning.forget(
+                [run.trainer_proc.pid]
+                + ([] if run.lease is not None else [run.godot_proc.pid])
+                + [proc.pid for proc, _log in run.extra_godot]
+            )
+            if run.lease is None:
+                pin_lanes.discard(run.lane)
 
-                                f"\nIslandsRound {round_index} | NEW BEST ScoreTot {score:.2f} | "
+        try:
 
-                                f"G{generation_global} N{global_n} | wid {run.spec.worker_id} | gen_end {gen_end}\n"
+            if run.godot_log is not None:
+                run.godot_log.close()
 
-                            )
+        except Exception:
 
-                            sys.stdout.write(_c(msg, ANSI_GREEN, color_enabled))
+            pass
 
-                            sys.stdout.flush()
+        try:
 
+            run.trainer_log.close()
 
+        except Exception:
 
-                        opp_tag = str(cfg.get("opponent_tag", cfg.get("opponent", "")))
+            pass
 
 
 
-                        best_stats = result_payload.get("best_stats") if isinstance(result_payload, dict) else None
 
-                        if not isinstance(best_stats, dict):
 
-                            best_stats = {}
+    def refresh_status() -> None:
 
-                        last_round = best_stats.get("last_round") if isinstance(best_stats.get("last_round"), dict) else {}
+        nonlocal last_status_write, live_sample_wid
 
-                        match_score = last_round.get("match_score") if isinstance(last_round.get("match_score"), dict) else {}
+        now = time.time()
 
-                        kills = last_round.get("kills") if isinstance(last_round.get("kills"), dict) else {}
+        elapsed = now - started
 
-                        wins = last_round.get("wins") if isinstance(last_round.get("wins"), dict) else {}
+        rate = completed / elapsed if elapsed > 0 else 0.0
 
+        remaining = max(0, workers - completed)
 
+        eta = remaining / rate if rate > 0 else 0.0
 
-                        w = int(last_round.get("winner", result_payload.get("last_winner", 0))) if isinstance(result_payload, dict) else 0
+        if int(now) % 1 == 0:
 
-                        s1 = float(match_score.get(1, match_score.get("1", result_payload.get("best_score_p1", 0.0))))
+            if best_so_far is None:
 
-                        s2 = float(match_score.get(2, match_score.get("2", result_payload.get("best_score_p2", 0.0))))
+                best_text = "N/A"
 
-                        k1 = int(kills.get(1, kills.get("1", result_payload.get("best_kills_p1", 0))))
+            else:
 
-                        k2 = int(kills.get(2, kills.get("2", result_payload.get("best_kills_p2", 0))))
+                tag = "SWEEP" if best_sweep else ""
 
+                best_text = f"{tag}{best_so_far:.2f}" if tag else f"{best_so_far:.2f}"
 
+            sys.stdout.write(
 
-                        w1 = int(wins.get(1, wins.get("1", 0)))
+                f"\rIslandsRound {round_index} | done {completed}/{workers} | running {len(running)} | queued {len(queue)} | "
 
-                        w2 = int(wins.get(2, wins.get("2", 0)))
+                f"best {best_text} | elapsed {elapsed:0.0f}s"
+                + (f" | remote {len(remote)} agents {len(work_queue.agents)}" if work_queue is not None else "")
+            )
 
-                        rounds_played = max(1, w1 + w2)
+            sys.stdout.flush()
 
-                        avg1 = s1 / rounds_played
 
 
+        if now - last_status_write >= status_interval:
 
-                        winner_label = "P1" if w == 1 else ("P2" if w == 2 else "?")
+            sample = {}
 
-                        sys.stdout.write(
+            if running:
 
-                            "R%d G%d N%d vs %s | W=%s | ScoreTot=%.2f | ScoreAvg=%.2f | OppTot=%.2f | K=%d-%d | Rounds=%d-%d\n"
+                running_wids = {int(r.spec.worker_id) for r in running}
 
-                            % (
+                if live_sample_wid is None or live_sample_wid not in running_wids:
 
-                                int(round_index),
+                    live_sample_wid = min(running_wids)
 
-                                int(generation_global),
 
-                                int(base_individual + (run.spec.worker_id + 1)),
 
-                                opp_tag,
+                sample_run = next((r for r in running if int(r.spec.worker_id) == int(live_sample_wid)), running[0])
 
-                                winner_label,
+                trainer_tail = _tail_text(sample_run.spec.out_dir / "trainer.log", limit=20)
 
-                                s1,
+                sample = {
 
-                                avg1,
+                    "worker_id": int(sample_run.spec.worker_id),
 
-                                s2,
+                    "port": int(sample_run.spec.port),
 
-                                k1,
+                    "age_sec": float(now - float(sample_run.started_at)),
 
-                                k2,
+                    "godot_tail": _tail_text(
+                        sample_run.lease.log_path if sample_run.lease is not None else sample_run.spec.out_dir / "godot.log",
+                        limit=8,
+                    ),
 
-                                w1,
+                    "trainer_tail": "\n".join(trainer_tail.splitlines()[-8:]) if trainer_tail else "",
 
-                                w2,
+                }
 
-                            )
+                if live_round_logs:
 
-                        )
+                    wid = int(sample_run.spec.worker_id)
 
-                        sys.stdout.flush()
+                    log_file = sample_run.spec.out_dir / "trainer.log"
 
+                    last_pos = int(trainer_log_pos_by_worker.get(wid, 0))
 
+                    new_pos, new_lines = _read_new_lines(log_file, last_pos)
 
-                if run.godot_proc.poll() is None:
+                    trainer_log_pos_by_worker[wid] = int(new_pos)
 
-                    graceful_wait = max(0.0, float(cfg.get("godot_shutdown_wait_sec", 0.0)))
 
-                    if graceful_wait > 0.0:
 
-                        deadline = time.time() + graceful_wait
+                    for line in new_lines:
 
-                        while time.time() < deadline and run.godot_proc.poll() is None:
+                        if line.startswith("MD9:"):
 
-                            time.sleep(0.05)
+                            sys.stdout.write("\n" + line[4:].lstrip() + "\n")
 
-                    if run.godot_proc.poll() is None:
+                            sys.stdout.flush()
 
-                        try:
+                            continue
 
-                            run.godot_proc.terminate()
+                        if line.startswith("[ROUND]") or line.startswith("[MATCH]"):
 
-                        except OSError:
+                            prev = last_live_by_worker.get(wid, "")
 
-                            pass
+                            if line != prev:
 
+                                ind = int(base_individual + (wid + 1))
 
+                                sys.stdout.write(
 
-                try:
+                                    f"\n[G{int(generation_global)} N{ind} wid {wid}] {line}\n"
 
-                    exit_code = int(run.trainer_proc.poll() or 0)
+                                )
 
-                except Exception:
+                                sys.stdout.flush()
 
-                    exit_code = 0
+                                last_live_by_worker[wid] = line
 
-                max_attempts = int(cfg.get("max_attempts_per_worker", 1))
+            status.update(
 
-                should_retry = exit_code != 0 and (run.spec.attempt + 1) < max_attempts
+                {
 
-                if should_retry:
+                    "round": int(round_index),
 
-                    queue.append(
+                    "workers": int(workers),
 
-                        WorkerSpec(
+                    "completed": int(completed),
 
-                            worker_id=run.spec.worker_id,
+                    "running": int(len(running) + len(remote)),
+                    "remote": int(len(remote)),
+                    "agents": [agent.name for agent in work_queue.agents] if work_queue is not None else [],
 
-                            port=run.spec.port + (workers + 10),
+                    "queued": int(len(queue)),
 
-                            seed_path=run.spec.seed_path,
+                    "best_so_far": float(best_so_far) if best_so_far is not None else None,
 
-                            out_dir=run.spec.out_dir,
+                    "elapsed_sec": float(elapsed),
 
-                            attempt=run.spec.attempt + 1,
+                    "eta_sec": float(eta),
 
-                        )
+                    "concurrency": int(governor.current if governor is not None and local_slots > 0 else concurrency),
 
-                    )
+                    "updated_at": int(time.time()),
 
-                else:
+                    "sample": sample,
 
-                    completed += 1
+                    "progress": {str(wid): entry for wid, entry in sorted(live_progress.items())},
 
+                    "governor": governor.to_dict() if governor is not None else {},
+                    "early_stop": dict(early_stop, **convergence.to_dict()) if convergence is not None else {},
 
+                }
 
-                if exit_code != 0:
+            )
 
-                    failure = _summarize_worker_failure(run.spec.out_dir)
+            write_json(status_path, status)
 
-                    if failure:
+            last_status_write = now
 
-                        append_log(
 
-                            log_path,
 
-                            f"worker {run.spec.worker_id} trainer exit={exit_code} attempt={run.spec.attempt} port={run.spec.port}\n{failure}",
 
-                        )
 
+    async def run_worker(spec: WorkerSpec) -> None:
+        run = await launch(spec)
+        if run is None:
+            return
+        running.append(run)
+        exit_code = await run.trainer_proc.wait()
+        if result_server is not None:
+            await result_server.drained(_report_id(spec), 2.0)
+        running.remove(run)
+        live_progress.pop(spec.worker_id, None)
+        step_rates.pop(spec.worker_id, None)
+        await finish(run, int(exit_code or 0))
 
 
-                try:
 
-                    run.godot_log.close()
+    async def run_remote(spec: WorkerSpec, agent: RemoteAgent) -> None:
+        job = build_remote_job(project_root, cfg, spec, generation_global, base_individual)
+        remote.append(spec)
+        try:
+            reply = await work_queue.run(agent, job)
+        except AgentLost as exc:
+            # Não conta como tentativa do worker: quem falhou foi o agente.
+            append_log(log_path, f"worker {spec.worker_id} voltou para a fila (attempt {spec.attempt}) | {exc}")
+            queue.insert(0, spec)
+            return
+        finally:
+            remote.remove(spec)
+        settle(spec, store_remote_result(cfg, spec, reply, agent.name))
 
-                except Exception:
 
-                    pass
 
+    async def stop_running() -> None:
+        procs = []
+        for run in running:
+            run.stopped = True
+            procs.append(run.trainer_proc)
+            if run.lease is None:
+                procs.append(run.godot_proc)
+            procs.extend(proc for proc, _log in run.extra_godot)
+        for proc in procs:
+            if _proc_running(proc):
                 try:
-
-                    run.trainer_log.close()
-
-                except Exception:
-
+                    proc.terminate()
+                except OSError:
                     pass
-
-
-
-            running = still_running
-
-            now = time.time()
-
-            elapsed = now - started
-
-            rate = completed / elapsed if elapsed > 0 else 0.0
-
-            remaining = max(0, workers - completed)
-
-            eta = remaining / rate if rate > 0 else 0.0
-
-            if int(now) % 1 == 0:
-
-                if best_so_far is None:
-
-                    best_text = "N/A"
-
+        waits = [proc.wait() for proc in procs if isinstance(proc, asyncio.subprocess.Process)]
+        if waits:
+            await asyncio.wait([asyncio.ensure_future(w) for w in waits], timeout=5.0)
+
+
+
+    async def close_early(tasks: Set[asyncio.Task], local_tasks: Set[asyncio.Task]) -> None:
+        # Rodada convergiu: a fila é descartada, jobs dos agentes são abandonados e os trainers locais param
+        # (depois de early_stop_grace_sec); cada worker local ainda passa pelo finish para devolver Godot/slot.
+        early_stop["skipped"] = len(queue)
+        early_stop["stopped"] = len(tasks)
+        queue.clear()
+        append_log(
+            log_path,
+            f"IslandsRound {round_index} early stop: {early_stop['reason']} | concluídos={completed} "
+            f"em execução={len(tasks)} pulados={early_stop['skipped']}",
+        )
+        for task in tasks - local_tasks:
+            task.cancel()
+        pending = set(tasks)
+        grace = max(0.0, float(cfg.get("early_stop_grace_sec", 0.0)))
+        if grace > 0.0 and pending:
+            _done, pending = await asyncio.wait(pending, timeout=grace)
+        while pending:
+            # Um worker ainda subindo o Godot só entra em `running` depois: repete até todos saírem.
+            await stop_running()
+            _done, pending = await asyncio.wait(pending, timeout=1.0)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def on_report(report_id: str, message: Dict) -> None:
+        kind = message.get("type")
+        if kind == "result" and isinstance(message.get("payload"), dict):
+            streamed[report_id] = message["payload"]
+        elif kind == "progress" and isinstance(message.get("stats"), dict):
+            wid = int(report_id.partition(":")[0] or 0)
+            live_progress[wid] = dict(message["stats"], generation=int(message.get("generation", 0)))
+        elif kind == "rate":
+            step_rates[int(report_id.partition(":")[0] or 0)] = float(message.get("steps_per_sec", 0.0))
+
+
+
+    def worker_pids() -> List[int]:
+        pids: List[int] = []
+        for run in running:
+            pids.append(run.trainer_proc.pid)
+            pids.extend(proc.pid for proc in (run.lease.procs if run.lease is not None else [run.godot_proc]))
+            pids.extend(proc.pid for proc, _log in run.extra_godot)
+        return pids
+
+
+
+    async def supervise() -> None:
+        nonlocal work_queue, result_server, local_slots
+        tasks: Set[asyncio.Task] = set()
+        local_tasks: Set[asyncio.Task] = set()
+        if not dry_run and local_slots > 0 and _trainer_reports_results(cfg):
+            result_server = ResultServer(on_report)
+            await result_server.start()
+        if work_queue_port > 0:
+            work_queue = WorkQueue(
+                str(cfg.get("work_queue_host", "0.0.0.0")),
+                work_queue_port,
+                float(cfg.get("work_queue_heartbeat_sec", 30.0)),
+                on_event=lambda text: append_log(log_path, f"work queue: {text}"),
+            )
+            await work_queue.start()
+        try:
+            while queue or tasks:
+                if early_stop["reason"]:
+                    await close_early(tasks, local_tasks)
+                    tasks = set()
+                    refresh_status()
+                    break
+                if governor is not None and local_slots > 0 and not dry_run:
+                    # Vagas locais seguem o governor; reduzir não derruba ninguém, só deixa de repor.
+                    local_slots = governor.update(
+                        worker_pids(),
+                        len(running),
+                        bool(queue) and len(local_tasks) >= local_slots,
+                        [step_rates[r.spec.worker_id] for r in running if r.spec.worker_id in step_rates],
+                    )
+                # Vaga liberada (saída do trainer, Godot que morreu cedo, retry) já é preenchida na mesma volta.
+                for _ in range(min(spawn_batch, local_slots - len(local_tasks), len(queue))):
+                    task = asyncio.ensure_future(run_worker(queue.pop(0)))
+                    tasks.add(task)
+                    local_tasks.add(task)
+                while queue and work_queue is not None:
+                    agent = work_queue.reserve()
+                    if agent is None:
+                        break
+                    tasks.add(asyncio.ensure_future(run_remote(queue.pop(0), agent)))
+                if dry_run:
+                    await asyncio.gather(*tasks)
+                    refresh_status()
+                    return
+                if tasks:
+                    done, tasks = await asyncio.wait(tasks, timeout=status_interval, return_when=asyncio.FIRST_COMPLETED)
+                    local_tasks -= done
+                    for task in done:
+                        task.result()
                 else:
+                    # Só agentes e nenhum conectado ainda: espera alguém aparecer.
+                    await asyncio.sleep(status_interval)
+                refresh_status()
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await stop_running()
+            raise
+        finally:
+            if work_queue is not None:
+                await work_queue.close()
+            if result_server is not None:
+                await result_server.close()
 
-                    tag = "SWEEP" if best_sweep else ""
-
-                    best_text = f"{tag}{best_so_far:.2f}" if tag else f"{best_so_far:.2f}"
-
-                sys.stdout.write(
-
-                    f"\rIslandsRound {round_index} | done {completed}/{workers} | running {len(running)} | queued {len(queue)} | "
-
-                    f"best {best_text} | elapsed {elapsed:0.0f}s"
-
-                )
-
-                sys.stdout.flush()
-
-
-
-            if now - last_status_write >= 0.5:
-
-                current = read_json(status_path)
-
-                sample = {}
-
-                if running:
-
-                    running_wids = {int(r.spec.worker_id) for r in running}
-
-                    if live_sample_wid is None or live_sample_wid not in running_wids:
-
-                        live_sample_wid = min(running_wids)
-
-
-
-                    sample_run = next((r for r in running if int(r.spec.worker_id) == int(live_sample_wid)), running[0])
-
-                    trainer_tail = _tail_text(sample_run.spec.out_dir / "trainer.log", limit=20)
-
-                    sample = {
-
-                        "worker_id": int(sample_run.spec.worker_id),
-
-                        "port": int(sample_run.spec.port),
-
-                        "age_sec": float(now - float(sample_run.started_at)),
-
-                        "godot_tail": _tail_text(sample_run.spec.out_dir / "godot.log", limit=8),
-
-                        "trainer_tail": "\n".join(trainer_tail.splitlines()[-8:]) if trainer_tail else "",
-
-                    }
-
-                    if live_round_logs:
-
-                        wid = int(sample_run.spec.worker_id)
-
-                        log_file = sample_run.spec.out_dir / "trainer.log"
-
-                        last_pos = int(trainer_log_pos_by_worker.get(wid, 0))
-
-                        new_pos, new_lines = _read_new_lines(log_file, last_pos)
-
-                        trainer_log_pos_by_worker[wid] = int(new_pos)
-
-
-
-                        for line in new_lines:
-
-                            if line.startswith("MD9:"):
-
-                                sys.stdout.write("\n" + line[4:].lstrip() + "\n")
-
-                                sys.stdout.flush()
-
-                                continue
-
-                            if line.startswith("[ROUND]") or line.startswith("[MATCH]"):
-
-                                prev = last_live_by_worker.get(wid, "")
-
-                                if line != prev:
-
-                                    ind = int(base_individual + (wid + 1))
-
-                                    sys.stdout.write(
-
-                                        f"\n[G{int(generation_global)} N{ind} wid {wid}] {line}\n"
-
-                                    )
 
-                                    sys.stdout.flush()
 
-                                    last_live_by_worker[wid] = line
-
-                current.update(
-
-                    {
-
-                        "round": int(round_index),
-
-                        "workers": int(workers),
-
-                        "completed": int(completed),
-
-                        "running": int(len(running)),
-
-                        "queued": int(len(queue)),
-
-                        "best_so_far": float(best_so_far) if best_so_far is not None else None,
-
-                        "elapsed_sec": float(elapsed),
-
-                        "eta_sec": float(eta),
-
-                        "concurrency": int(concurrency),
-
-                        "updated_at": int(time.time()),
-
-                        "sample": sample,
-
-                    }
-
-                )
-
-                write_json(status_path, current)
-
-                last_status_write = now
+    try:
 
+        asyncio.run(supervise())
 
 
     except KeyboardInterrupt:
@@ -2763,7 +3757,7 @@ def run_round(
 
             if bool(cfg.get("promote_on_interrupt", True)):
 
-                partial = collect_results(round_dir, workers)
+                partial = leaderboard.ranked()
 
                 if partial:
 
@@ -2795,7 +3789,7 @@ def run_round(
 
                     write_json(state_dir / "last_summary_interrupted.json", summary)
 
-                    promote_best_genome(project_root, cfg, summary)
+                    promote_best_genome(project_root, cfg, summary, catalog, store)
 
         except Exception:
 
@@ -2835,7 +3829,7 @@ def run_round(
 
                 pass
 
-            if run.trainer_proc.poll() is None:
+            if _proc_running(run.trainer_proc):
 
                 try:
 
@@ -2845,7 +3839,7 @@ def run_round(
 
                     pass
 
-            if run.godot_proc.poll() is None:
+            if run.lease is None and _proc_running(run.godot_proc):
 
                 try:
 
@@ -2855,9 +3849,12 @@ def run_round(
 
                     pass
 
+            stop_extra_godot(run)
+
             try:
 
-                run.godot_log.close()
+                if run.godot_log is not None:
+                    run.godot_log.close()
 
             except Exception:
 
@@ -2883,51 +3880,8 @@ def run_round(
 
 
 
-    results = collect_results(round_dir, workers)
-
-    if bool(cfg.get("prefer_winner_selection", True)):
-
-        winners = [r for r in results if int(r[2].get("best_winner", 0)) == 1]
-
-        losers = [r for r in results if int(r[2].get("best_winner", 0)) != 1]
-
-        winners.sort(key=lambda x: x[0], reverse=True)
-
-        losers.sort(key=lambda x: x[0], reverse=True)
-
-        results = winners + losers
-
-
-
-    individuals_dir = round_dir / "individuals"
-
-    ensure_dir(individuals_dir)
-
-    for score, genome_path, payload in results:
-
-        try:
-
-            wid = int(payload.get("worker_id", 0))
-
-        except Exception:
-
-            wid = 0
-
-        global_n = int(base_individual + (wid + 1))
-
-        payload["islands_round"] = int(round_index)
-
-        payload["generation_global"] = int(generation_global)
-
-        payload["individual"] = int(global_n)
-
-        record = dict(payload)
-
-        record.update({"score": float(score), "generation": int(generation_global), "individual": int(global_n)})
-
-        out_name = f"G{generation_global:04d}_N{global_n:06d}_R{round_index:04d}_wid{wid:03d}_score_{score:.6f}.json"
-
-        write_json(individuals_dir / out_name, record)
+    results = leaderboard.ranked()
+    merge_worker_fitness_caches(project_root, cfg, round_dir, workers)
 
     topk = max(1, int(cfg["topk"]))
 
@@ -2936,6 +3890,7 @@ def run_round(
     ensure_dir(top_dir)
 
     next_seeds: List[str] = []
+    seed_rows: List[Tuple[str, int, int, float]] = []
 
     for idx, (score, genome_path, payload) in enumerate(results[:topk]):
 
@@ -2949,13 +3904,16 @@ def run_round(
 
         global_n = int(base_individual + (wid + 1))
 
-        target = top_dir / f"seed_{idx+1:02d}_G{generation_global:04d}_N{global_n:06d}_score_{score:.6f}.json"
+        target = top_dir / f"seed_{idx+1:02d}_G{generation_global:04d}_N{global_n:06d}_score_{score:.6f}{genome_path.suffix}"
 
         if genome_path.exists():
-
-            shutil.copyfile(genome_path, target)
+            if store is not None:
+                store.link(genome_path, target)
+            else:
+                shutil.copyfile(genome_path, target)
 
             next_seeds.append(str(target))
+            seed_rows.append((str(target), int(generation_global), global_n, float(score)))
 
 
 
@@ -3030,12 +3988,27 @@ def run_round(
         "best_payload": best_payload,
 
     }
+    if early_stop["reason"]:
+        summary["early_stop"] = dict(early_stop, completed=int(completed))
 
     write_json(round_dir / "summary.json", summary)
 
     write_json(state_dir / "last_summary.json", summary)
-
-    promote_best_genome(project_root, cfg, summary)
+    if catalog is not None:
+        catalog.finish_round(
+            round_index,
+            float(summary["best"]),
+            int(generation_global),
+            int(best_payload.get("individual", 0)),
+            seed_rows,
+            str(round_dir / "summary.json"),
+        )
+    promote_best_genome(project_root, cfg, summary, catalog, store)
+    if store is not None:
+        # Blobs sem nenhum link (liga podada, rodada refeita) saem aqui.
+        removed, freed = store.gc()
+        if removed:
+            append_log(log_path, f"genome_store: gc removeu {removed} blobs ({freed / (1024 * 1024):.1f} MB)")
 
 
 
@@ -3162,57 +4135,106 @@ def run_islands(project_root: Path, cfg: Dict, dry_run: bool) -> int:
 
         seeds = [initial_seed] if initial_seed else []
 
-    while rounds <= 0 or round_index <= rounds:
+    governor = None if dry_run else build_governor(cfg, on_event=lambda text: append_log(state_dir / "orchestrator.log", text))
 
-        if not seeds:
+    pinning = None if dry_run else build_cpu_pinning(cfg, on_event=lambda text: append_log(state_dir / "orchestrator.log", text))
 
-            print("Sem seed inicial. Configure initial_seed.")
+    if not dry_run:
 
-            return 3
+        raise_own_priority(
+            int(cfg.get("orchestrator_nice", 0)),
+            pinning.reserved_cpus if pinning is not None else [],
+            on_event=lambda text: append_log(state_dir / "orchestrator.log", text),
+        )
 
-        print(
+    store = None if dry_run else open_genome_store(project_root, cfg, on_event=lambda text: append_log(state_dir / "orchestrator.log", text))
+    catalog = None if dry_run else open_run_catalog(project_root, cfg, on_event=lambda text: append_log(state_dir / "orchestrator.log", text))
+    pool: Optional[GodotPool] = None
+
+    if bool(cfg.get("godot_pool", False)) and not dry_run:
+
+        # Pool de Godot quente reaproveitado entre workers e rodadas (portas fixas a partir de base_port).
+        # Com o governor o pool tem o tamanho do teto; slots só sobem quando o governor libera a vaga.
+        pool = GodotPool(
+            governor.maximum if governor is not None else min(int(cfg["concurrency"]), int(cfg["workers"])),
+            int(cfg["base_port"]),
+            _arenas_per_worker(cfg),
+            state_dir / "pool",
+            spawn_delay=float(cfg.get("spawn_delay_sec", 0.0)),
+            early_grace=float(cfg.get("early_godot_exit_grace_sec", 0.0)),
+            shutdown_wait=float(cfg.get("godot_shutdown_wait_sec", 0.0)),
+            on_event=lambda text: append_log(state_dir / "orchestrator.log", text),
+            preexec_fn=spawn_kwargs(pinning).get("preexec_fn"),
+        )
 
-            f"=== IslandsRound {round_index} | G{generation_global} | seeds {len(seeds)} | workers {cfg['workers']} | topk {cfg['topk']} ==="
+    try:
 
-        )
+        while rounds <= 0 or round_index <= rounds:
 
-        seeds = run_round(
+            if not seeds:
 
-            project_root,
+                print("Sem seed inicial. Configure initial_seed.")
 
-            cfg,
+                return 3
 
-            round_index,
+            print(
 
-            generation_global,
+                f"=== IslandsRound {round_index} | G{generation_global} | seeds {len(seeds)} | workers {cfg['workers']} | topk {cfg['topk']} ==="
 
-            base_individual,
+            )
 
-            seeds,
+            seeds = run_round(
 
-            dry_run=dry_run,
+                project_root,
 
-        )
+                cfg,
 
-        if dry_run:
+                round_index,
+
+                generation_global,
 
-            break
+                base_individual,
 
-        if not seeds:
+                seeds,
 
-            print("IslandsRound terminou sem seeds geradas (nenhum result.json encontrado).")
+                dry_run=dry_run,
+                pool=pool,
 
-            return 4
+                governor=governor,
 
+                pinning=pinning,
+                catalog=catalog,
+                store=store,
 
+            )
 
-        base_individual += int(cfg["workers"])
+            if dry_run:
 
-        generation_global += 1
+                break
 
-        _save_progress(progress_path, generation_global, base_individual)
+            if not seeds:
 
-        round_index += 1
+                print("IslandsRound terminou sem seeds geradas (nenhum result.json encontrado).")
+
+                return 4
+
+
+
+            base_individual += int(cfg["workers"])
+
+            generation_global += 1
+
+            _save_progress(progress_path, generation_global, base_individual)
+
+            round_index += 1
+
+    finally:
+
+        if pool is not None:
+
+            pool.shutdown()
+        if catalog is not None:
+            catalog.close()
 
     return 0
 
@@ -3312,11 +4334,16 @@ def main() -> int:
 
     parser = argparse.ArgumentParser(description="Orquestrador de ilhas headless para Project PVP")
 
-    parser.add_argument("mode", choices=("run", "menu"))
+    parser.add_argument("mode", choices=("run", "menu", "agent"))
 
     parser.add_argument("--config", default="BOTS/IA/config/islands.json")
     parser.add_argument("--dry-run", action="store_true")
     parser.add_argument("--watch", action="store_true", help="Enable GUI and watch mode (workers=1)")
+    parser.add_argument("--coordinator", default="", help="agent: host:porta da fila do coordenador")
+    parser.add_argument("--slots", type=int, default=0, help="agent: jobs em paralelo (0 = concurrency da config)")
+    parser.add_argument("--agent-name", default="")
+    parser.add_argument("--base-port", type=int, default=0, help="agent: porta base local dos Godots (0 = config)")
+    parser.add_argument("--state-dir", default="", help="agent: pasta de trabalho local (vazio = state_dir da config)")
 
     args = parser.parse_args()
 
@@ -3338,6 +4365,13 @@ def main() -> int:
 
     try:
 
+        if args.mode == "agent":
+            if args.base_port > 0:
+                cfg["base_port"] = int(args.base_port)
+            if args.state_dir:
+                cfg["state_dir"] = str(args.state_dir)
+            return run_agent(project_root, cfg, args.coordinator, args.slots, args.agent_name)
+
         return run_islands(project_root, cfg, dry_run=bool(args.dry_run))
 
     except FileNotFoundError as exc:
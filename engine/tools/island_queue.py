@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import itertools
+import socket
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from bridge_client import LINE_LIMIT, decode_line, encode_message
+
+QUEUE_PROTOCOL = 1
+PING_INTERVAL = 5.0
+
+Message = Dict[str, Any]
+JobRunner = Callable[[Message, int], Awaitable[Message]]
+
+
+class AgentLost(ConnectionError):
+    pass
+
+
+def pack_files(paths: Dict[str, Path], tail_bytes: int = 0) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    for name, path in paths.items():
+        try:
+            data = Path(path).read_bytes()
+        except OSError:
+            continue
+        if tail_bytes > 0:
+            data = data[-tail_bytes:]
+        out[name] = base64.b64encode(data).decode("ascii")
+    return out
+
+
+def unpack_files(files: Any, directory: Path) -> Dict[str, Path]:
+    out: Dict[str, Path] = {}
+    if not isinstance(files, dict):
+        return out
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, data in files.items():
+        # Só o nome do arquivo: o outro lado não escolhe onde gravar.
+        safe = Path(str(name)).name
+        if not safe or not isinstance(data, str):
+            continue
+        path = directory / safe
+        path.write_bytes(base64.b64decode(data.encode("ascii")))
+        out[safe] = path
+    return out
+
+
+def parse_address(value: str, default_port: int = 0) -> Tuple[str, int]:
+    host, sep, port = str(value).strip().rpartition(":")
+    if not sep:
+        return str(value).strip() or "127.0.0.1", int(default_port)
+    return host or "127.0.0.1", int(port)
+
+
+class RemoteAgent:
+    def __init__(self, name: str, slots: int, writer: asyncio.StreamWriter) -> None:
+        self.name = name
+        self.slots = max(1, int(slots))
+        self.writer = writer
+        self.busy: Dict[int, asyncio.Future] = {}
+        self.reserved = 0
+        self.closed = False
+        self.jobs_done = 0
+
+    @property
+    def free(self) -> int:
+        if self.closed:
+            return 0
+        return self.slots - len(self.busy) - self.reserved
+
+
+class WorkQueue:
+    # Lado coordenador: agentes conectam, anunciam quantos slots têm e recebem um job por slot.
+    # Se a conexão cai ou o agente fica mudo além do heartbeat, os jobs dele voltam para a fila (AgentLost).
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        heartbeat_timeout: float = 30.0,
+        on_event: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.host = str(host)
+        self.port = int(port)
+        self.heartbeat_timeout = max(PING_INTERVAL * 2, float(heartbeat_timeout))
+        self.on_event = on_event
+        self.agents: List[RemoteAgent] = []
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._handlers: List[asyncio.Task] = []
+        self._job_ids = itertools.count(1)
+
+    def _event(self, text: str) -> None:
+        if self.on_event is not None:
+            self.on_event(text)
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._accept, self.host, self.port, limit=LINE_LIMIT, reuse_address=True)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in self._handlers:
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        self._handlers = []
+
+    @property
+    def capacity(self) -> int:
+        return sum(agent.slots for agent in self.agents if not agent.closed)
+
+    def reserve(self) -> Optional[RemoteAgent]:
+        free = [agent for agent in self.agents if agent.free > 0]
+        if not free:
+            return None
+        agent = max(free, key=lambda a: a.free)
+        agent.reserved += 1
+        return agent
+
+    async def run(self, agent: RemoteAgent, job: Message) -> Message:
+        job_id = next(self._job_ids)
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        agent.reserved = max(0, agent.reserved - 1)
+        if agent.closed:
+            raise AgentLost(f"agente {agent.name} desconectado")
+        agent.busy[job_id] = future
+        try:
+            agent.writer.write(encode_message(dict(job, type="job", job_id=job_id)))
+            await agent.writer.drain()
+            return await future
+        except AgentLost:
+            raise
+        except (ConnectionError, OSError) as exc:
+            raise AgentLost(f"agente {agent.name}: {exc}") from exc
+        finally:
+            agent.busy.pop(job_id, None)
+
+    async def _accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        if task is not None:
+            self._handlers.append(task)
+        agent: Optional[RemoteAgent] = None
+        reason = "conexão encerrada"
+        try:
+            hello, _ = decode_line(await asyncio.wait_for(reader.readline(), self.heartbeat_timeout))
+            if not hello or hello.get("type") != "hello" or int(hello.get("protocol", 0)) != QUEUE_PROTOCOL:
+                return
+            peer = writer.get_extra_info("peername")
+            name = str(hello.get("agent") or (f"{peer[0]}:{peer[1]}" if peer else "?"))
+            agent = RemoteAgent(name, int(hello.get("slots", 1)), writer)
+            self.agents.append(agent)
+            self._event(f"agente {agent.name} conectou ({agent.slots} slots)")
+            while True:
+                raw = await asyncio.wait_for(reader.readline(), self.heartbeat_timeout)
+                if not raw:
+                    break
+                message, _ = decode_line(raw)
+                if not message or message.get("type") != "result":
+                    continue
+                future = agent.busy.get(int(message.get("job_id", 0)))
+                if future is None or future.done():
+                    continue
+                if message.get("rejected"):
+                    future.set_exception(AgentLost(f"agente {agent.name} recusou o job (sem slot livre)"))
+                else:
+                    agent.jobs_done += 1
+                    future.set_result(message)
+        except asyncio.TimeoutError:
+            reason = f"sem heartbeat por {self.heartbeat_timeout:.0f}s"
+        except asyncio.CancelledError:
+            # close(): termina sem propagar, o callback do start_server reclama de task cancelada.
+            reason = "fila encerrada"
+        except (ConnectionError, OSError, ValueError) as exc:
+            reason = str(exc)
+        finally:
+            if agent is not None:
+                agent.closed = True
+                if agent in self.agents:
+                    self.agents.remove(agent)
+                for future in agent.busy.values():
+                    if not future.done():
+                        future.set_exception(AgentLost(f"agente {agent.name} perdido: {reason}"))
+                self._event(f"agente {agent.name} saiu ({reason}; {len(agent.busy)} jobs devolvidos)")
+            writer.close()
+            if task is not None and task in self._handlers:
+                self._handlers.remove(task)
+
+
+async def serve_agent(
+    host: str,
+    port: int,
+    slots: int,
+    run_job: JobRunner,
+    name: str = "",
+    connect_wait: float = 1.0,
+    on_event: Optional[Callable[[str], None]] = None,
+) -> None:
+    # Lado agente: reconecta para sempre (o coordenador reabre a fila a cada rodada) e roda até `slots` jobs em paralelo.
+    slots = max(1, int(slots))
+    name = name or f"{socket.gethostname()}:{port}"
+
+    def event(text: str) -> None:
+        if on_event is not None:
+            on_event(text)
+
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+        except OSError:
+            await asyncio.sleep(connect_wait)
+            continue
+        event(f"conectado a {host}:{port} ({slots} slots)")
+        writer.write(encode_message({"type": "hello", "protocol": QUEUE_PROTOCOL, "agent": name, "slots": slots}))
+        # Lanes (portas) em dobro: a recém-liberada vai para o fim e a porta descansa um job antes de voltar.
+        free_lanes = list(range(slots * 2))
+        jobs: Dict[int, asyncio.Task] = {}
+
+        async def ping() -> None:
+            while True:
+                await asyncio.sleep(PING_INTERVAL)
+                writer.write(encode_message({"type": "ping"}))
+
+        async def work(job: Message, lane: int) -> None:
+            job_id = int(job.get("job_id", 0))
+            try:
+                try:
+                    reply = await run_job(job, lane)
+                except Exception as exc:
+                    reply = {"exit_code": 1, "error": f"agente {name}: {exc}"}
+                writer.write(encode_message(dict(reply, type="result", job_id=job_id)))
+            finally:
+                free_lanes.append(lane)
+                jobs.pop(job_id, None)
+
+        pinger = asyncio.ensure_future(ping())
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                message, _ = decode_line(raw)
+                if not message or message.get("type") != "job":
+                    continue
+                job_id = int(message.get("job_id", 0))
+                if len(jobs) >= slots:
+                    writer.write(encode_message({"type": "result", "job_id": job_id, "rejected": True}))
+                    continue
+                jobs[job_id] = asyncio.ensure_future(work(message, free_lanes.pop(0)))
+        except (ConnectionError, OSError, ValueError) as exc:
+            event(f"conexão perdida: {exc}")
+        finally:
+            pinger.cancel()
+            # Sem coordenador não há para quem entregar o resultado: ele já devolveu esses jobs para a fila.
+            for task in list(jobs.values()):
+                task.cancel()
+            await asyncio.gather(pinger, *jobs.values(), return_exceptions=True)
+            writer.close()
+        event(f"desconectado de {host}:{port}; reconectando")
+        await asyncio.sleep(connect_wait)
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+OBS_VERSION = 2
+POS_SCALE = 1000.0
+VEL_SCALE = 1000.0
+# Nomes de feature que no vetor do Godot aparecem com outro nome.
+VECTOR_ALIASES = {"delta_position.norm": "distance"}
+
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    section: str
+    key: str
+    kind: str
+    scale: float = 1.0
+    default: Any = None
+
+
+def feature_schema(obs_version: int = OBS_VERSION) -> Tuple[FeatureSpec, ...]:
+    # O layout de features é o mesmo desde a v1 (a v2 só acrescentou sensores/flechas que ainda não usamos).
+    actor_fields: List[FeatureSpec] = []
+    for section in ("self", "opponent"):
+        actor_fields.extend(
+            [
+                FeatureSpec(section, "position", "vec2", POS_SCALE),
+                FeatureSpec(section, "velocity", "vec2", VEL_SCALE),
+                FeatureSpec(section, "facing", "float", 1.0, 1),
+                FeatureSpec(section, "on_floor", "bool"),
+                FeatureSpec(section, "on_wall", "bool"),
+                FeatureSpec(section, "arrows", "float", 1.0, 0),
+                FeatureSpec(section, "is_dead", "bool"),
+            ]
+        )
+    return (
+        FeatureSpec("", "delta_position", "vec2_norm", POS_SCALE),
+        *actor_fields,
+        FeatureSpec("match", "round_active", "bool"),
+        FeatureSpec("match", "match_over", "bool"),
+        FeatureSpec("match", "wins", "win", 1.0, 1),
+        FeatureSpec("match", "wins", "win", 1.0, 2),
+    )
+
+
+_KIND_WIDTH = {"vec2": 2, "vec2_norm": 3, "float": 1, "bool": 1, "win": 1}
+
+
+def _vec2(value: Any) -> Tuple[float, float]:
+    if isinstance(value, dict):
+        if "x" in value and "y" in value:
+            return float(value["x"]), float(value["y"])
+        return 0.0, 0.0
+    if isinstance(value, (list, tuple)) and len(value) >= 2:
+        return float(value[0]), float(value[1])
+    return 0.0, 0.0
+
+
+def _compile_plan(sections: Dict[str, List[Tuple[int, str, str, float, Any]]], dim: int) -> Callable[[Any], List[float]]:
+    # Gera uma função especializada para o schema: sem laço sobre specs nem despacho por tipo a cada frame.
+    lines = ["def _fill(obs):", "    if not isinstance(obs, dict):", "        obs = {}"]
+    exprs: List[str] = ["0.0"] * dim
+    for section_idx, (section, fields) in enumerate(sections.items()):
+        src = "obs"
+        if section:
+            src = f"s{section_idx}"
+            lines.append(f"    {src} = obs.get({section!r})")
+            lines.append(f"    if not isinstance({src}, dict):")
+            lines.append(f"        {src} = {{}}")
+        for idx, key, kind, scale, default in fields:
+            if kind == "bool":
+                exprs[idx] = f"(1.0 if {src}.get({key!r}, False) else 0.0)"
+            elif kind == "float":
+                exprs[idx] = f"float({src}.get({key!r}, {default!r})) / {scale!r}"
+            elif kind == "win":
+                var = f"w{idx}"
+                lines.append(f"    {var} = {src}.get({key!r})")
+                lines.append(f"    if isinstance({var}, dict):")
+                lines.append(f"        {var} = float({var}[{default!r}] if {default!r} in {var} else {var}.get({str(default)!r}, 0.0))")
+                lines.append("    else:")
+                lines.append(f"        {var} = 0.0")
+                exprs[idx] = f"{var} / {scale!r}"
+            else:
+                lines.append(f"    x{idx}, y{idx} = _vec2({src}.get({key!r}))")
+                exprs[idx] = f"x{idx} / {scale!r}"
+                exprs[idx + 1] = f"y{idx} / {scale!r}"
+                if kind == "vec2_norm":
+                    exprs[idx + 2] = f"_hypot(x{idx}, y{idx}) / {scale!r}"
+    lines.append("    return [" + ", ".join(exprs) + "]")
+    namespace: Dict[str, Any] = {"_vec2": _vec2, "_hypot": math.hypot}
+    exec(compile("\n".join(lines), "<obs_features>", "exec"), namespace)
+    return namespace["_fill"]
+
+
+class FeatureExtractor:
+    def __init__(self, obs_version: int = OBS_VERSION) -> None:
+        self.obs_version = int(obs_version)
+        self.specs = feature_schema(self.obs_version)
+        names: List[str] = []
+        scales: List[float] = []
+        sections: Dict[str, List[Tuple[int, str, str, float, Any]]] = {}
+        offset = 0
+        for spec in self.specs:
+            width = _KIND_WIDTH[spec.kind]
+            if spec.kind == "win":
+                names.append(f"{spec.section}.{spec.key}.{spec.default}")
+            elif width == 1:
+                names.append(f"{spec.section}.{spec.key}" if spec.section else spec.key)
+            else:
+                base = f"{spec.section}.{spec.key}" if spec.section else spec.key
+                names.extend([f"{base}.x", f"{base}.y", f"{base}.norm"][:width])
+            scales.extend([float(spec.scale)] * width)
+            sections.setdefault(spec.section, []).append((offset, spec.key, spec.kind, float(spec.scale), spec.default))
+            offset += width
+        self.names = tuple(names)
+        self.scales = tuple(scales)
+        self.dim = offset
+        self._fill = _compile_plan(sections, self.dim)
+
+    def new_buffer(self, rows: Optional[int] = None) -> np.ndarray:
+        if rows is None:
+            return np.zeros((self.dim,), dtype=np.float32)
+        return np.zeros((int(rows), self.dim), dtype=np.float32)
+
+    def extract_into(self, obs: Dict[str, Any], out: np.ndarray) -> np.ndarray:
+        if isinstance(obs, VectorObs) and obs.layout.extractor.obs_version == self.obs_version:
+            return obs.layout.features_into(obs.values, out)
+        out[:] = self._fill(obs)
+        return out
+
+    def extract(self, obs: Dict[str, Any]) -> np.ndarray:
+        return self.extract_into(obs, self.new_buffer())
+
+    def extract_batch(self, observations: Sequence[Dict[str, Any]], out: Optional[np.ndarray] = None) -> np.ndarray:
+        count = len(observations)
+        if out is None:
+            out = self.new_buffer(count)
+        elif out.shape[0] < count or out.shape[1] != self.dim:
+            raise ValueError(f"buffer de features com shape {out.shape} não comporta {count}x{self.dim}")
+        if count and all(isinstance(obs, VectorObs) and obs.layout.extractor.obs_version == self.obs_version for obs in observations):
+            layout = observations[0].layout
+            if all(obs.layout is layout for obs in observations):
+                return layout.features_into(np.stack([obs.values for obs in observations]), out[:count])
+        if count:
+            fill = self._fill
+            rows = (obs.layout.features(obs.values) if isinstance(obs, VectorObs) else fill(obs) for obs in observations)
+            flat = np.fromiter(chain.from_iterable(rows), dtype=np.float32, count=count * self.dim)
+            out[:count] = flat.reshape(count, self.dim)
+        return out[:count]
+
+
+def obs_version_of(obs: Dict[str, Any]) -> int:
+    schema = obs.get("schema") if isinstance(obs, dict) else None
+    if isinstance(schema, dict):
+        try:
+            return int(schema.get("obs_version", OBS_VERSION))
+        except (TypeError, ValueError):
+            return OBS_VERSION
+    return OBS_VERSION
+
+
+@lru_cache(maxsize=None)
+def get_extractor(obs_version: int = OBS_VERSION) -> FeatureExtractor:
+    return FeatureExtractor(obs_version)
+
+
+class VectorObs(dict):
+    # Obs recebida como vetor (obs_format "vector"): o dict só traz as chaves que o trainer lê direto,
+    # e as features saem de `values` por indexação.
+    __slots__ = ("layout", "values")
+
+
+def _inf_sentinel(value: float) -> float:
+    return value if value >= 0.0 else math.inf
+
+
+def _compile_unflatten(fields: Sequence[str], keep: Callable[[str], bool]) -> Callable[[Sequence[float]], Dict[str, Any]]:
+    # Monta o dict aninhado com um único literal gerado para o schema (Vector2 volta como [x, y]).
+    tree: Dict[str, Any] = {}
+    for idx, name in enumerate(fields):
+        if not keep(name):
+            continue
+        parts = name.split(".")
+        expr = f"v[{idx}]"
+        # O Godot manda -1 para distâncias sem contato (INF não cabe em JSON).
+        if parts[-1].endswith("distance") and len(parts) > 1:
+            expr = f"_inf(v[{idx}])"
+        if len(parts) > 1 and parts[-1] in ("x", "y"):
+            node = tree
+            for part in parts[:-2]:
+                node = node.setdefault(part, {})
+            pair = node.setdefault(parts[-2], ["0.0", "0.0"])
+            if isinstance(pair, list):
+                pair[0 if parts[-1] == "x" else 1] = expr
+            continue
+        node = tree
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = expr
+
+    def render(node: Any) -> str:
+        if isinstance(node, str):
+            return node
+        if isinstance(node, list):
+            return "[" + ", ".join(node) + "]"
+        return "{" + ", ".join(f"{key!r}: {render(value)}" for key, value in node.items()) + "}"
+
+    namespace: Dict[str, Any] = {"_inf": _inf_sentinel}
+    exec(compile(f"def _unflatten(v):\n    return {render(tree)}\n", "<obs_vector>", "exec"), namespace)
+    return namespace["_unflatten"]
+
+
+class ObsLayout:
+    def __init__(self, fields: Sequence[str], obs_version: int = OBS_VERSION, keys: Optional[Sequence[str]] = None) -> None:
+        self.fields = tuple(str(name) for name in fields)
+        self.width = len(self.fields)
+        self.index = {name: i for i, name in enumerate(self.fields)}
+        self.extractor = get_extractor(int(obs_version))
+        # Feature ausente no schema aponta para a coluna extra, que é sempre zero.
+        self.feature_index = np.array(
+            [self.index.get(VECTOR_ALIASES.get(name, name), self.width) for name in self.extractor.names],
+            dtype=np.intp,
+        )
+        self.feature_scale = np.reciprocal(np.asarray(self.extractor.scales, dtype=np.float32))
+        prefixes = tuple(keys) if keys is not None else None
+
+        def keep(name: str) -> bool:
+            return prefixes is None or any(name == key or name.startswith(key + ".") for key in prefixes)
+
+        self._unflatten = _compile_unflatten(self.fields, keep)
+
+    def wrap(self, values: Sequence[float]) -> VectorObs:
+        row = np.zeros((self.width + 1,), dtype=np.float32)
+        count = min(len(values), self.width)
+        row[:count] = values[:count]
+        if count < self.width:
+            values = list(values[:count]) + [0.0] * (self.width - count)
+        obs = VectorObs(self._unflatten(values))
+        obs.layout = self
+        obs.values = row
+        return obs
+
+    def features_into(self, values: np.ndarray, out: np.ndarray) -> np.ndarray:
+        np.multiply(values[..., self.feature_index], self.feature_scale, out=out)
+        return out
+
+    def features(self, values: np.ndarray) -> np.ndarray:
+        return values[self.feature_index] * self.feature_scale
+
+
+def decode_obs(value: Any, layout: Optional[ObsLayout]) -> Dict[str, Any]:
+    if isinstance(value, dict):
+        return value
+    if layout is not None and isinstance(value, list):
+        return layout.wrap(value)
+    return {}
+
+
+def layout_from_schema(message: Dict[str, Any], keys: Optional[Sequence[str]] = None) -> Optional[ObsLayout]:
+    fields = message.get("fields")
+    if not isinstance(fields, list) or not fields:
+        return None
+    try:
+        obs_version = int(message.get("obs_version", OBS_VERSION))
+    except (TypeError, ValueError):
+        obs_version = OBS_VERSION
+    return ObsLayout(fields, obs_version, keys)
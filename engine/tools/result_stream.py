@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from bridge_client import LINE_LIMIT, decode_line, encode_message
+
+Message = Dict[str, Any]
+
+RATE_INTERVAL = 2.0
+
+
+class ResultReporter:
+    # Lado trainer: conecta já no início (o orquestrador aceita antes do fim do treino) e nunca derruba o treino;
+    # sem orquestrador escutando, tudo vira no-op e o result.json continua sendo a fonte.
+    def __init__(self, address: str, report_id: str, timeout: float = 2.0) -> None:
+        self.report_id = str(report_id)
+        self.sock: Optional[socket.socket] = None
+        self._steps = 0
+        self._rate_since = time.monotonic()
+        if not address:
+            return
+        host, _, port = str(address).rpartition(":")
+        try:
+            self.sock = socket.create_connection((host or "127.0.0.1", int(port)), timeout=timeout)
+        except (OSError, ValueError):
+            self.sock = None
+            return
+        self.send({"type": "hello", "id": self.report_id})
+
+    def send(self, payload: Message) -> None:
+        if self.sock is None:
+            return
+        try:
+            data = encode_message(payload)
+        except (TypeError, ValueError):
+            return
+        try:
+            self.sock.sendall(data)
+        except OSError:
+            self.close()
+
+    def progress(self, generation: int, stats: Message) -> None:
+        self.send({"type": "progress", "generation": int(generation), "stats": stats})
+
+    def count_steps(self, count: int = 1) -> None:
+        # steps/s para o governor de concorrência do orquestrador, no máximo uma mensagem a cada RATE_INTERVAL.
+        if self.sock is None:
+            return
+        self._steps += int(count)
+        now = time.monotonic()
+        elapsed = now - self._rate_since
+        if elapsed < RATE_INTERVAL:
+            return
+        self.send({"type": "rate", "steps_per_sec": self._steps / elapsed})
+        self._steps = 0
+        self._rate_since = now
+
+    def result(self, payload: Message) -> None:
+        self.send({"type": "result", "payload": payload})
+
+    def close(self) -> None:
+        sock = self.sock
+        self.sock = None
+        if sock is None:
+            return
+        try:
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+        sock.close()
+
+
+class ResultServer:
+    # Lado orquestrador: uma conexão por trainer, identificada pelo hello; on_message recebe (id, mensagem).
+    def __init__(self, on_message: Callable[[str, Message], None]) -> None:
+        self.on_message = on_message
+        self.address = ""
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._closed: Dict[str, asyncio.Event] = {}
+        self._handlers: List[asyncio.Task] = []
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._server = await asyncio.start_server(self._accept, host, port, limit=LINE_LIMIT)
+        bound = self._server.sockets[0].getsockname()
+        self.address = f"{bound[0]}:{bound[1]}"
+
+    async def drained(self, report_id: str, timeout: float) -> None:
+        # O processo pode sair antes de o loop ler as últimas linhas: espera o EOF da conexão dele.
+        event = self._closed.get(report_id)
+        if event is None:
+            return
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in self._handlers:
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        self._handlers = []
+
+    async def _accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        if task is not None:
+            self._handlers.append(task)
+        event: Optional[asyncio.Event] = None
+        try:
+            hello, _ = decode_line(await reader.readline())
+            if not hello or hello.get("type") != "hello":
+                return
+            report_id = str(hello.get("id", ""))
+            event = asyncio.Event()
+            self._closed[report_id] = event
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                message, _ = decode_line(raw)
+                if message is not None:
+                    self.on_message(report_id, message)
+        except (ConnectionError, OSError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # Mesmo motivo do WorkQueue: não propagar para o callback do start_server.
+            pass
+        finally:
+            if event is not None:
+                event.set()
+            writer.close()
+            if task is not None and task in self._handlers:
+                self._handlers.remove(task)
@@ -31,6 +31,21 @@ def _parse_round_seed(path: Path) -> tuple[int, int]:
     return rid, sid
 
 
+def _catalog_league(catalog_path: Path, league_dir: Path, mode: str) -> list[tuple[Path, int, int, float]]:
+    # Liga indexada pelo orquestrador: score/G/N vêm do catálogo em vez do nome do arquivo.
+    if not catalog_path.exists():
+        return []
+    from run_catalog import RunCatalog
+
+    with RunCatalog(catalog_path) as catalog:
+        rows = catalog.league(league_dir.resolve(), order="age" if mode == "latest" else "score")
+    return [
+        (Path(row["path"]), int(row["generation"] or 0), int(row["individual"] or 0), float(row["score"]))
+        for row in rows
+        if Path(row["path"]).exists()
+    ]
+
+
 def main() -> int:
     root = Path(__file__).resolve().parents[1]
     parser = argparse.ArgumentParser(description="Restaura o best_genome.json a partir da liga")
@@ -42,6 +57,11 @@ def main() -> int:
         choices=("league", "matchups"),
         help="Origem para restauração: 'league' ou 'matchups' (state/top)",
     )
+    parser.add_argument(
+        "--catalog",
+        default="",
+        help="catalog.sqlite das ilhas (padrão: state/catalog.sqlite ao lado da liga); sem catálogo, lê score do nome",
+    )
     args = parser.parse_args()
 
     bot = "".join(ch for ch in str(args.bot).strip().lower() if ch.isalnum() or ch in ("-", "_"))
@@ -49,12 +69,13 @@ def main() -> int:
         return 2
 
     source_label = str(args.source)
+    indexed: list[tuple[Path, int, int, float]] = []
     if args.source == "matchups":
         matchups_dir = root / "BOTS" / bot / "matchups"
         if not matchups_dir.exists():
             print(f"Matchups não encontrado: {matchups_dir}")
             return 3
-        snaps = list(matchups_dir.glob("**/state/round_*/top/*.json"))
+        snaps = [p for ext in ("json", "genome") for p in matchups_dir.glob(f"**/state/round_*/top/*.{ext}")]
         if not snaps:
             print(f"Sem seeds em state/top: {matchups_dir}")
             return 4
@@ -63,12 +84,17 @@ def main() -> int:
         if not league_dir.exists():
             print(f"Liga não encontrada: {league_dir}")
             return 3
-        snaps = list(league_dir.glob("*.json"))
+        catalog_path = Path(args.catalog) if args.catalog else league_dir.parent / "state" / "catalog.sqlite"
+        indexed = _catalog_league(catalog_path, league_dir, args.mode)
+        snaps = [p for ext in ("json", "genome") for p in league_dir.glob(f"*.{ext}")]
         if not snaps:
             print(f"Liga vazia: {league_dir}")
             return 4
 
-    if args.mode == "latest":
+    if indexed:
+        chosen, g, n, score = indexed[0]
+        source_label += ", catálogo"
+    elif args.mode == "latest":
         if args.source == "matchups":
             chosen = max(
                 snaps,
@@ -86,11 +112,19 @@ def main() -> int:
         snaps.sort(key=_parse_score, reverse=True)
         chosen = snaps[0]
 
-    g, n = _parse_gen_n(chosen)
-    score = _parse_score(chosen)
+    if not indexed:
+        g, n = _parse_gen_n(chosen)
+        score = _parse_score(chosen)
 
     best_path = root / "BOTS" / bot / "best_genome.json"
-    shutil.copyfile(chosen, best_path)
+    if chosen.suffix == ".genome":
+        from genome_io import convert_genome
+
+        convert_genome(chosen, best_path)
+    else:
+        # O best pode ser hardlink de um blob do genome_store (mesmo inode da liga): troca o arquivo, não sobrescreve.
+        best_path.unlink(missing_ok=True)
+        shutil.copyfile(chosen, best_path)
 
     meta_path = root / "BOTS" / bot / "current_bot.json"
     meta_path.write_text(
@@ -0,0 +1,435 @@
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CATALOG_NAME = "catalog.sqlite"
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS rounds (
+    round INTEGER PRIMARY KEY,
+    generation INTEGER,
+    base_individual INTEGER,
+    workers INTEGER,
+    best REAL,
+    best_generation INTEGER,
+    best_individual INTEGER,
+    summary_path TEXT,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS individuals (
+    generation INTEGER NOT NULL,
+    individual INTEGER NOT NULL,
+    round INTEGER,
+    worker_id INTEGER,
+    score REAL,
+    sweep INTEGER,
+    winner INTEGER,
+    genome_path TEXT,
+    parent_path TEXT,
+    result_path TEXT,
+    record_path TEXT,
+    created_at REAL,
+    PRIMARY KEY (generation, individual)
+);
+CREATE INDEX IF NOT EXISTS individuals_rank ON individuals (sweep DESC, score DESC);
+CREATE INDEX IF NOT EXISTS individuals_round ON individuals (round, score DESC);
+CREATE INDEX IF NOT EXISTS individuals_genome ON individuals (genome_path);
+CREATE TABLE IF NOT EXISTS seeds (
+    path TEXT PRIMARY KEY,
+    round INTEGER,
+    rank INTEGER,
+    generation INTEGER,
+    individual INTEGER,
+    score REAL
+);
+CREATE TABLE IF NOT EXISTS origins (
+    path TEXT PRIMARY KEY,
+    parent_path TEXT,
+    second_parent_path TEXT
+);
+CREATE TABLE IF NOT EXISTS promotions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    at REAL,
+    round INTEGER,
+    generation INTEGER,
+    individual INTEGER,
+    score REAL,
+    prev_best REAL,
+    promoted INTEGER,
+    source TEXT,
+    promoted_to TEXT
+);
+CREATE TABLE IF NOT EXISTS league (
+    path TEXT PRIMARY KEY,
+    league_dir TEXT,
+    generation INTEGER,
+    individual INTEGER,
+    score REAL,
+    added_at REAL,
+    removed_at REAL
+);
+CREATE INDEX IF NOT EXISTS league_active ON league (league_dir, removed_at, score DESC);
+"""
+
+_SNAPSHOT_RE = re.compile(r"G(\d+)_N(\d+)(?:_R\d+)?(?:_wid\d+)?_score_(-?\d+(?:\.\d+)?)")
+
+
+def parse_snapshot_name(name: str) -> Tuple[int, int, float]:
+    # Nomes antigos (individuals/, top/, liga) carregam G, N e score; só usado para importar o que veio antes do catálogo.
+    m = _SNAPSHOT_RE.search(str(name))
+    if not m:
+        return 0, 0, float("-inf")
+    return int(m.group(1)), int(m.group(2)), float(m.group(3))
+
+
+def _rows(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    return [dict(row) for row in cursor.fetchall()]
+
+
+class RunCatalog:
+    # Índice SQLite do estado das ilhas (rodadas, indivíduos, seeds, promoções e liga). Os JSON continuam sendo
+    # gravados como antes; o catálogo só evita glob + parse de nome de arquivo para responder as consultas.
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), timeout=30.0)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self) -> "RunCatalog":
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.close()
+
+    # --- escrita ---
+
+    def start_round(self, round_index: int, generation: int, base_individual: int, workers: int) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO rounds (round, generation, base_individual, workers, started_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(round) DO UPDATE SET generation=excluded.generation, base_individual=excluded.base_individual, "
+                "workers=excluded.workers, started_at=excluded.started_at, finished_at=NULL",
+                (int(round_index), int(generation), int(base_individual), int(workers), time.time()),
+            )
+
+    def add_individual(self, record: Dict[str, Any], parent_path: str = "", record_path: str = "") -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO individuals (generation, individual, round, worker_id, score, sweep, winner, "
+                "genome_path, parent_path, result_path, record_path, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    int(record.get("generation_global", record.get("generation", 0))),
+                    int(record.get("individual", 0)),
+                    int(record.get("islands_round", 0)),
+                    int(record.get("worker_id", -1)),
+                    float(record.get("score", 0.0)),
+                    1 if bool(record.get("sweep_5_0", False)) else 0,
+                    int(record.get("best_winner", 0)),
+                    str(record.get("genome_path", "")),
+                    str(parent_path or record.get("load_path", record.get("seed_path", "")) or ""),
+                    str(record.get("result_path", "")),
+                    str(record_path),
+                    time.time(),
+                ),
+            )
+
+    def add_origins(self, origins: Iterable[Tuple[str, str, str]]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO origins (path, parent_path, second_parent_path) VALUES (?, ?, ?)",
+                [(str(p), str(a or ""), str(b or "")) for p, a, b in origins],
+            )
+
+    def finish_round(
+        self,
+        round_index: int,
+        best: float,
+        best_generation: int,
+        best_individual: int,
+        seeds: Sequence[Tuple[str, int, int, float]],
+        summary_path: str = "",
+    ) -> None:
+        with self.conn:
+            self.conn.execute(
+                "UPDATE rounds SET best=?, best_generation=?, best_individual=?, summary_path=?, finished_at=? WHERE round=?",
+                (float(best), int(best_generation), int(best_individual), str(summary_path), time.time(), int(round_index)),
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO seeds (path, round, rank, generation, individual, score) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (str(path), int(round_index), rank, int(generation), int(individual), float(score))
+                    for rank, (path, generation, individual, score) in enumerate(seeds, start=1)
+                ],
+            )
+
+    def add_promotion(
+        self,
+        round_index: int,
+        generation: int,
+        individual: int,
+        score: float,
+        prev_best: float,
+        promoted: bool,
+        source: str,
+        promoted_to: str,
+    ) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO promotions (at, round, generation, individual, score, prev_best, promoted, source, promoted_to) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    time.time(),
+                    int(round_index),
+                    int(generation),
+                    int(individual),
+                    float(score),
+                    float(prev_best) if prev_best == prev_best and abs(prev_best) != float("inf") else None,
+                    1 if promoted else 0,
+                    str(source),
+                    str(promoted_to),
+                ),
+            )
+
+    def add_league(self, path: Path, generation: int, individual: int, score: float, added_at: Optional[float] = None) -> None:
+        path = Path(path)
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO league (path, league_dir, generation, individual, score, added_at, removed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, NULL) ON CONFLICT(path) DO UPDATE SET removed_at=NULL",
+                (str(path), str(path.parent), int(generation), int(individual), float(score), float(added_at or time.time())),
+            )
+
+    def sync_league(self, league_dir: Path, paths: Iterable[Path]) -> int:
+        # Liga criada antes do catálogo: registra uma vez o que está no disco (G/N/score do nome, idade pelo mtime).
+        known = {row["path"] for row in self.conn.execute("SELECT path FROM league WHERE league_dir=?", (str(league_dir),))}
+        added = 0
+        for path in paths:
+            if str(path) in known:
+                continue
+            g, n, score = parse_snapshot_name(Path(path).name)
+            try:
+                mtime = Path(path).stat().st_mtime
+            except OSError:
+                continue
+            self.add_league(Path(path), g, n, score, added_at=mtime)
+            added += 1
+        return added
+
+    def prune_league(
+        self,
+        league_dir: Path,
+        max_count: int = 0,
+        min_score: Optional[float] = None,
+        max_age_sec: float = 0.0,
+        keep: str = "age",
+        dry_run: bool = False,
+    ) -> List[str]:
+        # Marca como removidos (e devolve) os snapshots que saem da liga; apagar o arquivo fica com quem chamou.
+        now = time.time()
+        active = self.league(league_dir, order="age")
+        drop: Dict[str, Dict[str, Any]] = {}
+        for row in active:
+            if min_score is not None and float(row["score"]) < float(min_score):
+                drop[row["path"]] = row
+            elif max_age_sec > 0.0 and now - float(row["added_at"] or now) > float(max_age_sec):
+                drop[row["path"]] = row
+        survivors = [row for row in active if row["path"] not in drop]
+        if max_count > 0 and len(survivors) > max_count:
+            if keep == "score":
+                survivors.sort(key=lambda row: (float(row["score"]), float(row["added_at"] or 0.0)), reverse=True)
+            else:
+                survivors.sort(key=lambda row: float(row["added_at"] or 0.0), reverse=True)
+            for row in survivors[max_count:]:
+                drop[row["path"]] = row
+        if drop and not dry_run:
+            with self.conn:
+                self.conn.executemany("UPDATE league SET removed_at=? WHERE path=?", [(now, path) for path in drop])
+        return list(drop)
+
+    # --- consultas ---
+
+    def best(self, n: int = 10, round_index: Optional[int] = None) -> List[Dict[str, Any]]:
+        # Mesma ordem do orquestrador: sweep 5-0 primeiro, depois score.
+        sql = "SELECT * FROM individuals"
+        args: List[Any] = []
+        if round_index is not None:
+            sql += " WHERE round=?"
+            args.append(int(round_index))
+        sql += " ORDER BY sweep DESC, score DESC, winner DESC, round DESC LIMIT ?"
+        args.append(int(n))
+        return _rows(self.conn.execute(sql, args))
+
+    def individual(self, generation: int, individual: int) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            "SELECT * FROM individuals WHERE generation=? AND individual=?", (int(generation), int(individual))
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def find_path(self, path: str) -> Optional[Dict[str, Any]]:
+        # Um caminho de genoma pode ser o best de um worker, uma seed do top ou um snapshot da liga.
+        path = str(path)
+        row = self.conn.execute("SELECT * FROM individuals WHERE genome_path=? LIMIT 1", (path,)).fetchone()
+        if row is not None:
+            return dict(row)
+        for table in ("seeds", "league"):
+            ref = self.conn.execute(f"SELECT generation, individual FROM {table} WHERE path=?", (path,)).fetchone()
+            if ref is not None:
+                return self.individual(int(ref["generation"]), int(ref["individual"]))
+        return None
+
+    def lineage(self, generation: int, individual: int, max_depth: int = 1000) -> List[Dict[str, Any]]:
+        # Do indivíduo até a seed inicial: parent_path -> (população do outer GA) -> seed do top -> indivíduo anterior.
+        chain: List[Dict[str, Any]] = []
+        current = self.individual(generation, individual)
+        seen = set()
+        while current is not None and len(chain) < max_depth:
+            key = (current["generation"], current["individual"])
+            if key in seen:
+                break
+            seen.add(key)
+            chain.append(current)
+            parent = str(current.get("parent_path") or "")
+            origin = self.conn.execute("SELECT * FROM origins WHERE path=?", (parent,)).fetchone()
+            if origin is not None:
+                current["second_parent_path"] = origin["second_parent_path"]
+                parent = str(origin["parent_path"] or "")
+            if not parent:
+                break
+            found = self.find_path(parent)
+            if found is None:
+                chain.append({"genome_path": parent, "generation": None, "individual": None})
+                break
+            current = found
+        return chain
+
+    def promotions(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return _rows(self.conn.execute("SELECT * FROM promotions ORDER BY id DESC LIMIT ?", (int(limit),)))
+
+    def league(self, league_dir: Path, order: str = "score", include_removed: bool = False) -> List[Dict[str, Any]]:
+        sql = "SELECT * FROM league WHERE league_dir=?"
+        if not include_removed:
+            sql += " AND removed_at IS NULL"
+        sql += " ORDER BY score DESC, added_at DESC" if order == "score" else " ORDER BY added_at DESC"
+        return _rows(self.conn.execute(sql, (str(league_dir),)))
+
+    def rounds(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return _rows(self.conn.execute("SELECT * FROM rounds ORDER BY round DESC LIMIT ?", (int(limit),)))
+
+    # --- importação ---
+
+    def import_state(self, state_dir: Path) -> int:
+        # Backfill a partir dos JSON de uma execução anterior ao catálogo.
+        count = 0
+        for round_dir in sorted(Path(state_dir).glob("round_*")):
+            try:
+                round_index = int(round_dir.name.split("_")[1])
+            except (IndexError, ValueError):
+                continue
+            summary = _read_json(round_dir / "summary.json")
+            for record_path in sorted((round_dir / "individuals").glob("*.json")):
+                record = _read_json(record_path)
+                if not record:
+                    continue
+                record.setdefault("islands_round", round_index)
+                self.add_individual(record, record_path=str(record_path))
+                count += 1
+            seeds: List[Tuple[str, int, int, float]] = []
+            for seed_path in sorted((round_dir / "top").glob("seed_*")):
+                g, n, score = parse_snapshot_name(seed_path.name)
+                seeds.append((str(seed_path), g, n, score))
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO rounds (round, generation, base_individual) VALUES (?, ?, ?)",
+                    (round_index, int(summary.get("generation_global", 0)), int(summary.get("base_individual", 0))),
+                )
+            best_g, best_n = (seeds[0][1], seeds[0][2]) if seeds else (0, 0)
+            self.finish_round(round_index, float(summary.get("best", 0.0)), best_g, best_n, seeds, str(round_dir / "summary.json"))
+        return count
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    try:
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Consulta o catálogo SQLite das ilhas (rodadas, indivíduos, liga, promoções)")
+    parser.add_argument("catalog", help=f"Caminho do {CATALOG_NAME} (fica no state_dir)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_best = sub.add_parser("best", help="Melhores indivíduos (todas as rodadas ou --round)")
+    p_best.add_argument("--n", type=int, default=10)
+    p_best.add_argument("--round", type=int, default=None)
+    p_lin = sub.add_parser("lineage", help="Ancestrais de um indivíduo (G N) ou de um caminho de genoma")
+    p_lin.add_argument("target", nargs="+", help="G N (ex: 12 276) ou caminho do genoma")
+    p_prom = sub.add_parser("promotions", help="Histórico de promoções")
+    p_prom.add_argument("--limit", type=int, default=20)
+    p_league = sub.add_parser("league", help="Snapshots ativos da liga")
+    p_league.add_argument("league_dir")
+    p_league.add_argument("--order", choices=("score", "age"), default="score")
+    p_prune = sub.add_parser("prune", help="Tira snapshots da liga (e apaga os arquivos)")
+    p_prune.add_argument("league_dir")
+    p_prune.add_argument("--max", type=int, default=0)
+    p_prune.add_argument("--min-score", type=float, default=None)
+    p_prune.add_argument("--max-age-days", type=float, default=0.0)
+    p_prune.add_argument("--keep", choices=("score", "age"), default="age")
+    p_prune.add_argument("--dry-run", action="store_true")
+    p_import = sub.add_parser("import", help="Importa round_*/individuals e top/ de um state_dir existente")
+    p_import.add_argument("state_dir")
+    p_import.add_argument("--league-dir", default="")
+    args = parser.parse_args()
+
+    with RunCatalog(Path(args.catalog)) as catalog:
+        if args.cmd == "best":
+            out: Any = catalog.best(args.n, args.round)
+        elif args.cmd == "lineage":
+            if len(args.target) >= 2:
+                out = catalog.lineage(int(args.target[0]), int(args.target[1]))
+            else:
+                found = catalog.find_path(str(Path(args.target[0]).resolve()))
+                out = catalog.lineage(int(found["generation"]), int(found["individual"])) if found else []
+        elif args.cmd == "promotions":
+            out = catalog.promotions(args.limit)
+        elif args.cmd == "league":
+            out = catalog.league(Path(args.league_dir).resolve(), order=args.order)
+        elif args.cmd == "prune":
+            league_dir = Path(args.league_dir).resolve()
+            catalog.sync_league(league_dir, [p for p in league_dir.iterdir() if p.suffix in (".json", ".genome")])
+            out = catalog.prune_league(
+                league_dir, args.max, args.min_score, args.max_age_days * 86400.0, keep=args.keep, dry_run=args.dry_run
+            )
+            if not args.dry_run:
+                for path in out:
+                    Path(path).unlink(missing_ok=True)
+        else:
+            out = {"individuals": catalog.import_state(Path(args.state_dir).resolve())}
+            if args.league_dir:
+                league_dir = Path(args.league_dir).resolve()
+                out["league"] = catalog.sync_league(league_dir, [p for p in league_dir.iterdir() if p.suffix in (".json", ".genome")])
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,15 +5,29 @@ import json
 import math
 import os
 import random
-import select
-import socket
 import sys
 import time
-from dataclasses import dataclass
+import weakref
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-from ga_params_schema_v1 import clamp_genes, defaults_v1, distance, merge_handmade_into_defaults, schema_v1
+import numpy as np
+
+from bridge_client import CAP_LEAN_STEPS, CAP_OBS_VECTOR, DROP_NONE, DROP_POLICIES, BridgeClient, supports
+from ga_params_schema_v1 import (
+    array_to_genes,
+    clamp_array,
+    distance_matrix,
+    distances_to,
+    gene_layout,
+    gene_values,
+    genes_to_array,
+    merge_handmade_into_defaults,
+    normalized_array,
+)
+from ga_params_tpe import MAX_HISTORY, TPEOptimizer
+from obs_features import ObsLayout, decode_obs, layout_from_schema
+from result_stream import ResultReporter
 
 
 def repo_root() -> Path:
@@ -46,7 +60,10 @@ def read_json(path: str) -> Dict[str, Any]:
 def write_json(path: str, payload: Dict[str, Any]) -> None:
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    # Grava ao lado e troca: o destino pode ser hardlink do genome_store e não pode ser sobrescrito no lugar.
+    tmp = p.with_name(p.name + f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, p)
 
 
 def to_vec2(value: Any) -> Tuple[float, float]:
@@ -69,20 +86,53 @@ def compute_aim(obs: Dict[str, Any]) -> Tuple[float, float]:
     return 1.0, 0.0
 
 
-@dataclass
+_NP_RNGS: "weakref.WeakKeyDictionary[random.Random, np.random.Generator]" = weakref.WeakKeyDictionary()
+
+
+def _np_rng(rng: random.Random) -> np.random.Generator:
+    # Operações vetorizadas sorteiam pelo NumPy, semeado uma vez pelo random.Random do trainer (continua
+    # reproduzível por --seed).
+    gen = _NP_RNGS.get(rng)
+    if gen is None:
+        gen = np.random.default_rng(rng.getrandbits(64))
+        _NP_RNGS[rng] = gen
+    return gen
+
+
 class ParamGenome:
-    genes: Dict[str, Any]
-    meta: Dict[str, Any]
-    mutation_steps: int = 0
-
-    shoot_hold_remaining: float = 0.0
-    shoot_cooldown_remaining: float = 0.0
-    shoot_release_frame: bool = False
-    dash_cooldown_remaining: float = 0.0
-    jump_cooldown_remaining: float = 0.0
-    melee_cooldown_remaining: float = 0.0
-    last_jump_intent: bool = False
-    last_melee_intent: bool = False
+    # Genes num vetor float64 na ordem do gene_layout(); `params` é a cópia em tupla nomeada que o act() lê por frame.
+    __slots__ = (
+        "values",
+        "params",
+        "meta",
+        "mutation_steps",
+        "shoot_hold_remaining",
+        "shoot_cooldown_remaining",
+        "shoot_release_frame",
+        "dash_cooldown_remaining",
+        "jump_cooldown_remaining",
+        "melee_cooldown_remaining",
+        "last_jump_intent",
+        "last_melee_intent",
+    )
+
+    def __init__(self, genes: Dict[str, Any] | np.ndarray, meta: Dict[str, Any], mutation_steps: int = 0) -> None:
+        self.meta = meta
+        self.mutation_steps = int(mutation_steps)
+        self.set_values(np.array(genes, dtype=np.float64) if isinstance(genes, np.ndarray) else genes_to_array(genes))
+        self.reset_controls()
+
+    def set_values(self, values: np.ndarray) -> None:
+        self.values = values
+        self.params = gene_values(values)
+
+    @property
+    def genes(self) -> Dict[str, Any]:
+        return array_to_genes(self.values)
+
+    @genes.setter
+    def genes(self, genes: Dict[str, Any]) -> None:
+        self.set_values(genes_to_array(genes))
 
     def reset_controls(self) -> None:
         self.shoot_hold_remaining = 0.0
@@ -95,55 +145,39 @@ class ParamGenome:
         self.last_melee_intent = False
 
     def clone(self) -> "ParamGenome":
-        g = ParamGenome(dict(self.genes), dict(self.meta), int(self.mutation_steps))
-        return g
+        return ParamGenome(self.values, dict(self.meta), int(self.mutation_steps))
 
     def mutate(self, rng: random.Random, mutation_rate: float, mutation_std: float) -> None:
         if mutation_rate <= 0.0:
             return
-        spec = schema_v1()
-        for key, s in spec.items():
-            if rng.random() >= mutation_rate:
-                continue
-            if s.type == "bool":
-                self.genes[key] = not bool(self.genes.get(key, defaults_v1().get(key, False)))
-                continue
-            base = float(self.genes.get(key, defaults_v1().get(key, 0.0)))
-            std = float(s.mut_std if s.mut_std is not None else mutation_std)
-            val = base + float(rng.gauss(0.0, std))
-            if s.min is not None:
-                val = max(float(s.min), val)
-            if s.max is not None:
-                val = min(float(s.max), val)
-            self.genes[key] = val
-        self.genes = clamp_genes(self.genes)
+        layout = gene_layout()
+        gen = _np_rng(rng)
+        mask = gen.random(len(layout.keys)) < float(mutation_rate)
+        values = self.values.copy()
+        flip = mask & layout.is_bool
+        values[flip] = np.where(values[flip] != 0.0, 0.0, 1.0)
+        jitter = mask & ~layout.is_bool
+        std = np.where(np.isnan(layout.mut_std), float(mutation_std), layout.mut_std)
+        values[jitter] += gen.normal(0.0, std[jitter])
+        self.set_values(clamp_array(values))
         self.mutation_steps += 1
 
     @staticmethod
     def crossover(rng: random.Random, a: "ParamGenome", b: "ParamGenome") -> "ParamGenome":
-        spec = schema_v1()
-        out: Dict[str, Any] = {}
-        for key, s in spec.items():
-            if s.type == "bool":
-                out[key] = bool(a.genes.get(key, False)) if rng.random() < 0.5 else bool(b.genes.get(key, False))
-                continue
-            av = float(a.genes.get(key, defaults_v1().get(key, 0.0)))
-            bv = float(b.genes.get(key, defaults_v1().get(key, 0.0)))
-            alpha = float(rng.random())
-            val = alpha * av + (1.0 - alpha) * bv
-            if s.min is not None:
-                val = max(float(s.min), val)
-            if s.max is not None:
-                val = min(float(s.max), val)
-            out[key] = val
-        child = ParamGenome(clamp_genes(out), {"created_from": "crossover"}, mutation_steps=max(a.mutation_steps, b.mutation_steps))
-        return child
+        # Bool vem inteiro de um dos pais; float é uma mistura com alpha sorteado por gene.
+        layout = gene_layout()
+        gen = _np_rng(rng)
+        alpha = gen.random(len(layout.keys))
+        blend = alpha * a.values + (1.0 - alpha) * b.values
+        pick = np.where(alpha < 0.5, a.values, b.values)
+        values = clamp_array(np.where(layout.is_bool, pick, blend))
+        return ParamGenome(values, {"created_from": "crossover"}, mutation_steps=max(a.mutation_steps, b.mutation_steps))
 
     def to_dict(self) -> Dict[str, Any]:
         return {
             "genome_version": 1,
             "schema_id": "ga_params_v1",
-            "genes": dict(self.genes),
+            "genes": self.genes,
             "meta": {"mutation_steps": int(self.mutation_steps), **dict(self.meta)},
         }
 
@@ -152,13 +186,12 @@ class ParamGenome:
         genes = payload.get("genes", {}) if isinstance(payload.get("genes"), dict) else {}
         meta = payload.get("meta", {}) if isinstance(payload.get("meta"), dict) else {}
         mutation_steps = int(meta.get("mutation_steps", 0))
-        g = cls(clamp_genes(genes), dict(meta), mutation_steps=mutation_steps)
-        return g
+        return cls(clamp_array(genes_to_array(genes)), dict(meta), mutation_steps=mutation_steps)
 
     @classmethod
     def seed_from_handmade(cls, handmade_payload: Dict[str, Any]) -> "ParamGenome":
         genes = merge_handmade_into_defaults(handmade_payload)
-        return cls(dict(genes), {"created_from": "handmade"}, mutation_steps=0)
+        return cls(genes, {"created_from": "handmade"}, mutation_steps=0)
 
     def act(self, obs: Dict[str, Any], rng: random.Random, dt: float) -> Dict[str, Any]:
         self_state = obs.get("self", {}) if isinstance(obs.get("self"), dict) else {}
@@ -177,6 +210,7 @@ class ParamGenome:
                 "actions": {"left": False, "right": False, "up": False, "down": False},
             }
 
+        p = self.params
         dt = float(dt or 0.0)
         self.shoot_cooldown_remaining = max(0.0, self.shoot_cooldown_remaining - dt)
         self.dash_cooldown_remaining = max(0.0, self.dash_cooldown_remaining - dt)
@@ -197,9 +231,9 @@ class ParamGenome:
         sensor_ceiling_distance = float(sensors.get("ceiling_distance", float("inf")) or float("inf"))
         sensor_ledge_ground_distance = float(sensors.get("ledge_ground_distance", float("inf")) or float("inf"))
 
-        keep_distance = float(self.genes["movement.keep_distance"])
-        backoff_ratio = float(self.genes["movement.backoff_ratio"])
-        deadzone_x = float(self.genes["movement.approach_deadzone_x"])
+        keep_distance = p.movement_keep_distance
+        backoff_ratio = p.movement_backoff_ratio
+        deadzone_x = p.movement_approach_deadzone_x
         backoff_threshold = keep_distance * backoff_ratio
 
         axis = 0.0
@@ -211,12 +245,12 @@ class ParamGenome:
             else:
                 axis = -1.0 if dx > 0 else 1.0
 
-        avoid_ledges = bool(self.genes["safety.avoid_ledges"])
-        avoid_walls = bool(self.genes["safety.avoid_walls"])
-        wall_stop_distance = float(self.genes["safety.wall_stop_distance"])
-        max_safe_drop_distance = float(self.genes["safety.max_safe_drop_distance"])
-        ceiling_block_distance = float(self.genes["safety.ceiling_block_distance"])
-        air_ground_distance = float(self.genes["safety.air_ground_distance"])
+        avoid_ledges = p.safety_avoid_ledges
+        avoid_walls = p.safety_avoid_walls
+        wall_stop_distance = p.safety_wall_stop_distance
+        max_safe_drop_distance = p.safety_max_safe_drop_distance
+        ceiling_block_distance = p.safety_ceiling_block_distance
+        air_ground_distance = p.safety_air_ground_distance
         is_airborne_by_sensor = sensor_ground_distance > air_ground_distance
         if axis != 0.0:
             moving_dir = 1 if axis > 0 else -1
@@ -232,28 +266,28 @@ class ParamGenome:
 
         aim_x, aim_y = compute_aim(obs)
 
-        shoot_min = float(self.genes["shoot.min_distance"])
-        shoot_max = float(self.genes["shoot.max_distance"])
-        shoot_y_tol = float(self.genes["shoot.y_tolerance"])
-        shoot_dx_min = float(self.genes["shoot.dx_min"])
+        shoot_min = p.shoot_min_distance
+        shoot_max = p.shoot_max_distance
+        shoot_y_tol = p.shoot_y_tolerance
+        shoot_dx_min = p.shoot_dx_min
         want_shoot_window = arrows > 0 and (distance_v > shoot_min) and (distance_v < shoot_max) and (abs_dx > shoot_dx_min) and (abs_dy < shoot_y_tol)
 
-        melee_range = float(self.genes["melee.range"])
-        melee_intent_cd = float(self.genes["melee.intent_cooldown"])
+        melee_range = p.melee_range
+        melee_intent_cd = p.melee_intent_cooldown
         melee_intent = distance_v < melee_range and self.melee_cooldown_remaining <= 0.0
 
-        jump_dy = float(self.genes["jump.chase_dy"])
-        jump_intent_cd = float(self.genes["jump.intent_cooldown"])
+        jump_dy = p.jump_chase_dy
+        jump_intent_cd = p.jump_intent_cooldown
         jump_intent = (dy < -jump_dy) and (abs_dx > 80.0) and self.jump_cooldown_remaining <= 0.0
         if sensor_ceiling_distance < ceiling_block_distance:
             jump_intent = False
         if is_airborne_by_sensor:
             jump_intent = False
 
-        dash_use = bool(self.genes["dash.use"])
-        dash_range = float(self.genes["dash.range"])
-        dash_prob = float(self.genes["dash.probability"])
-        dash_cd = float(self.genes["dash.intent_cooldown"])
+        dash_use = p.dash_use
+        dash_range = p.dash_range
+        dash_prob = p.dash_probability
+        dash_cd = p.dash_intent_cooldown
         dash_intent = dash_use and (distance_v > dash_range) and (self.dash_cooldown_remaining <= 0.0) and (float(rng.random()) < dash_prob)
         if is_airborne_by_sensor:
             dash_intent = False
@@ -266,8 +300,8 @@ class ParamGenome:
 
         shoot_pressed = False
         shoot_is_pressed = False
-        hold_seconds = float(self.genes["shoot.hold_seconds"])
-        shoot_intent_cd = float(self.genes["shoot.intent_cooldown"])
+        hold_seconds = p.shoot_hold_seconds
+        shoot_intent_cd = p.shoot_intent_cooldown
         if self.shoot_release_frame:
             self.shoot_release_frame = False
             shoot_pressed = False
@@ -312,6 +346,37 @@ class ParamGenome:
         }
 
 
+def speciate(dist: np.ndarray, fitness: np.ndarray, threshold: float) -> np.ndarray:
+    # Líderes em ordem de fitness: cada genoma entra na espécie do líder mais forte a menos de `threshold`; quem
+    # não cabe em nenhuma vira líder de uma nova.
+    labels = np.full(len(fitness), -1, dtype=np.int64)
+    leaders: List[int] = []
+    for i in np.argsort(-fitness, kind="stable").tolist():
+        if leaders:
+            near = dist[i, leaders] < threshold
+            if near.any():
+                labels[i] = labels[leaders[int(np.argmax(near))]]
+                continue
+        labels[i] = len(leaders)
+        leaders.append(i)
+    return labels
+
+
+def diversity_stats(values: np.ndarray, dist: np.ndarray, labels: Optional[np.ndarray]) -> Dict[str, float]:
+    count = len(values)
+    pairs = dist[np.triu_indices(count, 1)]
+    stats = {
+        "mean_distance": float(pairs.mean()) if pairs.size else 0.0,
+        "min_distance": float(pairs.min()) if pairs.size else 0.0,
+        "gene_std": float(np.mean(np.std(normalized_array(values), axis=0))),
+    }
+    if labels is not None:
+        sizes = np.bincount(labels)
+        stats["species"] = float(len(sizes))
+        stats["largest_species"] = float(sizes.max()) / float(count)
+    return stats
+
+
 class ParamGATrainer:
     def __init__(
         self,
@@ -327,6 +392,10 @@ class ParamGATrainer:
         sweep_bonus: float,
         seed_genome: Optional[ParamGenome],
         min_diversity: float,
+        optimizer: str = "ga",
+        tpe: Optional[TPEOptimizer] = None,
+        species_threshold: float = 0.0,
+        species_elite: int = 1,
     ) -> None:
         self.rng = rng
         self.population_size = int(population)
@@ -339,6 +408,12 @@ class ParamGATrainer:
         self.reward_scale = max(1e-9, float(reward_scale))
         self.sweep_bonus = float(sweep_bonus)
         self.min_diversity = max(0.0, float(min_diversity))
+        self.tpe = tpe
+        self.species_threshold = max(0.0, float(species_threshold))
+        self.species_elite = max(0, int(species_elite))
+        self.diversity: Dict[str, float] = {}
+        self.species_stats: List[Dict[str, Any]] = []
+        self.optimizer = "tpe" if (str(optimizer) == "tpe" and tpe is not None) else "ga"
 
         if seed_genome is not None:
             seed_genome = seed_genome.clone()
@@ -348,9 +423,12 @@ class ParamGATrainer:
                 child.mutate(self.rng, mutation_rate, mutation_std)
                 self.population.append(child)
         else:
-            self.population = [ParamGenome(dict(defaults_v1()), {"created_from": "default"}) for _ in range(self.population_size)]
+            self.population = [ParamGenome(gene_layout().defaults, {"created_from": "default"}) for _ in range(self.population_size)]
             for g in self.population:
                 g.mutate(self.rng, 1.0, mutation_std)
+        if self.optimizer == "tpe" and self.tpe is not None and len(self.tpe) >= self.tpe.startup:
+            # Histórico de execuções anteriores: a primeira geração já sai do TPE (o seed fica no índice 0).
+            self.population[1:] = self._tpe_children(self.population_size - 1)
 
         self.fitness = [0.0 for _ in range(self.population_size)]
         self.episode_stats: List[Dict[str, Any]] = [{} for _ in range(self.population_size)]
@@ -508,125 +586,162 @@ class ParamGATrainer:
 
         return action_p1, advance
 
-    def _tournament_select_index(self, k: int = 3) -> int:
+    def _tournament_select_index(self, k: int = 3, fitness: Optional[List[float]] = None) -> int:
         if self.population_size <= 1:
             return 0
+        fitness = self.fitness if fitness is None else fitness
         k = max(2, min(int(k), self.population_size))
         candidates = [int(self.rng.randrange(self.population_size)) for _ in range(k)]
         best = int(candidates[0])
-        best_fit = float(self.fitness[best])
+        best_fit = float(fitness[best])
         for i in candidates[1:]:
-            fit = float(self.fitness[i])
+            fit = float(fitness[i])
             if fit > best_fit:
                 best = i
                 best_fit = fit
         return best
 
+    def _tpe_children(self, count: int) -> List[ParamGenome]:
+        proposals = self.tpe.propose(count, _np_rng(self.rng)) if self.tpe is not None else []
+        return [ParamGenome(values, {"created_from": "tpe"}) for values in proposals]
+
     def finalize_generation(self) -> Dict[str, float]:
+        if self.tpe is not None:
+            # Todo indivíduo avaliado vira observação (elites reavaliados também: o fitness é ruidoso).
+            self.tpe.observe(
+                ((g.values, f) for g, f in zip(self.population, self.fitness)),
+                {"generation": int(self.generation), "optimizer": self.optimizer},
+            )
         ranked = sorted(range(self.population_size), key=lambda i: self.fitness[i], reverse=True)
         best_idx = ranked[0]
         best_fit = float(self.fitness[best_idx])
         avg_fit = (float(sum(self.fitness)) / float(len(self.fitness))) if self.fitness else 0.0
 
-        elites = [self.population[i].clone() for i in ranked[: self.elite_size]]
+        values = np.stack([g.values for g in self.population])
+        fit = np.asarray(self.fitness, dtype=np.float64)
+        dist = distance_matrix(values)
+        labels = speciate(dist, fit, self.species_threshold) if self.species_threshold > 0.0 else None
+        self.diversity = diversity_stats(values, dist, labels)
+        select_fitness = self.fitness
+        elite_idx = ranked[: self.elite_size]
+        self.species_stats = []
+        if labels is not None:
+            # Fitness compartilhado: deslocado para >= 0 e dividido pelo tamanho da espécie, só na seleção.
+            sizes = np.bincount(labels)
+            select_fitness = ((fit - fit.min() + 1e-6) / sizes[labels]).tolist()
+            # Cada espécie guarda os seus `species_elite` melhores (até metade da população); o resto das vagas
+            # de elite, se sobrar, vai para os melhores no geral.
+            cap = max(self.elite_size, self.population_size // 2)
+            kept: Dict[int, int] = {}
+            elite_idx = []
+            for i in ranked:
+                label = int(labels[i])
+                if len(elite_idx) < cap and kept.get(label, 0) < self.species_elite:
+                    elite_idx.append(i)
+                    kept[label] = kept.get(label, 0) + 1
+            elite_idx += [i for i in ranked if i not in elite_idx][: max(0, self.elite_size - len(elite_idx))]
+            elite_idx.sort(key=lambda i: self.fitness[i], reverse=True)
+            for label in range(len(sizes)):
+                members = [i for i in ranked if int(labels[i]) == label]
+                self.species_stats.append(
+                    {
+                        "species": label,
+                        "size": int(sizes[label]),
+                        "best": float(self.fitness[members[0]]),
+                        "leader": int(members[0] + 1),
+                        "elites": int(kept.get(label, 0)),
+                    }
+                )
+
+        elites = [self.population[i].clone() for i in elite_idx]
         new_pop: List[ParamGenome] = []
         new_pop.extend(elites)
+        if self.optimizer == "tpe":
+            new_pop.extend(self._tpe_children(self.population_size - len(new_pop)))
 
+        # Genes já aceitos num bloco só: o teste de min_diversity é uma linha de distâncias por filho.
+        accepted = np.empty((self.population_size, values.shape[1]))
+        for i, g in enumerate(new_pop):
+            accepted[i] = g.values
         attempts = 0
         while len(new_pop) < self.population_size and attempts < self.population_size * 50:
             attempts += 1
-            parent_a = self.population[self._tournament_select_index()]
+            parent_a = self.population[self._tournament_select_index(fitness=select_fitness)]
             if self.use_crossover:
-                parent_b = self.population[self._tournament_select_index()]
+                parent_b = self.population[self._tournament_select_index(fitness=select_fitness)]
                 child = ParamGenome.crossover(self.rng, parent_a, parent_b)
             else:
                 child = parent_a.clone()
                 child.meta = {"created_from": "mutation"}
             child.mutate(self.rng, self.mutation_rate, self.mutation_std)
-            if self.min_diversity > 0.0:
-                ok = True
-                for existing in new_pop:
-                    if distance(existing.genes, child.genes) < self.min_diversity:
-                        ok = False
-                        break
-                if not ok:
-                    continue
+            if self.min_diversity > 0.0 and float(np.min(distances_to(child.values, accepted[: len(new_pop)]))) < self.min_diversity:
+                continue
+            accepted[len(new_pop)] = child.values
             new_pop.append(child)
 
         while len(new_pop) < self.population_size:
-            g = ParamGenome(dict(defaults_v1()), {"created_from": "random"})
+            g = ParamGenome(gene_layout().defaults, {"created_from": "random"})
             g.mutate(self.rng, 1.0, self.mutation_std)
             new_pop.append(g)
 
         self.population = new_pop
         self.generation += 1
         self._start_generation()
-        return {"best": best_fit, "avg": avg_fit, "best_ever": float(self.best_fitness)}
+        summary = {"best": best_fit, "avg": avg_fit, "best_ever": float(self.best_fitness), **self.diversity}
+        if self.tpe is not None:
+            summary["observations"] = float(len(self.tpe))
+        return summary
 
 
 class JsonlBridgeClient:
-    def __init__(self, host: str, port: int, connect_timeout: float) -> None:
+    # Mantido pela interface antiga; o I/O agora é o do bridge_client compartilhado pelos trainers.
+    def __init__(self, host: str, port: int, connect_timeout: float, drop_policy: str = DROP_NONE) -> None:
         self.host = host
         self.port = int(port)
         self.connect_timeout = float(connect_timeout)
-        self.sock: Optional[socket.socket] = None
-        self._buffer = b""
+        self.drop_policy = str(drop_policy)
+        self.client: Optional[BridgeClient] = None
 
     def connect(self) -> None:
-        start = time.time()
-        while True:
-            try:
-                s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                s.settimeout(self.connect_timeout)
-                s.connect((self.host, self.port))
-                s.setblocking(False)
-                self.sock = s
-                return
-            except Exception:
-                if time.time() - start > self.connect_timeout:
-                    raise
-                time.sleep(0.05)
+        self.close()
+        client = BridgeClient(
+            self.host,
+            [self.port],
+            connect_timeout=self.connect_timeout,
+            connect_retries=1,
+            drop_policy=self.drop_policy,
+        )
+        try:
+            client.connect()
+        except BaseException:
+            client.close()
+            raise
+        self.client = client
 
     def close(self) -> None:
-        if self.sock is not None:
+        if self.client is not None:
             try:
-                self.sock.close()
+                self.client.close()
             except Exception:
                 pass
-        self.sock = None
+        self.client = None
 
     def send(self, payload: Dict[str, Any]) -> None:
-        if self.sock is None:
+        if self.client is None:
             return
-        line = (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
-        self.sock.sendall(line)
+        self.client.send(payload)
+
+    @property
+    def dropped_steps(self) -> int:
+        return self.client.dropped_steps if self.client is not None else 0
 
     def poll(self, timeout: float = 0.0) -> List[Dict[str, Any]]:
-        if self.sock is None:
-            return []
-        r, _, _ = select.select([self.sock], [], [], timeout)
-        if not r:
+        if self.client is None or self.client.closed:
             return []
         try:
-            data = self.sock.recv(65536)
-        except Exception:
-            return []
-        if not data:
+            return [message for _, message in self.client.poll(timeout)]
+        except ConnectionError:
             return []
-        self._buffer += data
-        out: List[Dict[str, Any]] = []
-        while b"\n" in self._buffer:
-            line, self._buffer = self._buffer.split(b"\n", 1)
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line.decode("utf-8"))
-                if isinstance(obj, dict):
-                    out.append(obj)
-            except Exception:
-                continue
-        return out
 
 
 def main() -> int:
@@ -638,6 +753,7 @@ def main() -> int:
     parser.add_argument("--no-watch", action="store_true")
     parser.add_argument("--time-scale", type=float, default=8.0)
     parser.add_argument("--fixed-dt", type=float, default=1.0 / 60.0)
+    parser.add_argument("--action-repeat", type=int, default=1)
     parser.add_argument("--population", type=int, default=8)
     parser.add_argument("--elite", type=int, default=2)
     parser.add_argument("--episodes-per-genome", type=int, default=3)
@@ -650,6 +766,12 @@ def main() -> int:
     parser.add_argument("--crossover", action="store_true")
     parser.add_argument("--no-crossover", action="store_true")
     parser.add_argument("--connect-timeout", type=float, default=2.0)
+    parser.add_argument(
+        "--bridge-drop-policy",
+        default=DROP_NONE,
+        choices=DROP_POLICIES,
+        help="latest_step: se o trainer atrasar, responde só ao step mais novo (steps com done nunca são descartados)",
+    )
     parser.add_argument("--connect-retries", type=int, default=300)
     parser.add_argument("--connect-wait", type=float, default=0.1)
     parser.add_argument("--idle-timeout", type=float, default=30.0)
@@ -659,6 +781,14 @@ def main() -> int:
     parser.add_argument("--load-path", default="")
     parser.add_argument("--handmade-config-path", default="")
     parser.add_argument("--min-diversity", type=float, default=0.0)
+    parser.add_argument("--species-threshold", type=float, default=0.0, help="distância do schema para a mesma espécie (0 = sem especiação)")
+    parser.add_argument("--species-elite", type=int, default=1)
+    parser.add_argument("--optimizer", default="ga", choices=("ga", "tpe"))
+    parser.add_argument("--tpe-history", default="", help="JSONL de (genes, fitness) compartilhado entre execuções")
+    parser.add_argument("--tpe-gamma", type=float, default=0.25)
+    parser.add_argument("--tpe-startup", type=int, default=12)
+    parser.add_argument("--tpe-candidates", type=int, default=64)
+    parser.add_argument("--tpe-max-history", type=int, default=MAX_HISTORY, help="avaliações usadas pelo TPE (melhores + mais recentes; 0 = todas)")
     parser.add_argument("--quiet", action="store_true")
     parser.add_argument("--opponent", default="handmade")
     parser.add_argument("--opponent-load-path", default="")
@@ -669,6 +799,8 @@ def main() -> int:
     parser.add_argument("--live-rounds", action="store_true")
     parser.add_argument("--pretty-md9", action="store_true")
     parser.add_argument("--match-title", default="")
+    parser.add_argument("--report-to", default="")
+    parser.add_argument("--report-id", default="")
     args = parser.parse_args()
 
     use_crossover = bool(args.crossover) and not bool(args.no_crossover)
@@ -688,6 +820,24 @@ def main() -> int:
     if seed_genome is None:
         seed_genome = ParamGenome.seed_from_handmade(handmade_payload)
 
+    tpe: Optional[TPEOptimizer] = None
+    tpe_history = _resolve_path(project_root, str(args.tpe_history or ""))
+    if str(args.optimizer) == "tpe" or tpe_history:
+        # Fitness só é comparável com o mesmo oponente e a mesma fórmula; o resto do histórico é ignorado.
+        opponent_ref = Path(str(args.opponent_load_path)).name if args.opponent_load_path else ""
+        context = (
+            f"ga_params_v1|{args.opponent}|{opponent_ref}|ww={float(args.win_weight):g}"
+            f"|rs={float(args.reward_scale):g}|sb={float(args.sweep_bonus):g}"
+        )
+        tpe = TPEOptimizer(
+            tpe_history,
+            context=context,
+            gamma=float(args.tpe_gamma),
+            startup=int(args.tpe_startup),
+            candidates=int(args.tpe_candidates),
+            max_history=int(args.tpe_max_history),
+        )
+
     trainer = ParamGATrainer(
         rng=rng,
         population=int(args.population),
@@ -701,164 +851,201 @@ def main() -> int:
         sweep_bonus=float(args.sweep_bonus),
         seed_genome=seed_genome,
         min_diversity=float(args.min_diversity),
+        optimizer=str(args.optimizer),
+        tpe=tpe,
+        species_threshold=float(args.species_threshold),
+        species_elite=int(args.species_elite),
     )
 
-    client = JsonlBridgeClient(str(args.host), int(args.port), float(args.connect_timeout))
-    last_err: Optional[BaseException] = None
-    for _ in range(max(1, int(args.connect_retries))):
-        try:
-            client.connect()
-            last_err = None
-            break
-        except BaseException as exc:
-            last_err = exc
-            time.sleep(max(0.0, float(args.connect_wait)))
-    if last_err is not None:
-        raise last_err
-    client.send({"type": "hello", "protocol": 1})
-
-    last_recv = time.time()
-    configured = False
-    ga_metrics: Dict[str, Any] = {}
-    generation_target = int(args.generations)
-    save_path = _resolve_path(project_root, str(args.save_path or ""))
-    result_path = _resolve_path(project_root, str(args.result_path or ""))
-    log_path = _resolve_path(project_root, str(args.log_path or ""))
-    match_title = str(args.match_title or "").strip()
-
-    def emit_stdout(line: str) -> None:
-        if bool(args.quiet):
-            return
-        sys.stdout.write(line + "\n")
-        sys.stdout.flush()
-
-    def emit_config() -> None:
-        nonlocal configured
-        configured = True
-        client.send(
-            {
-                "type": "config",
-                "watch_mode": False,
-                "time_scale": float(args.time_scale),
-                "ga_state": trainer.get_ga_state(),
-                "action_version": 1,
-                "notes": "ga_params_v1_vs_handmade",
-            }
-        )
+    client = JsonlBridgeClient(str(args.host), int(args.port), float(args.connect_timeout), str(args.bridge_drop_policy))
+    try:
+        last_err: Optional[BaseException] = None
+        for _ in range(max(1, int(args.connect_retries))):
+            try:
+                client.connect()
+                last_err = None
+                break
+            except BaseException as exc:
+                last_err = exc
+                time.sleep(max(0.0, float(args.connect_wait)))
+        if last_err is not None:
+            raise last_err
+        client.send({"type": "hello", "protocol": 1})
+
+        last_recv = time.time()
+        configured = False
+        lean_steps = False
+        vector_obs = False
+        obs_layout: Optional[ObsLayout] = None
+        ga_metrics: Dict[str, Any] = {}
+        generation_target = int(args.generations)
+        save_path = _resolve_path(project_root, str(args.save_path or ""))
+        result_path = _resolve_path(project_root, str(args.result_path or ""))
+        log_path = _resolve_path(project_root, str(args.log_path or ""))
+        match_title = str(args.match_title or "").strip()
+        reporter = ResultReporter(str(args.report_to), str(args.report_id))
+
+        def finish_result(payload: Dict[str, Any]) -> None:
+            if result_path:
+                write_json(result_path, payload)
+            reporter.result(payload)
+            reporter.close()
 
-    def maybe_save_best(extra: Dict[str, Any]) -> None:
-        if not save_path:
-            return
-        best = trainer.best_genome.clone() if trainer.best_genome else None
-        if best is None:
-            return
-        payload = best.to_dict()
-        payload_meta = payload.get("meta", {}) if isinstance(payload.get("meta"), dict) else {}
-        payload_meta.update(extra)
-        payload["meta"] = payload_meta
-        write_json(save_path, payload)
-
-    def log_line(obj: Dict[str, Any]) -> None:
-        if not log_path:
-            return
-        p = Path(log_path)
-        p.parent.mkdir(parents=True, exist_ok=True)
-        with p.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(obj, ensure_ascii=False) + "\n")
-
-    emit_config()
-
-    while True:
-        msgs = client.poll(0.05)
-        if msgs:
-            last_recv = time.time()
-        for msg in msgs:
-            msg_type = str(msg.get("type", ""))
-            if msg_type == "step":
-                obs = msg.get("obs", {}) if isinstance(msg.get("obs"), dict) else {}
-                done = bool(msg.get("done", False))
-                metrics = msg.get("metrics", {}) if isinstance(msg.get("metrics"), dict) else {}
-                step_dt = float(msg.get("dt", msg.get("delta", args.fixed_dt)) or args.fixed_dt)
-                action_p1, advanced = trainer.step(obs, metrics, done, step_dt)
-                client.send({"type": "action", "actions": {"1": action_p1}})
-
-                ga_metrics = {
+        def emit_stdout(line: str) -> None:
+            if bool(args.quiet):
+                return
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+
+        def emit_config() -> None:
+            nonlocal configured
+            configured = True
+            client.send(
+                {
+                    "type": "config",
+                    "watch_mode": False,
+                    "time_scale": float(args.time_scale),
                     "ga_state": trainer.get_ga_state(),
-                    "generation": int(trainer.generation),
-                    "individual": int(trainer.current_index + 1),
-                    "population": int(trainer.population_size),
-                    "best_ever": float(trainer.best_fitness),
+                    "action_version": 1,
+                    "action_repeat": max(1, int(args.action_repeat)),
+                    "notes": "ga_params_v1_vs_handmade",
+                    **({"step_mode": "lean"} if lean_steps else {}),
+                    **({"obs_format": "vector"} if vector_obs else {}),
                 }
-                if bool(args.live_rounds) and done:
-                    winner = 0
-                    if isinstance(metrics, dict):
-                        try:
-                            winner = int(metrics.get("last_winner", 0))
-                        except Exception:
-                            winner = 0
-                    prefix = f"[MATCH] {match_title} " if match_title else "[MATCH] "
-                    emit_stdout(f"{prefix}winner={winner} best_ever={trainer.best_fitness:.4f}")
-
-                if bool(args.live_rounds) and advanced:
-                    last = max(0, int(trainer.current_index - 1))
-                    stats = trainer.episode_stats[last] if 0 <= last < len(trainer.episode_stats) else {}
-                    fval = float(stats.get("fitness", 0.0)) if isinstance(stats, dict) else 0.0
-                    avg_score = float(stats.get("avg_score", 0.0)) if isinstance(stats, dict) else 0.0
-                    wins = int(stats.get("wins", 0)) if isinstance(stats, dict) else 0
-                    losses = int(stats.get("losses", 0)) if isinstance(stats, dict) else 0
-                    prefix = f"[ROUND] {match_title} " if match_title else "[ROUND] "
-                    emit_stdout(f"{prefix}ind={last+1}/{trainer.population_size} fitness={fval:.4f} avg_score={avg_score:.2f} w={wins} l={losses}")
-                if advanced and trainer.current_index >= trainer.population_size:
-                    summary = trainer.finalize_generation()
-                    log_line(
-                        {
-                            "type": "generation_end",
-                            "generation": int(trainer.generation - 1),
-                            "summary": summary,
-                            "best_stats": dict(trainer.best_stats),
-                        }
-                    )
-                    maybe_save_best({"saved_at_gen": int(trainer.generation - 1), "best_fitness": float(trainer.best_fitness)})
-                    if bool(args.pretty_md9):
-                        md9 = f"G{int(trainer.generation - 1)} best={summary.get('best_ever', 0.0):.4f} avg={summary.get('avg', 0.0):.4f}"
-                        if match_title:
-                            md9 = f"{match_title} | {md9}"
-                        emit_stdout("MD9: " + md9)
-                    emit_config()
-                    if generation_target > 0 and int(trainer.generation) > int(generation_target):
-                        if result_path:
-                            write_json(
-                                result_path,
+            )
+
+        def maybe_save_best(extra: Dict[str, Any]) -> None:
+            if not save_path:
+                return
+            best = trainer.best_genome.clone() if trainer.best_genome else None
+            if best is None:
+                return
+            payload = best.to_dict()
+            payload_meta = payload.get("meta", {}) if isinstance(payload.get("meta"), dict) else {}
+            payload_meta.update(extra)
+            payload["meta"] = payload_meta
+            write_json(save_path, payload)
+
+        def log_line(obj: Dict[str, Any]) -> None:
+            if not log_path:
+                return
+            p = Path(log_path)
+            p.parent.mkdir(parents=True, exist_ok=True)
+            with p.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+
+        emit_config()
+
+        while True:
+            msgs = client.poll(0.05)
+            if msgs:
+                last_recv = time.time()
+            for msg in msgs:
+                msg_type = str(msg.get("type", ""))
+                if msg_type == "step":
+                    reporter.count_steps()
+                    obs = msg.get("obs", {}) if isinstance(msg.get("obs"), dict) else {}
+                    if obs_layout is not None:
+                        obs = {key: decode_obs(value, obs_layout) for key, value in obs.items()}
+                    done = bool(msg.get("done", False))
+                    metrics = msg.get("metrics", {}) if isinstance(msg.get("metrics"), dict) else {}
+                    # Com action_repeat cada step cobre "frames" frames do jogo.
+                    window_dt = float(args.fixed_dt) * max(1, int(msg.get("frames", 1) or 1))
+                    step_dt = float(msg.get("dt", msg.get("delta", window_dt)) or window_dt)
+                    action_p1, advanced = trainer.step(obs, metrics, done, step_dt)
+                    client.send({"type": "action", "actions": {"1": action_p1}})
+
+                    ga_metrics = {
+                        "ga_state": trainer.get_ga_state(),
+                        "generation": int(trainer.generation),
+                        "individual": int(trainer.current_index + 1),
+                        "population": int(trainer.population_size),
+                        "best_ever": float(trainer.best_fitness),
+                    }
+                    if bool(args.live_rounds) and done:
+                        winner = 0
+                        if isinstance(metrics, dict):
+                            try:
+                                winner = int(metrics.get("last_winner", 0))
+                            except Exception:
+                                winner = 0
+                        prefix = f"[MATCH] {match_title} " if match_title else "[MATCH] "
+                        emit_stdout(f"{prefix}winner={winner} best_ever={trainer.best_fitness:.4f}")
+
+                    if bool(args.live_rounds) and advanced:
+                        last = max(0, int(trainer.current_index - 1))
+                        stats = trainer.episode_stats[last] if 0 <= last < len(trainer.episode_stats) else {}
+                        fval = float(stats.get("fitness", 0.0)) if isinstance(stats, dict) else 0.0
+                        avg_score = float(stats.get("avg_score", 0.0)) if isinstance(stats, dict) else 0.0
+                        wins = int(stats.get("wins", 0)) if isinstance(stats, dict) else 0
+                        losses = int(stats.get("losses", 0)) if isinstance(stats, dict) else 0
+                        prefix = f"[ROUND] {match_title} " if match_title else "[ROUND] "
+                        emit_stdout(f"{prefix}ind={last+1}/{trainer.population_size} fitness={fval:.4f} avg_score={avg_score:.2f} w={wins} l={losses}")
+                    if advanced and trainer.current_index >= trainer.population_size:
+                        summary = trainer.finalize_generation()
+                        log_line(
+                            {
+                                "type": "generation_end",
+                                "generation": int(trainer.generation - 1),
+                                "summary": summary,
+                                "best_stats": dict(trainer.best_stats),
+                                **({"species": list(trainer.species_stats)} if trainer.species_stats else {}),
+                                **({"dropped_steps": client.dropped_steps} if client.dropped_steps else {}),
+                            }
+                        )
+                        maybe_save_best({"saved_at_gen": int(trainer.generation - 1), "best_fitness": float(trainer.best_fitness)})
+                        reporter.progress(trainer.generation - 1, summary)
+                        if bool(args.pretty_md9):
+                            md9 = f"G{int(trainer.generation - 1)} best={summary.get('best_ever', 0.0):.4f} avg={summary.get('avg', 0.0):.4f}"
+                            if match_title:
+                                md9 = f"{match_title} | {md9}"
+                            emit_stdout("MD9: " + md9)
+                        emit_config()
+                        if generation_target > 0 and int(trainer.generation) > int(generation_target):
+                            finish_result(
                                 {
                                     "ok": True,
                                     "best_fitness": float(trainer.best_fitness),
                                     "best_stats": dict(trainer.best_stats),
                                     "generations": int(trainer.generation - 1),
                                     "schema_id": "ga_params_v1",
-                                },
+                                }
                             )
-                        return 0
-
-
-            elif msg_type == "save_model":
-                meta = msg.get("meta", {}) if isinstance(msg.get("meta"), dict) else {}
-                maybe_save_best({"saved_from": "save_model", **dict(meta)})
-            elif msg_type == "ping":
-                client.send({"type": "pong"})
-
-        if time.time() - last_recv > float(args.idle_timeout):
-            if result_path:
-                write_json(
-                    result_path,
+                            return 0
+
+
+                elif msg_type == "save_model":
+                    meta = msg.get("meta", {}) if isinstance(msg.get("meta"), dict) else {}
+                    maybe_save_best({"saved_from": "save_model", **dict(meta)})
+                elif msg_type == "ping":
+                    client.send({"type": "pong"})
+                elif msg_type == "obs_schema":
+                    obs_layout = layout_from_schema(msg)
+                elif msg_type == "hello":
+                    # Métricas só são lidas no done; com protocolo 2 pede steps enxutos e obs vetorial.
+                    upgrade = False
+                    if supports(msg, CAP_LEAN_STEPS) and not lean_steps:
+                        lean_steps = True
+                        upgrade = True
+                    if supports(msg, CAP_OBS_VECTOR) and not vector_obs:
+                        vector_obs = True
+                        upgrade = True
+                    if upgrade:
+                        emit_config()
+
+            if time.time() - last_recv > float(args.idle_timeout):
+                finish_result(
                     {
                         "ok": False,
                         "error": "idle_timeout",
                         "best_fitness": float(trainer.best_fitness),
                         "best_stats": dict(trainer.best_stats),
                         "schema_id": "ga_params_v1",
-                    },
+                    }
                 )
-            return 2
+                return 2
+    finally:
+        client.close()
 
 
 if __name__ == "__main__":
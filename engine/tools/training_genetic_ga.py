@@ -3,8 +3,6 @@ import json
 import math
 import os
 import re
-import socket
-import select
 import sys
 import time
 from pathlib import Path
@@ -12,9 +10,15 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 
-POS_SCALE = 1000.0
-VEL_SCALE = 1000.0
+from bridge_client import CAP_LEAN_STEPS, CAP_OBS_VECTOR, BridgeClient, supports
+from fitness_cache import CACHE_POLICIES, FitnessCache, context_digest, weights_digest
+from genome_io import read_genome, write_genome
+from obs_features import ObsLayout, decode_obs, get_extractor, layout_from_schema, obs_version_of
+from result_stream import ResultReporter
+
 AXIS_OPTIONS = (-1.0, 0.0, 1.0)
+# Chaves que o trainer lê da obs fora das features (idle, mira, heurística do oponente, cooldowns).
+OBS_VECTOR_KEYS = ("frame", "delta", "delta_position", "self.is_dead", "match")
 AIM_DIRS = (
     (1.0, 0.0),
     (1.0, -1.0),
@@ -36,57 +40,8 @@ def to_vec2(value: Any) -> Tuple[float, float]:
     return 0.0, 0.0
 
 
-def _bool(value: Any) -> float:
-    return 1.0 if bool(value) else 0.0
-
-
 def obs_to_features(obs: Dict[str, Any]) -> np.ndarray:
-    delta_x, delta_y = to_vec2(obs.get("delta_position", [0.0, 0.0]))
-    distance = math.hypot(delta_x, delta_y)
-
-    self_state = obs.get("self", {}) if isinstance(obs.get("self"), dict) else {}
-    opp_state = obs.get("opponent", {}) if isinstance(obs.get("opponent"), dict) else {}
-    match_state = obs.get("match", {}) if isinstance(obs.get("match"), dict) else {}
-
-    self_pos = to_vec2(self_state.get("position", [0.0, 0.0]))
-    opp_pos = to_vec2(opp_state.get("position", [0.0, 0.0]))
-    self_vel = to_vec2(self_state.get("velocity", [0.0, 0.0]))
-    opp_vel = to_vec2(opp_state.get("velocity", [0.0, 0.0]))
-
-    wins = match_state.get("wins", {}) if isinstance(match_state.get("wins"), dict) else {}
-    def _win(key: int) -> float:
-        if key in wins:
-            return float(wins.get(key, 0.0))
-        return float(wins.get(str(key), 0.0))
-
-    features = [
-        delta_x / POS_SCALE,
-        delta_y / POS_SCALE,
-        distance / POS_SCALE,
-        self_pos[0] / POS_SCALE,
-        self_pos[1] / POS_SCALE,
-        self_vel[0] / VEL_SCALE,
-        self_vel[1] / VEL_SCALE,
-        float(self_state.get("facing", 1)),
-        _bool(self_state.get("on_floor", False)),
-        _bool(self_state.get("on_wall", False)),
-        float(self_state.get("arrows", 0)),
-        _bool(self_state.get("is_dead", False)),
-        opp_pos[0] / POS_SCALE,
-        opp_pos[1] / POS_SCALE,
-        opp_vel[0] / VEL_SCALE,
-        opp_vel[1] / VEL_SCALE,
-        float(opp_state.get("facing", 1)),
-        _bool(opp_state.get("on_floor", False)),
-        _bool(opp_state.get("on_wall", False)),
-        float(opp_state.get("arrows", 0)),
-        _bool(opp_state.get("is_dead", False)),
-        _bool(match_state.get("round_active", False)),
-        _bool(match_state.get("match_over", False)),
-        _win(1),
-        _win(2),
-    ]
-    return np.asarray(features, dtype=np.float32)
+    return get_extractor(obs_version_of(obs)).extract(obs)
 
 
 def compute_aim(obs: Dict[str, Any]) -> Tuple[float, float]:
@@ -143,6 +98,34 @@ def aim_bins_default() -> int:
     return int(len(AIM_DIRS))
 
 
+def is_idle_obs(obs: Dict[str, Any]) -> bool:
+    self_state = obs.get("self", {}) if isinstance(obs.get("self"), dict) else {}
+    match_state = obs.get("match", {}) if isinstance(obs.get("match"), dict) else {}
+    if bool(self_state.get("is_dead", False)):
+        return True
+    return "round_active" in match_state and not bool(match_state.get("round_active"))
+
+
+def idle_action(obs: Dict[str, Any]) -> Dict[str, Any]:
+    aim_x, aim_y = compute_aim(obs)
+    return {
+        "axis": 0.0,
+        "aim": [aim_x, aim_y],
+        "jump_pressed": False,
+        "shoot_pressed": False,
+        "shoot_is_pressed": False,
+        "melee_pressed": False,
+        "ult_pressed": False,
+        "dash_pressed": [],
+        "actions": {
+            "left": False,
+            "right": False,
+            "up": False,
+            "down": False,
+        },
+    }
+
+
 class Genome:
     def __init__(self, weights: List[np.ndarray], mutation_steps: int = 0) -> None:
         self.weights = weights
@@ -228,28 +211,11 @@ class Genome:
         return x @ w3 + b3
 
     def act(self, obs: Dict[str, Any], learn_aim: bool, aim_bins: int) -> Dict[str, Any]:
-        self_state = obs.get("self", {}) if isinstance(obs.get("self"), dict) else {}
-        match_state = obs.get("match", {}) if isinstance(obs.get("match"), dict) else {}
-        if bool(self_state.get("is_dead", False)) or ("round_active" in match_state and not bool(match_state.get("round_active"))):
-            aim_x, aim_y = compute_aim(obs)
-            return {
-                "axis": 0.0,
-                "aim": [aim_x, aim_y],
-                "jump_pressed": False,
-                "shoot_pressed": False,
-                "shoot_is_pressed": False,
-                "melee_pressed": False,
-                "ult_pressed": False,
-                "dash_pressed": [],
-                "actions": {
-                    "left": False,
-                    "right": False,
-                    "up": False,
-                    "down": False,
-                },
-            }
-        features = obs_to_features(obs)
-        output = self.forward(features)
+        if is_idle_obs(obs):
+            return idle_action(obs)
+        return self.act_from_output(obs, self.forward(obs_to_features(obs)), learn_aim, aim_bins)
+
+    def act_from_output(self, obs: Dict[str, Any], output: np.ndarray, learn_aim: bool, aim_bins: int) -> Dict[str, Any]:
         axis_idx = int(np.argmax(output[:3]))
         axis_value = AXIS_OPTIONS[axis_idx]
 
@@ -342,6 +308,9 @@ class Genome:
     def to_dict(self) -> Dict[str, Any]:
         return {"weights": [w.tolist() for w in self.weights], "meta": {"mutation_steps": int(self.mutation_steps)}}
 
+    def to_payload(self) -> Dict[str, Any]:
+        return {"weights": list(self.weights), "meta": {"mutation_steps": int(self.mutation_steps)}}
+
     @classmethod
     def from_dict(cls, payload: Dict[str, Any]) -> "Genome":
         weights_payload = payload.get("weights", [])
@@ -351,6 +320,70 @@ class Genome:
         return cls(weights, mutation_steps=mutation_steps)
 
 
+class PopulationTensor:
+    def __init__(self, genomes: List[Genome]) -> None:
+        if not genomes:
+            raise ValueError("PopulationTensor precisa de pelo menos um genoma")
+        self.size = len(genomes)
+        stacked = [np.stack([g.weights[i] for g in genomes]).astype(np.float32, copy=False) for i in range(6)]
+        self.w1, self.b1, self.w2, self.b2, self.w3, self.b3 = stacked
+        self.input_dim = int(self.w1.shape[1])
+        self.output_dim = int(self.w3.shape[2])
+
+    @staticmethod
+    def compatible(genomes: List[Genome]) -> bool:
+        if not genomes:
+            return False
+        ref = genomes[0].weights
+        if len(ref) != 6:
+            return False
+        shapes = [w.shape for w in ref]
+        return all(len(g.weights) == 6 and [w.shape for w in g.weights] == shapes for g in genomes)
+
+    def accepts(self, genome: Genome) -> bool:
+        shapes = [self.w1.shape[1:], self.b1.shape[1:], self.w2.shape[1:], self.b2.shape[1:], self.w3.shape[1:], self.b3.shape[1:]]
+        return len(genome.weights) == 6 and [w.shape for w in genome.weights] == shapes
+
+    def set_slot(self, slot: int, genome: Genome) -> None:
+        for stacked, w in zip((self.w1, self.b1, self.w2, self.b2, self.w3, self.b3), genome.weights):
+            stacked[slot] = w
+
+    def forward(self, features: np.ndarray, slots: Optional[np.ndarray] = None) -> np.ndarray:
+        x = np.asarray(features, dtype=np.float32)
+        if slots is None:
+            w1, b1, w2, b2, w3, b3 = self.w1, self.b1, self.w2, self.b2, self.w3, self.b3
+        else:
+            idx = np.asarray(slots, dtype=np.intp)
+            w1, b1, w2, b2, w3, b3 = self.w1[idx], self.b1[idx], self.w2[idx], self.b2[idx], self.w3[idx], self.b3[idx]
+        x = np.tanh(np.einsum("ni,nih->nh", x, w1) + b1)
+        x = np.tanh(np.einsum("ni,nih->nh", x, w2) + b2)
+        return np.einsum("ni,nih->nh", x, w3) + b3
+
+
+class ArenaSlot:
+    def __init__(self, arena_id: int, episodes_per_genome: int) -> None:
+        self.arena_id = int(arena_id)
+        self.index = -1
+        self.episode = 0
+        self.score = 0.0
+        self.wins = 0
+        self.losses = 0
+        self.target = max(1, int(episodes_per_genome))
+        self.opponent_genome: Optional[Genome] = None
+
+    @property
+    def active(self) -> bool:
+        return self.index >= 0
+
+    def reset(self, episodes_per_genome: int) -> None:
+        self.index = -1
+        self.episode = 0
+        self.score = 0.0
+        self.wins = 0
+        self.losses = 0
+        self.target = max(1, int(episodes_per_genome))
+
+
 class GeneticTrainer:
     def __init__(
         self,
@@ -374,6 +407,15 @@ class GeneticTrainer:
         sweep_bonus: float = 0.0,
         learn_aim: bool = False,
         aim_bins: int = 0,
+        batched_forward: bool = False,
+        fitness_cache: Optional[FitnessCache] = None,
+        cache_generation_offset: int = 0,
+        allow_full_cache_skip: bool = False,
+        racing: bool = False,
+        racing_min_episodes: int = 1,
+        racing_margin: float = 0.05,
+        racing_max_extra: int = 0,
+        arenas: int = 1,
     ) -> None:
         self.rng = rng
         self.population_size = population_size
@@ -385,6 +427,29 @@ class GeneticTrainer:
         self.use_crossover = crossover
         self.learn_aim = bool(learn_aim)
         self.aim_bins = int(aim_bins)
+        self.batched_forward = bool(batched_forward)
+        self.population_tensor: Optional[PopulationTensor] = None
+        self.feature_extractor = get_extractor()
+        self._feature_buffer = self.feature_extractor.new_buffer(2)
+        self.fitness_cache = fitness_cache
+        self.cache_generation_offset = int(cache_generation_offset)
+        self.allow_full_cache_skip = bool(allow_full_cache_skip)
+        self.cache_skipped = 0
+        self._pool_signature: Optional[str] = None
+        self.racing = bool(racing)
+        self.racing_min_episodes = max(1, int(racing_min_episodes))
+        self.racing_margin = max(0.0, float(racing_margin))
+        self.racing_max_extra = max(0, int(racing_max_extra))
+        self.racing_cuts = 0
+        self.racing_extra_episodes = 0
+        self._racing_budget = 0
+        self._generation_best = -float("inf")
+        self._best_episode_score = -float("inf")
+        self._evaluated_in_generation = 0
+        # Cada arena (instância do Godot) avalia um indivíduo por vez; os indivíduos são distribuídos sob demanda.
+        self.arenas = [ArenaSlot(i, self.episodes_per_genome) for i in range(max(1, int(arenas)))]
+        self._next_index = 0
+        self._completed = 0
 
         if seed_genome is not None:
             seed_genome = seed_genome.ensure_dims(self.rng, input_dim, hidden_dim, output_dim)
@@ -401,9 +466,6 @@ class GeneticTrainer:
 
         self.fitness = [0.0 for _ in range(population_size)]
         self.episode_stats: List[Dict[str, Any]] = [{} for _ in range(population_size)]
-        self.current_index = 0
-        self.current_episode = 0
-        self.current_score = 0.0
         self.generation = 1
         self.best_genome: Optional[Genome] = seed_genome.clone() if seed_genome else None
         self.best_fitness = -float("inf")
@@ -417,8 +479,6 @@ class GeneticTrainer:
         self.win_weight = max(0.0, min(1.0, float(win_weight)))
         self.reward_scale = max(1e-9, float(reward_scale))
         self.sweep_bonus = float(sweep_bonus)
-        self._wins = 0
-        self._losses = 0
         self._start_generation()
 
     def _select_opponent_from_pool(self) -> Optional[Genome]:
@@ -436,20 +496,28 @@ class GeneticTrainer:
         if self.opponent_pool_mode == "round_robin":
             self._opponent_pool_index += 1
 
-    def get_ga_state(self, mutation_rate: float, mutation_std: float) -> Dict[str, Any]:
-        if self.population_size > 0:
-            safe_index = min(max(self.current_index, 0), self.population_size - 1)
-            p1_genome = self.population[safe_index]
-            individual_value = min(self.current_index + 1, self.population_size)
-        else:
-            p1_genome = None
-            individual_value = 0
+    def arena_genome(self, arena_id: int = 0) -> Optional[Genome]:
+        if self.population_size <= 0:
+            return None
+        arena = self.arenas[arena_id]
+        index = arena.index if arena.active else self._next_index
+        return self.population[min(max(index, 0), self.population_size - 1)]
+
+    def arena_individual(self, arena_id: int = 0) -> int:
+        arena = self.arenas[arena_id]
+        index = arena.index if arena.active else self.population_size
+        return int(min(index + 1, self.population_size))
+
+    def get_ga_state(self, mutation_rate: float, mutation_std: float, arena_id: int = 0) -> Dict[str, Any]:
+        arena = self.arenas[arena_id]
+        p1_genome = self.arena_genome(arena_id)
+        individual_value = self.arena_individual(arena_id) if p1_genome is not None else 0
         p1_state = {
             "generation": int(self.generation),
             "individual": int(individual_value),
             "population": int(self.population_size),
-            "episode_in_individual": int(self.current_episode + 1),
-            "episodes_per_genome": int(self.episodes_per_genome),
+            "episode_in_individual": int(arena.episode + 1),
+            "episodes_per_genome": int(arena.target),
             "mutation_steps": int(p1_genome.mutation_steps) if p1_genome is not None else 0,
             "mutation_rate": float(mutation_rate),
             "mutation_std": float(mutation_std),
@@ -461,22 +529,22 @@ class GeneticTrainer:
             p2_state.update(
                 {
                     "generation": int(self.generation),
-                    "individual": int(self.current_index + 1),
-                    "episode_in_individual": int(self.current_episode + 1),
-                    "episodes_per_genome": int(self.episodes_per_genome),
+                    "individual": int(individual_value),
+                    "episode_in_individual": int(arena.episode + 1),
+                    "episodes_per_genome": int(arena.target),
                     "mutation_steps": int(p1_genome.mutation_steps) if p1_genome is not None else 0,
                     "mutation_rate": float(mutation_rate),
                     "mutation_std": float(mutation_std),
                 }
             )
-        elif p2_mode == "best" and self.opponent_genome is not None:
+        elif p2_mode == "best" and arena.opponent_genome is not None:
             p2_state.update(
                 {
                     "generation": int(self.generation),
                     "individual": 0,
                     "episode_in_individual": 0,
                     "episodes_per_genome": 0,
-                    "mutation_steps": int(self.opponent_genome.mutation_steps),
+                    "mutation_steps": int(arena.opponent_genome.mutation_steps),
                     "mutation_rate": float(mutation_rate),
                     "mutation_std": float(mutation_std),
                 }
@@ -497,11 +565,8 @@ class GeneticTrainer:
         return {"1": p1_state, "2": p2_state}
 
     def _start_generation(self) -> None:
-        self.current_index = 0
-        self.current_episode = 0
-        self.current_score = 0.0
-        self._wins = 0
-        self._losses = 0
+        self._next_index = 0
+        self._completed = 0
         self.fitness = [0.0 for _ in range(self.population_size)]
         self.episode_stats = [{} for _ in range(self.population_size)]
         if self.opponent_mode == "best":
@@ -519,15 +584,162 @@ class GeneticTrainer:
 
         for genome in self.population:
             genome.reset_controls()
-        if self.opponent_genome is not None:
-            self.opponent_genome.reset_controls()
+        for arena in self.arenas:
+            arena.reset(self.episodes_per_genome)
+            arena.opponent_genome = self.opponent_genome.clone() if self.opponent_genome is not None else None
+            if arena.opponent_genome is not None:
+                arena.opponent_genome.reset_controls()
+        self._rebuild_population_tensor()
+        self._evaluated_in_generation = 0
+        self._racing_budget = 0
+        self._generation_best = -float("inf")
+        self._best_episode_score = -float("inf")
+        for arena in self.arenas:
+            self._dispatch(arena)
+
+    def generation_complete(self) -> bool:
+        return self._completed >= self.population_size
+
+    def _dispatch(self, arena: ArenaSlot) -> bool:
+        arena.reset(self.episodes_per_genome)
+        while self._next_index < self.population_size:
+            index = self._next_index
+            self._next_index += 1
+            if self._apply_cached_fitness(index):
+                continue
+            arena.index = index
+            self.population[index].reset_controls()
+            return True
+        return False
+
+    def _opponent_signature(self) -> str:
+        if self.opponent_mode != "best":
+            return str(self.opponent_mode)
+        if self.fixed_opponent_pool:
+            if self._pool_signature is None:
+                pool_sig = weights_digest(w for g in self.fixed_opponent_pool for w in g.weights)
+                self._pool_signature = f"pool:{self.opponent_pool_mode}:{pool_sig}"
+            return self._pool_signature
+        if self.opponent_genome is None:
+            return "heuristic"
+        return f"genome:{weights_digest(self.opponent_genome.weights)}"
+
+    def _apply_cached_fitness(self, index: int) -> bool:
+        if self.fitness_cache is None:
+            return False
+        last = index == self.population_size - 1
+        in_flight = any(arena.active for arena in self.arenas)
+        if last and self._evaluated_in_generation == 0 and not in_flight and not self.allow_full_cache_skip:
+            return False
+        genome_sig = weights_digest(self.population[index].weights)
+        record = self.fitness_cache.lookup(genome_sig, self._opponent_signature(), self.cache_generation_offset + self.generation)
+        if record is None:
+            return False
+        self.fitness[index] = float(record.fitness)
+        self._generation_best = max(self._generation_best, float(record.fitness))
+        stats = dict(record.stats)
+        stats["cached"] = True
+        self.episode_stats[index] = stats
+        self._completed += 1
+        self.cache_skipped += 1
+        return True
+
+    def _store_fitness(self, index: int, fitness: float, stats: Dict[str, Any]) -> float:
+        if self.fitness_cache is None:
+            return fitness
+        record = self.fitness_cache.store(
+            weights_digest(self.population[index].weights),
+            self._opponent_signature(),
+            fitness,
+            int(stats.get("episodes", self.episodes_per_genome)),
+            self.cache_generation_offset + self.generation,
+            stats,
+        )
+        return float(record.fitness)
 
-    def _select_opponent_action(self, obs: Dict[str, Any]) -> Dict[str, Any]:
-        if self.opponent_mode == "mirror":
-            return self.population[self.current_index].act(obs, self.learn_aim, self.aim_bins)
-        if self.opponent_mode == "best" and self.opponent_genome is not None:
-            return self.opponent_genome.act(obs, self.learn_aim, self.aim_bins)
-        return heuristic_action(obs)
+    def _opponent_slot(self, arena: ArenaSlot) -> int:
+        if arena.opponent_genome is None:
+            return -1
+        return len(self.population) + arena.arena_id
+
+    def _rebuild_population_tensor(self) -> None:
+        self.population_tensor = None
+        if not self.batched_forward or not PopulationTensor.compatible(self.population):
+            return
+        genomes = list(self.population)
+        # Oponentes de cada arena ficam depois da população (slot = população + arena_id) quando cabem no mesmo shape.
+        opponents = [arena.opponent_genome for arena in self.arenas]
+        if all(g is not None for g in opponents) and PopulationTensor.compatible([genomes[0]] + opponents):
+            genomes.extend(opponents)
+        self.population_tensor = PopulationTensor(genomes)
+
+    def _set_arena_opponent(self, arena: ArenaSlot, genome: Optional[Genome]) -> None:
+        arena.opponent_genome = genome
+        tensor = self.population_tensor
+        slot = self._opponent_slot(arena)
+        if tensor is not None and genome is not None and 0 <= slot < tensor.size and tensor.accepts(genome):
+            tensor.set_slot(slot, genome)
+            return
+        self._rebuild_population_tensor()
+
+    def _slot_genome(self, slot: int) -> Genome:
+        if slot >= len(self.population):
+            opponent = self.arenas[slot - len(self.population)].opponent_genome
+            if opponent is not None:
+                return opponent
+        return self.population[slot]
+
+    def act_slots(self, slots: List[int], observations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        actions: List[Dict[str, Any]] = [{} for _ in slots]
+        active: List[int] = []
+        for i, obs in enumerate(observations):
+            if is_idle_obs(obs):
+                actions[i] = idle_action(obs)
+            else:
+                active.append(i)
+        if not active:
+            return actions
+        if len(active) > self._feature_buffer.shape[0]:
+            self._feature_buffer = self.feature_extractor.new_buffer(len(active))
+        features = self.feature_extractor.extract_batch([observations[i] for i in active], self._feature_buffer)
+        tensor = self.population_tensor
+        if tensor is not None and all(slots[i] < tensor.size for i in active):
+            outputs = tensor.forward(features, np.asarray([slots[i] for i in active], dtype=np.intp))
+        else:
+            outputs = [self._slot_genome(slots[i]).forward(features[row]) for row, i in enumerate(active)]
+        for row, i in enumerate(active):
+            genome = self._slot_genome(slots[i])
+            actions[i] = genome.act_from_output(observations[i], outputs[row], self.learn_aim, self.aim_bins)
+        return actions
+
+    def _select_actions_batch(
+        self, requests: List[Tuple[ArenaSlot, Dict[str, Any], Dict[str, Any]]]
+    ) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        # Junta P1/P2 de todas as arenas num único act_slots para o forward em lote cobrir todas as instâncias.
+        results: List[List[Dict[str, Any]]] = [[{}, {}] for _ in requests]
+        slots: List[int] = []
+        observations: List[Dict[str, Any]] = []
+        targets: List[Tuple[int, int]] = []
+        for i, (arena, obs_p1, obs_p2) in enumerate(requests):
+            if not arena.active:
+                # Arena sem indivíduo (fim de geração aguardando as outras): joga parada até o próximo reset.
+                results[i] = [idle_action(obs_p1), idle_action(obs_p2)]
+                continue
+            slots.append(arena.index)
+            observations.append(obs_p1)
+            targets.append((i, 0))
+            if self.opponent_mode == "mirror":
+                slots.append(arena.index)
+            elif self.opponent_mode == "best" and arena.opponent_genome is not None:
+                slots.append(self._opponent_slot(arena))
+            else:
+                results[i][1] = heuristic_action(obs_p2)
+                continue
+            observations.append(obs_p2)
+            targets.append((i, 1))
+        for (i, player), action in zip(targets, self.act_slots(slots, observations)):
+            results[i][player] = action
+        return [(pair[0], pair[1]) for pair in results]
 
     def _extract_match_score(self, metrics: Dict[str, Any], player_id: int = 1) -> float:
         if not isinstance(metrics, dict):
@@ -559,6 +771,30 @@ class GeneticTrainer:
             return float(score_payload[key])
         return 0.0
 
+    def _composite_fitness(self, score_sum: float, wins: int, losses: int, episodes: int) -> float:
+        avg_score = score_sum / float(max(1, episodes))
+        score_component = math.tanh(avg_score / self.reward_scale)
+        win_component = float(wins - losses) / float(max(1, episodes))
+        return (1.0 - self.win_weight) * score_component + self.win_weight * win_component
+
+    def _racing_is_hopeless(self, arena: ArenaSlot) -> bool:
+        if arena.episode < self.racing_min_episodes or self._generation_best == -float("inf"):
+            return False
+        # Limite otimista: os episódios restantes viram vitórias com o melhor placar já visto na geração.
+        remaining = max(0, arena.target - arena.episode)
+        optimistic_score = arena.score + remaining * self._best_episode_score
+        upper = self._composite_fitness(optimistic_score, arena.wins + remaining, arena.losses, arena.target)
+        upper += max(0.0, self.sweep_bonus)
+        return upper < self._generation_best - self.racing_margin
+
+    def _racing_is_contender(self, arena: ArenaSlot) -> bool:
+        if self._racing_budget <= 0 or self._generation_best == -float("inf"):
+            return False
+        if arena.target - self.episodes_per_genome >= self.racing_max_extra:
+            return False
+        estimate = self._composite_fitness(arena.score, arena.wins, arena.losses, arena.episode)
+        return abs(estimate - self._generation_best) <= self.racing_margin
+
     def _tournament_select_index(self, tournament_size: int = 3) -> int:
         if self.population_size <= 1:
             return 0
@@ -575,89 +811,116 @@ class GeneticTrainer:
         return best
 
     def step(self, obs: Dict[str, Any], metrics: Dict[str, Any], done: bool) -> Tuple[Dict[str, Any], Dict[str, Any], bool]:
-        obs_p1 = obs.get("1", {}) if isinstance(obs.get("1"), dict) else {}
-        obs_p2 = obs.get("2", {}) if isinstance(obs.get("2"), dict) else {}
-
-        action_p1 = self.population[self.current_index].act(obs_p1, self.learn_aim, self.aim_bins)
-        action_p2 = self._select_opponent_action(obs_p2)
-
-        advance = False
-        if done:
+        return self.step_arenas([(0, obs, metrics, done)])[0]
+
+    def step_arenas(
+        self, items: List[Tuple[int, Dict[str, Any], Dict[str, Any], bool]]
+    ) -> List[Tuple[Dict[str, Any], Dict[str, Any], bool]]:
+        requests: List[Tuple[ArenaSlot, Dict[str, Any], Dict[str, Any]]] = []
+        for arena_id, obs, _, _ in items:
+            obs_p1 = obs.get("1", {}) if isinstance(obs.get("1"), dict) else {}
+            obs_p2 = obs.get("2", {}) if isinstance(obs.get("2"), dict) else {}
+            requests.append((self.arenas[arena_id], obs_p1, obs_p2))
+        actions = self._select_actions_batch(requests)
+
+        results: List[Tuple[Dict[str, Any], Dict[str, Any], bool]] = []
+        for (arena, _, _), (_, _, metrics, done), (action_p1, action_p2) in zip(requests, items, actions):
+            advance = self._finish_episode(arena, metrics) if done else False
+            results.append((action_p1, action_p2, advance))
+        return results
+
+    def _finish_episode(self, arena: ArenaSlot, metrics: Dict[str, Any]) -> bool:
+        if not arena.active:
+            return False
+        try:
+            self.population[arena.index].reset_controls()
+        except Exception:
+            pass
+        if arena.opponent_genome is not None:
             try:
-                self.population[self.current_index].reset_controls()
+                arena.opponent_genome.reset_controls()
             except Exception:
                 pass
-            if self.opponent_genome is not None:
-                try:
-                    self.opponent_genome.reset_controls()
-                except Exception:
-                    pass
-            reward_p1 = self._extract_episode_reward(metrics, 1)
-            reward_p2 = self._extract_episode_reward(metrics, 2)
-            score_p1 = self._extract_match_score(metrics, 1)
-            if score_p1 == 0.0 and reward_p1 == 0.0 and reward_p2 == 0.0:
-                score_p1 = reward_p1
-            self.current_score += score_p1
-
-            winner = 0
+        reward_p1 = self._extract_episode_reward(metrics, 1)
+        reward_p2 = self._extract_episode_reward(metrics, 2)
+        score_p1 = self._extract_match_score(metrics, 1)
+        if score_p1 == 0.0 and reward_p1 == 0.0 and reward_p2 == 0.0:
+            score_p1 = reward_p1
+        arena.score += score_p1
+
+        winner = 0
+        if isinstance(metrics, dict):
+            try:
+                winner = int(metrics.get("last_winner", 0))
+            except Exception:
+                winner = 0
+        if winner not in (1, 2):
+            s1 = self._extract_match_score(metrics, 1)
+            s2 = self._extract_match_score(metrics, 2)
+            if s1 > s2:
+                winner = 1
+            elif s2 > s1:
+                winner = 2
+        if winner == 1:
+            arena.wins += 1
+        elif winner == 2:
+            arena.losses += 1
+
+        arena.episode += 1
+        self._best_episode_score = max(self._best_episode_score, score_p1)
+        finished = arena.episode >= arena.target
+        if finished and self.racing and self._racing_is_contender(arena):
+            arena.target += 1
+            self._racing_budget -= 1
+            self.racing_extra_episodes += 1
+            finished = False
+        elif not finished and self.racing and self._racing_is_hopeless(arena):
+            self._racing_budget += arena.target - arena.episode
+            self.racing_cuts += 1
+            finished = True
+        advance = False
+        if finished:
+            episodes_played = max(1, arena.episode)
+            avg_score = arena.score / float(episodes_played)
+            composite = self._composite_fitness(arena.score, arena.wins, arena.losses, episodes_played)
+
+            if self.sweep_bonus != 0.0 and isinstance(metrics, dict):
+                last_round_obj = metrics.get("last_round")
+                if isinstance(last_round_obj, dict):
+                    wins_obj = last_round_obj.get("wins")
+                    if isinstance(wins_obj, dict):
+                        try:
+                            w1 = int(wins_obj.get(1, wins_obj.get("1", 0)))
+                            w2 = int(wins_obj.get(2, wins_obj.get("2", 0)))
+                            if w1 == 5 and w2 == 0:
+                                composite += float(self.sweep_bonus)
+                        except Exception:
+                            pass
+            stats_snapshot: Dict[str, Any] = {}
             if isinstance(metrics, dict):
-                try:
-                    winner = int(metrics.get("last_winner", 0))
-                except Exception:
-                    winner = 0
-            if winner not in (1, 2):
-                s1 = self._extract_match_score(metrics, 1)
-                s2 = self._extract_match_score(metrics, 2)
-                if s1 > s2:
-                    winner = 1
-                elif s2 > s1:
-                    winner = 2
-            if winner == 1:
-                self._wins += 1
-            elif winner == 2:
-                self._losses += 1
-
-            self.current_episode += 1
-            if self.current_episode >= self.episodes_per_genome:
-                avg_score = self.current_score / float(self.episodes_per_genome)
-                score_component = math.tanh(avg_score / self.reward_scale)
-                win_component = float(self._wins - self._losses) / float(self.episodes_per_genome)
-                composite = (1.0 - self.win_weight) * score_component + self.win_weight * win_component
-
-                if self.sweep_bonus != 0.0 and isinstance(metrics, dict):
-                    last_round_obj = metrics.get("last_round")
-                    if isinstance(last_round_obj, dict):
-                        wins_obj = last_round_obj.get("wins")
-                        if isinstance(wins_obj, dict):
-                            try:
-                                w1 = int(wins_obj.get(1, wins_obj.get("1", 0)))
-                                w2 = int(wins_obj.get(2, wins_obj.get("2", 0)))
-                                if w1 == 5 and w2 == 0:
-                                    composite += float(self.sweep_bonus)
-                            except Exception:
-                                pass
-                self.fitness[self.current_index] = composite
-                stats_snapshot: Dict[str, Any] = {}
-                if isinstance(metrics, dict):
-                    last_round = metrics.get("last_round")
-                    if isinstance(last_round, dict):
-                        stats_snapshot["last_round"] = dict(last_round)
-                stats_snapshot["wins"] = int(self._wins)
-                stats_snapshot["losses"] = int(self._losses)
-                stats_snapshot["avg_score"] = float(avg_score)
-                stats_snapshot["fitness"] = float(composite)
-                self.episode_stats[self.current_index] = stats_snapshot
-                self.current_index += 1
-                self.current_episode = 0
-                self.current_score = 0.0
-                self._wins = 0
-                self._losses = 0
-                advance = True
-
-            if self.opponent_mode == "best" and self.fixed_opponent_pool:
-                self._advance_opponent_pool()
-                self.opponent_genome = self._select_opponent_from_pool()
-        return action_p1, action_p2, advance
+                last_round = metrics.get("last_round")
+                if isinstance(last_round, dict):
+                    stats_snapshot["last_round"] = dict(last_round)
+            stats_snapshot["wins"] = int(arena.wins)
+            stats_snapshot["losses"] = int(arena.losses)
+            stats_snapshot["avg_score"] = float(avg_score)
+            stats_snapshot["episodes"] = int(episodes_played)
+            stats_snapshot["fitness"] = float(composite)
+            index = arena.index
+            self.fitness[index] = self._store_fitness(index, composite, stats_snapshot)
+            self.episode_stats[index] = stats_snapshot
+            self._completed += 1
+            self._evaluated_in_generation += 1
+            self._generation_best = max(self._generation_best, float(self.fitness[index]))
+            arena.reset(self.episodes_per_genome)
+            advance = True
+
+        if self.opponent_mode == "best" and self.fixed_opponent_pool:
+            self._advance_opponent_pool()
+            self._set_arena_opponent(arena, self._select_opponent_from_pool())
+        if advance:
+            self._dispatch(arena)
+        return advance
 
     def finalize_generation(self) -> Dict[str, float]:
         ranked = sorted(range(self.population_size), key=lambda i: self.fitness[i], reverse=True)
@@ -706,25 +969,20 @@ class GeneticTrainer:
 
 def save_genome(path: str, genome: Genome) -> None:
     ensure_parent_dir(path)
-    payload = genome.to_dict()
-    with open(path, "w", encoding="utf-8") as file:
-        json.dump(payload, file)
+    write_genome(path, genome.to_payload())
 
 
 def save_genome_with_meta(path: str, genome: Genome, meta: Dict[str, Any]) -> None:
     ensure_parent_dir(path)
-    payload = genome.to_dict()
+    payload = genome.to_payload()
     payload_meta = payload.get("meta", {}) if isinstance(payload.get("meta"), dict) else {}
     payload_meta.update(meta)
     payload["meta"] = payload_meta
-    with open(path, "w", encoding="utf-8") as file:
-        json.dump(payload, file)
+    write_genome(path, payload)
 
 
 def load_genome(path: str) -> Genome:
-    with open(path, "r", encoding="utf-8") as file:
-        payload = json.load(file)
-    return Genome.from_dict(payload)
+    return Genome.from_dict(read_genome(path))
 
 
 def ensure_parent_dir(path: str) -> None:
@@ -790,9 +1048,17 @@ def _resolve_path(project_root: Path, value: str) -> str:
     return str(project_root / path)
 
 
-def send_message(sock_file, payload: Dict[str, Any]) -> None:
-    sock_file.write((json.dumps(payload) + "\n").encode("utf-8"))
-    sock_file.flush()
+def parse_ports(value: Any) -> List[int]:
+    if isinstance(value, (list, tuple)):
+        items = [str(v) for v in value]
+    else:
+        items = str(value or "").split(",")
+    ports: List[int] = []
+    for item in items:
+        item = item.strip()
+        if item:
+            ports.append(int(item))
+    return ports
 
 
 def sanitize_model_name(value: str) -> str:
@@ -835,16 +1101,94 @@ def main() -> int:
     parser.add_argument("--config-dir", default=str(config_dir))
     parser.add_argument("--host", default=cfg_get(training_cfg, "host", "127.0.0.1"))
     parser.add_argument("--port", default=cfg_get(training_cfg, "port", 9009), type=int)
+    parser.add_argument(
+        "--ports",
+        default=cfg_get(training_cfg, "ports", ""),
+        help="Lista de portas separadas por vírgula: um trainer dirige várias instâncias do Godot (uma arena por porta)",
+    )
     parser.add_argument("--connect-retries", default=60, type=int)
     parser.add_argument("--connect-wait", default=0.1, type=float)
     parser.add_argument("--connect-timeout", default=2.0, type=float)
     parser.add_argument("--idle-timeout", default=30.0, type=float)
+    parser.add_argument(
+        "--lean-steps",
+        default=cfg_get(training_cfg, "lean_steps", True),
+        action=argparse.BooleanOptionalAction,
+        help="Pede ao Godot steps sem metrics/info fora do done (ignorado com --live-rounds/--debug-steps, que leem metrics a cada frame)",
+    )
+    parser.add_argument(
+        "--obs-vector",
+        default=cfg_get(training_cfg, "obs_vector", True),
+        action=argparse.BooleanOptionalAction,
+        help="Pede ao Godot a obs como vetor de floats (obs_format vector); ignorado com --live-rounds/--debug-steps",
+    )
+    parser.add_argument(
+        "--action-repeat",
+        default=cfg_get(training_cfg, "action_repeat", 1),
+        type=int,
+        help="Frame-skip: o Godot repete a última ação por K frames e manda um step por janela (reward acumulada)",
+    )
+    parser.add_argument(
+        "--reconnect",
+        default=cfg_get(training_cfg, "reconnect", 0),
+        type=int,
+        help="Quantas vezes reconectar a uma arena que caiu ou ficou sem mensagens antes de desistir",
+    )
     parser.add_argument(
         "--learn-aim",
         default=cfg_get(ga_cfg, "learn_aim", False),
         action=argparse.BooleanOptionalAction,
     )
     parser.add_argument("--aim-bins", default=cfg_get(ga_cfg, "aim_bins", aim_bins_default()), type=int)
+    parser.add_argument(
+        "--batched-forward",
+        default=cfg_get(ga_cfg, "batched_forward", False),
+        action=argparse.BooleanOptionalAction,
+        help="Empilha os pesos da população e calcula as ações de P1/P2 com um único forward em lote",
+    )
+    parser.add_argument(
+        "--fitness-cache",
+        default=cfg_get(ga_cfg, "fitness_cache", ""),
+        help="Arquivo do cache de fitness (genoma + oponente + regras). Vazio = desativado",
+    )
+    parser.add_argument(
+        "--fitness-cache-load",
+        action="append",
+        default=[],
+        help="Cache extra só para leitura (pode repetir). Usado pelo orquestrador para compartilhar entre rodadas",
+    )
+    parser.add_argument(
+        "--fitness-cache-policy",
+        default=cfg_get(ga_cfg, "fitness_cache_policy", "every_n"),
+        choices=CACHE_POLICIES,
+        help="never = nunca reavalia; every_n = reavalia a cada N gerações; blend = reavalia e faz média com as amostras antigas",
+    )
+    parser.add_argument("--fitness-cache-every", default=cfg_get(ga_cfg, "fitness_cache_every", 5), type=int)
+    parser.add_argument(
+        "--fitness-cache-context",
+        default=cfg_get(ga_cfg, "fitness_cache_context", ""),
+        help="Identificador das regras da partida (o orquestrador passa o hash das match rules)",
+    )
+    parser.add_argument("--fitness-cache-generation-offset", default=0, type=int)
+    parser.add_argument(
+        "--racing",
+        default=cfg_get(ga_cfg, "racing", False),
+        action=argparse.BooleanOptionalAction,
+        help="Corta cedo indivíduos sem chance contra o melhor da geração e repassa os episódios poupados aos candidatos próximos",
+    )
+    parser.add_argument("--racing-min-episodes", default=cfg_get(ga_cfg, "racing_min_episodes", 1), type=int)
+    parser.add_argument(
+        "--racing-margin",
+        default=cfg_get(ga_cfg, "racing_margin", 0.05),
+        type=float,
+        help="Folga de fitness para cortar (abaixo do melhor - margem) e para considerar candidato próximo",
+    )
+    parser.add_argument(
+        "--racing-max-extra-episodes",
+        default=cfg_get(ga_cfg, "racing_max_extra_episodes", -1),
+        type=int,
+        help="Máximo de episódios extras por indivíduo (-1 = episodes_per_genome)",
+    )
     parser.add_argument(
         "--watch",
         default=cfg_get(training_cfg, "watch", False),
@@ -910,9 +1254,9 @@ def main() -> int:
     parser.add_argument(
         "--save-path",
         default=cfg_get(ga_cfg, "save_path", "BOTS/IA/weights/best_genome.json"),
-        help="Save best genome path (json)",
+        help="Save best genome path (.json ou .genome binário)",
     )
-    parser.add_argument("--load-path", default=cfg_get(ga_cfg, "load_path", ""), help="Load genome path (json)")
+    parser.add_argument("--load-path", default=cfg_get(ga_cfg, "load_path", ""), help="Load genome path (.json ou .genome)")
     parser.add_argument(
         "--log-path",
         default=cfg_get(ga_cfg, "log_path", "BOTS/IA/logs/genetic_log.csv"),
@@ -945,6 +1289,8 @@ def main() -> int:
         help="Título usado nos logs bonitos (ex: 'G12 N276 vs bobo2 (G3_N51)')",
     )
     parser.add_argument("--quiet", action="store_true", help="Reduz logs no stdout")
+    parser.add_argument("--report-to", default="", help="host:porta do orquestrador para progresso/resultado em stream")
+    parser.add_argument("--report-id", default="")
     args = parser.parse_args()
 
     if args.generation_per_round:
@@ -954,6 +1300,8 @@ def main() -> int:
 
     rng = np.random.default_rng(args.seed if args.seed != 0 else None)
 
+    ports = parse_ports(args.ports) or [int(args.port)]
+
     debug_steps_remaining = int(args.debug_steps)
 
     live_rounds = bool(args.live_rounds)
@@ -990,6 +1338,7 @@ def main() -> int:
     load_path = _resolve_path(project_root, args.load_path)
     log_path = _resolve_path(project_root, args.log_path)
     result_path = _resolve_path(project_root, args.result_path)
+    reporter = ResultReporter(str(args.report_to), str(args.report_id))
 
     seed_genome = None
     if load_path:
@@ -1008,6 +1357,30 @@ def main() -> int:
             if not args.quiet:
                 print(f"[trainer] oponente inválido ({opponent_load_path}): {exc}")
 
+    action_repeat = max(1, int(args.action_repeat))
+    fitness_cache: Optional[FitnessCache] = None
+    fitness_cache_path = _resolve_path(project_root, str(args.fitness_cache or ""))
+    if fitness_cache_path:
+        fitness_context = context_digest(
+            {
+                "rules": str(args.fitness_cache_context or ""),
+                "episodes_per_genome": int(args.episodes_per_genome),
+                "win_weight": float(args.win_weight),
+                "reward_scale": float(args.reward_scale),
+                "sweep_bonus": float(args.sweep_bonus),
+                "learn_aim": bool(args.learn_aim),
+                # Só entra quando != 1 para não invalidar caches já gravados.
+                **({"action_repeat": action_repeat} if action_repeat != 1 else {}),
+            }
+        )
+        fitness_cache = FitnessCache(str(args.fitness_cache_policy), int(args.fitness_cache_every), fitness_context)
+        for p in [fitness_cache_path] + [str(x) for x in (args.fitness_cache_load or [])]:
+            resolved = _resolve_path(project_root, p)
+            if resolved and os.path.exists(resolved):
+                loaded = fitness_cache.load(resolved, mark_dirty=(p == fitness_cache_path))
+                if not args.quiet:
+                    print(f"[trainer] cache de fitness: {loaded} entradas de {resolved}")
+
     opponent_pool: List[Genome] = []
     pool_paths: List[str] = []
     if isinstance(args.opponent_pool_path, list):
@@ -1050,93 +1423,155 @@ def main() -> int:
         sweep_bonus=float(args.sweep_bonus),
         learn_aim=learn_aim,
         aim_bins=aim_bins,
+        batched_forward=bool(args.batched_forward),
+        fitness_cache=fitness_cache,
+        cache_generation_offset=int(args.fitness_cache_generation_offset),
+        allow_full_cache_skip=int(args.generations) > 0,
+        racing=bool(args.racing),
+        racing_min_episodes=int(args.racing_min_episodes),
+        racing_margin=float(args.racing_margin),
+        racing_max_extra=int(args.episodes_per_genome) if int(args.racing_max_extra_episodes) < 0 else int(args.racing_max_extra_episodes),
+        arenas=len(ports),
     )
 
-    config = {
-        "type": "config",
-        "watch_mode": bool(args.watch),
-        "time_scale": float(args.time_scale),
-        "ga_state": trainer.get_ga_state(args.mutation_rate, args.mutation_std),
-        "action_version": 2 if learn_aim else 1,
-    }
+    lean_requested = bool(args.lean_steps) and not live_rounds and int(args.debug_steps) <= 0
+    lean_arenas: set = set()
+    vector_requested = bool(args.obs_vector) and not live_rounds and int(args.debug_steps) <= 0
+    vector_arenas: set = set()
+    obs_layouts: Dict[int, ObsLayout] = {}
+
+    def arena_config(arena_id: int, handshake: bool = False) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "type": "config",
+            "watch_mode": bool(args.watch),
+            "time_scale": float(args.time_scale),
+            "ga_state": trainer.get_ga_state(args.mutation_rate, args.mutation_std, arena_id),
+        }
+        if handshake:
+            payload["action_version"] = 2 if learn_aim else 1
+            payload["action_repeat"] = action_repeat
+            if arena_id in lean_arenas:
+                payload["step_mode"] = "lean"
+            if arena_id in vector_arenas:
+                payload["obs_format"] = "vector"
+        return payload
 
     generations_limit = int(args.generations)
     done_generations = 0
 
+    def finish_generation() -> None:
+        nonlocal done_generations
+        stats = trainer.finalize_generation()
+        done_generations += 1
+        if not args.quiet:
+            cached_note = f" | cache {trainer.cache_skipped}" if fitness_cache is not None else ""
+            racing_note = f" | cortes {trainer.racing_cuts} extras {trainer.racing_extra_episodes}" if trainer.racing else ""
+            print(
+                f"gen {trainer.generation - 1} | best {stats['best']:.3f} | "
+                f"avg {stats['avg']:.3f} | best_ever {stats['best_ever']:.3f}{cached_note}{racing_note}"
+            )
+            sys.stdout.flush()
+
+        if save_path and trainer.best_genome is not None:
+            save_genome(save_path, trainer.best_genome)
+        if fitness_cache is not None:
+            fitness_cache.save(fitness_cache_path, dirty_only=True)
+        reporter.progress(trainer.generation - 1, stats)
+        append_generation_log(
+            log_path,
+            trainer.generation - 1,
+            stats,
+            args.population,
+            args.elite,
+            args.mutation_rate,
+            args.mutation_std,
+            args.episodes_per_genome,
+            args.opponent,
+            args.crossover,
+        )
+
+    def generations_exhausted() -> bool:
+        return generations_limit > 0 and done_generations >= generations_limit
+
+    # Gerações inteiramente cobertas pelo cache (ex.: elites repetidos entre rodadas) fecham sem abrir partida.
+    while trainer.generation_complete() and not generations_exhausted():
+        finish_generation()
+
     exit_code = 0
     last_error = ""
+    def report_invalid(arena_id: int, text: str) -> None:
+        if not args.quiet:
+            print(f"[trainer] ignorando linha inválida: {text[:80]}")
+
+    idle_timeout = max(0.1, float(args.idle_timeout))
+    client = BridgeClient(
+        str(args.host),
+        ports,
+        connect_timeout=float(args.connect_timeout),
+        connect_retries=int(args.connect_retries),
+        connect_wait=float(args.connect_wait),
+        idle_timeout=idle_timeout,
+        reconnect=int(args.reconnect),
+        on_invalid=report_invalid,
+    )
     try:
-        sock = None
-        connect_timeout = max(0.1, float(args.connect_timeout))
-        for _ in range(max(1, int(args.connect_retries))):
-            try:
-                sock = socket.create_connection((args.host, args.port), timeout=connect_timeout)
-                break
-            except OSError:
-                time.sleep(max(0.0, float(args.connect_wait)))
-        if sock is None:
-            raise ConnectionError("Falha ao conectar")
-
-        with sock:
-            sock.settimeout(None)
-            sock_file = sock.makefile("rwb")
-            send_message(sock_file, config)
-
-            idle_timeout = max(0.1, float(args.idle_timeout))
-            last_message_at = time.time()
-
-            while True:
-                ready, _, _ = select.select([sock], [], [], idle_timeout)
-                if not ready:
-                    raise ConnectionError("Timeout aguardando mensagens do jogo")
-                line = sock_file.readline()
-                if not line:
-                    break
-
-                text = line.decode("utf-8", errors="ignore").strip()
-                if "{" in text and not text.startswith("{"):
-                    text = text[text.index("{") :]
-                if not text:
-                    continue
+        client.connect()
+        for arena_id in range(len(ports)):
+            client.send(arena_config(arena_id, True), arena_id)
 
-                try:
-                    message = json.loads(text)
-                except json.JSONDecodeError:
-                    if not args.quiet:
-                        print(f"[trainer] ignorando linha inválida: {text[:80]}")
-                    continue
-
-                last_message_at = time.time()
+        while not generations_exhausted() and not client.closed:
+            received = client.poll(idle_timeout)
+            if not received:
+                raise ConnectionError("Timeout aguardando mensagens do jogo")
 
+            pending_steps: Dict[int, List[Dict[str, Any]]] = {}
+            for arena_id, message in received:
                 msg_type = message.get("type")
 
                 if msg_type == "hello":
-                    send_message(sock_file, config)
+                    if lean_requested and supports(message, CAP_LEAN_STEPS):
+                        lean_arenas.add(arena_id)
+                    if vector_requested and supports(message, CAP_OBS_VECTOR):
+                        vector_arenas.add(arena_id)
+                    obs_layouts.pop(arena_id, None)
+                    client.send(arena_config(arena_id, True), arena_id)
+                    continue
+
+                if msg_type == "obs_schema":
+                    layout = layout_from_schema(message, OBS_VECTOR_KEYS)
+                    if layout is not None:
+                        obs_layouts[arena_id] = layout
+                    continue
+
+                if msg_type == "reconnected":
+                    # A partida em curso nessa arena foi perdida: recomeça o episódio do indivíduo atual.
+                    pending_steps.pop(arena_id, None)
+                    client.send({"type": "reset"}, arena_id)
                     continue
 
                 if msg_type == "save_model":
                     player_id = int(message.get("player_id", 1))
                     raw_name = str(message.get("name", ""))
                     safe_name = sanitize_model_name(raw_name)
+                    individual = trainer.arena_individual(arena_id)
                     if not safe_name:
-                        safe_name = f"p{player_id}_gen{trainer.generation}_ind{min(trainer.current_index + 1, trainer.population_size)}"
+                        safe_name = f"p{player_id}_gen{trainer.generation}_ind{individual}"
                     filename = safe_name if safe_name.endswith(".json") else f"{safe_name}.json"
 
                     target_genome: Optional[Genome] = None
+                    arena_genome = trainer.arena_genome(arena_id)
                     if player_id == 1:
-                        if trainer.population_size > 0:
-                            safe_index = min(max(trainer.current_index, 0), trainer.population_size - 1)
-                            target_genome = trainer.population[safe_index].clone()
+                        if arena_genome is not None:
+                            target_genome = arena_genome.clone()
                     elif player_id == 2:
                         if trainer.opponent_mode == "mirror":
-                            if trainer.population_size > 0:
-                                safe_index = min(max(trainer.current_index, 0), trainer.population_size - 1)
-                                target_genome = trainer.population[safe_index].clone()
-                        elif trainer.opponent_mode == "best" and trainer.opponent_genome is not None:
-                            target_genome = trainer.opponent_genome.clone()
+                            if arena_genome is not None:
+                                target_genome = arena_genome.clone()
+                        elif trainer.opponent_mode == "best" and trainer.arenas[arena_id].opponent_genome is not None:
+                            target_genome = trainer.arenas[arena_id].opponent_genome.clone()
 
                     if target_genome is None:
-                        send_message(sock_file, {"type": "event", "text": f"Falha ao salvar modelo: bot {player_id} sem genoma"})
+                        client.send({"type": "event", "text": f"Falha ao salvar modelo: bot {player_id} sem genoma"}, arena_id)
                         continue
 
                     out_dir = project_root / "BOTS" / "IA" / "weights" / "models"
@@ -1148,125 +1583,141 @@ def main() -> int:
                             "saved_name": safe_name,
                             "player_id": player_id,
                             "generation": int(trainer.generation),
-                            "individual": int(min(trainer.current_index + 1, trainer.population_size)),
+                            "individual": int(individual),
                             "opponent_mode": str(trainer.opponent_mode),
                             "timestamp": int(time.time()),
                         },
                     )
 
                     rel = out_path.relative_to(project_root) if out_path.is_absolute() else out_path
-                    send_message(sock_file, {"type": "event", "text": f"Modelo salvo: {rel}"})
-                    continue
-
-                if msg_type != "step":
+                    client.send({"type": "event", "text": f"Modelo salvo: {rel}"}, arena_id)
                     continue
 
-                obs = message.get("obs", {}) if isinstance(message.get("obs"), dict) else {}
-                metrics = message.get("metrics", {}) if isinstance(message.get("metrics"), dict) else {}
-                done = bool(message.get("done", False))
-
-                if live_rounds and isinstance(obs, dict):
-                    try:
-                        o1 = obs.get("1")
-                        if isinstance(o1, dict):
-                            match_state = o1.get("match") if isinstance(o1.get("match"), dict) else {}
-                            wins = match_state.get("wins") if isinstance(match_state.get("wins"), dict) else {}
-                            w1 = int(wins.get(1, wins.get("1", 0)))
-                            w2 = int(wins.get(2, wins.get("2", 0)))
-                            match_over = bool(match_state.get("match_over", False))
-                            now_wins = (w1, w2)
-                            score1 = _extract_live_score(metrics, 1)
-                            score2 = _extract_live_score(metrics, 2)
-
-                            if last_wins is None:
-                                match_index += 1
-                                last_wins = now_wins
-                                last_match_over = match_over
-                                last_live_score = (score1, score2)
-                                if pretty_md9:
-                                    title = match_title if match_title else "MD9"
-                                    print("MD9: ___________")
-                                    print(f"MD9: Começando MD9 | {title} | Match #{match_index}")
-                                    print("MD9: Resultados de cada round")
+                if msg_type == "step":
+                    pending_steps.setdefault(arena_id, []).append(message)
+
+            # Uma rodada por vez com no máximo um step de cada arena: o forward em lote cobre todas as instâncias
+            # e um done processado antes nunca afeta outro step da mesma arena na mesma chamada.
+            while pending_steps and not generations_exhausted():
+                batch = [(arena_id, queue.pop(0)) for arena_id, queue in pending_steps.items()]
+                reporter.count_steps(len(batch))
+                pending_steps = {arena_id: queue for arena_id, queue in pending_steps.items() if queue}
+                items: List[Tuple[int, Dict[str, Any], Dict[str, Any], bool]] = []
+                for arena_id, message in batch:
+                    obs = message.get("obs", {}) if isinstance(message.get("obs"), dict) else {}
+                    layout = obs_layouts.get(arena_id)
+                    if layout is not None:
+                        obs = {key: decode_obs(value, layout) for key, value in obs.items()}
+                    metrics = message.get("metrics", {}) if isinstance(message.get("metrics"), dict) else {}
+                    done = bool(message.get("done", False))
+                    items.append((arena_id, obs, metrics, done))
+
+                    # Com várias arenas os eventos ao vivo acompanham só a primeira, para não embaralhar o stdout.
+                    if live_rounds and arena_id == 0 and isinstance(obs, dict):
+                        try:
+                            o1 = obs.get("1")
+                            if isinstance(o1, dict):
+                                match_state = o1.get("match") if isinstance(o1.get("match"), dict) else {}
+                                wins = match_state.get("wins") if isinstance(match_state.get("wins"), dict) else {}
+                                w1 = int(wins.get(1, wins.get("1", 0)))
+                                w2 = int(wins.get(2, wins.get("2", 0)))
+                                match_over = bool(match_state.get("match_over", False))
+                                now_wins = (w1, w2)
+                                score1 = _extract_live_score(metrics, 1)
+                                score2 = _extract_live_score(metrics, 2)
+
+                                if last_wins is None:
+                                    match_index += 1
+                                    last_wins = now_wins
+                                    last_match_over = match_over
+                                    last_live_score = (score1, score2)
+                                    if pretty_md9:
+                                        title = match_title if match_title else "MD9"
+                                        print("MD9: ___________")
+                                        print(f"MD9: Começando MD9 | {title} | Match #{match_index}")
+                                        print("MD9: Resultados de cada round")
+                                        sys.stdout.flush()
+                                elif now_wins != last_wins:
+                                    prev_w1, prev_w2 = last_wins
+                                    prev_s1, prev_s2 = last_live_score if last_live_score is not None else (score1, score2)
+                                    delta_s1 = score1 - prev_s1
+                                    delta_s2 = score2 - prev_s2
+                                    round_no = int(w1 + w2)
+                                    if pretty_md9:
+                                        print(
+                                            f"MD9: R{round_no:02d} | wins={w1}-{w2} | "
+                                            f"dScore={delta_s1:+.2f}/{delta_s2:+.2f} | "
+                                            f"ScoreTot={score1:.2f}/{score2:.2f}"
+                                        )
+                                    else:
+                                        print(f"[ROUND] wins={w1}-{w2}")
                                     sys.stdout.flush()
-                            elif now_wins != last_wins:
-                                prev_w1, prev_w2 = last_wins
-                                prev_s1, prev_s2 = last_live_score if last_live_score is not None else (score1, score2)
-                                delta_s1 = score1 - prev_s1
-                                delta_s2 = score2 - prev_s2
-                                round_no = int(w1 + w2)
-                                if pretty_md9:
-                                    print(
-                                        f"MD9: R{round_no:02d} | wins={w1}-{w2} | "
-                                        f"dScore={delta_s1:+.2f}/{delta_s2:+.2f} | "
-                                        f"ScoreTot={score1:.2f}/{score2:.2f}"
-                                    )
-                                else:
-                                    print(f"[ROUND] wins={w1}-{w2}")
+                                    last_wins = now_wins
+                                    last_live_score = (score1, score2)
+
+                                if match_over and not last_match_over:
+                                    if pretty_md9:
+                                        print("MD9: Resultado final")
+                                        print(
+                                            f"MD9: FINAL | wins={w1}-{w2} | ScoreTot={score1:.2f}/{score2:.2f}"
+                                        )
+                                        print("MD9: ___________")
+                                    else:
+                                        print(f"[MATCH] over wins={w1}-{w2}")
+                                    sys.stdout.flush()
+                                    last_match_over = True
+                        except Exception:
+                            pass
+
+                    if debug_steps_remaining > 0:
+                        try:
+                            o1 = obs.get("1") if isinstance(obs, dict) else None
+                            if isinstance(o1, dict):
+                                dp = o1.get("delta_position")
+                                s = o1.get("self", {}) if isinstance(o1.get("self"), dict) else {}
+                                m = o1.get("match", {}) if isinstance(o1.get("match"), dict) else {}
+                                sp = s.get("position")
+                                op = (o1.get("opponent", {}) if isinstance(o1.get("opponent"), dict) else {}).get("position")
+                                print(
+                                    f"[DBG step] arena={arena_id} frame={int(message.get('frame', -1))} "
+                                    f"round_active={m.get('round_active')} self_pos={sp} opp_pos={op} "
+                                    f"delta_position={dp} arrows={s.get('arrows')} aim_hold_active={s.get('aim_hold_active')} "
+                                    f"shoot_was_pressed={s.get('shoot_was_pressed')}"
+                                )
+                                af = message.get("actions_frame")
+                                if isinstance(af, dict):
+                                    print(f"[DBG af  ] {af.get('1')} | {af.get('2')}")
+                                bp = message.get("bot_policy")
+                                if isinstance(bp, dict):
+                                    print(f"[DBG pol ] {bp}")
                                 sys.stdout.flush()
-                                last_wins = now_wins
-                                last_live_score = (score1, score2)
-
-                            if match_over and not last_match_over:
-                                if pretty_md9:
-                                    print("MD9: Resultado final")
-                                    print(
-                                        f"MD9: FINAL | wins={w1}-{w2} | ScoreTot={score1:.2f}/{score2:.2f}"
-                                    )
-                                    print("MD9: ___________")
-                                else:
-                                    print(f"[MATCH] over wins={w1}-{w2}")
+                        except Exception:
+                            pass
+
+                        try:
+                            sr = metrics.get("super_reward") if isinstance(metrics, dict) else None
+                            if isinstance(sr, dict):
+                                lc = sr.get("last_components") if isinstance(sr.get("last_components"), dict) else {}
+                                print(f"[DBG super] sig={sr.get('signature')} p1={lc.get(1, lc.get('1'))}")
                                 sys.stdout.flush()
-                                last_match_over = True
-                    except Exception:
-                        pass
-
-                if debug_steps_remaining > 0:
-                    try:
-                        o1 = obs.get("1") if isinstance(obs, dict) else None
-                        if isinstance(o1, dict):
-                            dp = o1.get("delta_position")
-                            s = o1.get("self", {}) if isinstance(o1.get("self"), dict) else {}
-                            m = o1.get("match", {}) if isinstance(o1.get("match"), dict) else {}
-                            sp = s.get("position")
-                            op = (o1.get("opponent", {}) if isinstance(o1.get("opponent"), dict) else {}).get("position")
-                            print(
-                                f"[DBG step] frame={int(message.get('frame', -1))} "
-                                f"round_active={m.get('round_active')} self_pos={sp} opp_pos={op} "
-                                f"delta_position={dp} arrows={s.get('arrows')} aim_hold_active={s.get('aim_hold_active')} "
-                                f"shoot_was_pressed={s.get('shoot_was_pressed')}"
-                            )
-                            af = message.get("actions_frame")
-                            if isinstance(af, dict):
-                                print(f"[DBG af  ] {af.get('1')} | {af.get('2')}")
-                            bp = message.get("bot_policy")
-                            if isinstance(bp, dict):
-                                print(f"[DBG pol ] {bp}")
+                        except Exception:
+                            pass
+
+                results = trainer.step_arenas(items)
+                for (arena_id, _, metrics, done), (action_p1, action_p2, advance) in zip(items, results):
+                    if debug_steps_remaining > 0:
+                        try:
+                            print(f"[DBG act ] arena={arena_id} p1={action_p1} p2={action_p2}")
                             sys.stdout.flush()
-                    except Exception:
-                        pass
+                        except Exception:
+                            pass
+                        debug_steps_remaining -= 1
+                    response = {"type": "action", "actions": {"1": action_p1, "2": action_p2}}
+                    client.send(response, arena_id)
 
-                    try:
-                        sr = metrics.get("super_reward") if isinstance(metrics, dict) else None
-                        if isinstance(sr, dict):
-                            lc = sr.get("last_components") if isinstance(sr.get("last_components"), dict) else {}
-                            print(f"[DBG super] sig={sr.get('signature')} p1={lc.get(1, lc.get('1'))}")
-                            sys.stdout.flush()
-                    except Exception:
-                        pass
-
-                action_p1, action_p2, advance = trainer.step(obs, metrics, done)
-                if debug_steps_remaining > 0:
-                    try:
-                        print(f"[DBG act ] p1={action_p1} p2={action_p2}")
-                        sys.stdout.flush()
-                    except Exception:
-                        pass
-                    debug_steps_remaining -= 1
-                response = {"type": "action", "actions": {"1": action_p1, "2": action_p2}}
-                send_message(sock_file, response)
+                    if not done:
+                        continue
 
-                if done:
                     try:
                         m = metrics if isinstance(metrics, dict) else {}
                         ler = m.get("last_episode_reward")
@@ -1285,67 +1736,41 @@ def main() -> int:
                     except Exception:
                         pass
 
-                if done:
-                    if advance and trainer.current_index < trainer.population_size:
-                        send_message(
-                            sock_file,
-                            {
-                                "type": "config",
-                                "watch_mode": bool(args.watch),
-                                "time_scale": float(args.time_scale),
-                                "ga_state": trainer.get_ga_state(args.mutation_rate, args.mutation_std),
-                            },
-                        )
-
-                    send_message(sock_file, {"type": "reset"})
-
-                    if live_rounds:
+                    if advance and trainer.arenas[arena_id].active:
+                        client.send(arena_config(arena_id), arena_id)
+
+                    client.send({"type": "reset"}, arena_id)
+
+                    if live_rounds and arena_id == 0:
                         last_wins = None
                         last_match_over = False
                         last_live_score = None
 
-                    if advance and trainer.current_index >= trainer.population_size:
-                        stats = trainer.finalize_generation()
-                        done_generations += 1
-                        if not args.quiet:
-                            print(
-                                f"gen {trainer.generation - 1} | best {stats['best']:.3f} | "
-                                f"avg {stats['avg']:.3f} | best_ever {stats['best_ever']:.3f}"
-                            )
-                            sys.stdout.flush()
+                    if advance and trainer.generation_complete():
+                        finish_generation()
+                        while trainer.generation_complete() and not generations_exhausted():
+                            finish_generation()
 
-                        if save_path and trainer.best_genome is not None:
-                            save_genome(save_path, trainer.best_genome)
-                        append_generation_log(
-                            log_path,
-                            trainer.generation - 1,
-                            stats,
-                            args.population,
-                            args.elite,
-                            args.mutation_rate,
-                            args.mutation_std,
-                            args.episodes_per_genome,
-                            args.opponent,
-                            args.crossover,
-                        )
-
-                        send_message(
-                            sock_file,
-                            {
-                                "type": "config",
-                                "watch_mode": bool(args.watch),
-                                "time_scale": float(args.time_scale),
-                                "ga_state": trainer.get_ga_state(args.mutation_rate, args.mutation_std),
-                            },
-                        )
-
-                        if generations_limit > 0 and done_generations >= generations_limit:
+                        for other_id in range(len(ports)):
+                            client.send(arena_config(other_id), other_id)
+                            if other_id != arena_id:
+                                # Arenas ociosas estavam numa partida de espera: recomeçam junto com a nova geração.
+                                client.send({"type": "reset"}, other_id)
+                                pending_steps.pop(other_id, None)
+
+                        if generations_exhausted():
                             break
 
     except (ConnectionError, OSError) as exc:
         exit_code = 2
         last_error = str(exc)
     finally:
+        client.close()
+        if fitness_cache is not None:
+            try:
+                fitness_cache.save(fitness_cache_path, dirty_only=True)
+            except OSError:
+                pass
         if result_path:
             ensure_parent_dir(result_path)
             payload = {
@@ -1353,7 +1778,9 @@ def main() -> int:
                 "exit_code": int(exit_code),
                 "error": last_error,
                 "host": str(args.host),
-                "port": int(args.port),
+                "port": int(ports[0]),
+                "ports": [int(p) for p in ports],
+                "action_repeat": action_repeat,
                 "generation": int(trainer.generation),
                 "population": int(args.population),
                 "elite": int(args.elite),
@@ -1366,6 +1793,9 @@ def main() -> int:
                 "reward_scale": float(args.reward_scale),
                 "best_ever": float(trainer.best_fitness),
                 "best_stats": dict(trainer.best_stats) if isinstance(trainer.best_stats, dict) else {},
+                "fitness_cache_hits": int(trainer.cache_skipped),
+                "racing_cuts": int(trainer.racing_cuts),
+                "racing_extra_episodes": int(trainer.racing_extra_episodes),
                 "load_path": str(load_path),
                 "opponent_load_path": str(opponent_load_path),
                 "save_path": str(save_path),
@@ -1376,6 +1806,8 @@ def main() -> int:
             }
             with open(result_path, "w", encoding="utf-8") as file:
                 json.dump(payload, file)
+            reporter.result(payload)
+        reporter.close()
 
     return exit_code
 
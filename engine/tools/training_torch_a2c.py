@@ -1,17 +1,18 @@
 import argparse
-import json
 import math
-import socket
 import sys
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 from torch.distributions import Bernoulli, Categorical
 
-POS_SCALE = 1000.0
-VEL_SCALE = 1000.0
+from bridge_client import CAP_LEAN_STEPS, CAP_OBS_VECTOR, BridgeClient, supports
+from obs_features import ObsLayout, decode_obs, get_extractor, layout_from_schema, obs_version_of
+
+# Do obs vetorial o A2C só precisa do delta_position fora das features (mira).
+A2C_OBS_KEYS = ("delta_position",)
 
 
 def to_vec2(value: Any) -> Tuple[float, float]:
@@ -22,53 +23,8 @@ def to_vec2(value: Any) -> Tuple[float, float]:
     return 0.0, 0.0
 
 
-def _bool(value: Any) -> float:
-    return 1.0 if bool(value) else 0.0
-
-
 def obs_to_features(obs: Dict[str, Any]) -> torch.Tensor:
-    delta_x, delta_y = to_vec2(obs.get("delta_position", [0.0, 0.0]))
-    distance = math.hypot(delta_x, delta_y)
-
-    self_state = obs.get("self", {}) if isinstance(obs.get("self"), dict) else {}
-    opp_state = obs.get("opponent", {}) if isinstance(obs.get("opponent"), dict) else {}
-    match_state = obs.get("match", {}) if isinstance(obs.get("match"), dict) else {}
-
-    self_pos = to_vec2(self_state.get("position", [0.0, 0.0]))
-    opp_pos = to_vec2(opp_state.get("position", [0.0, 0.0]))
-    self_vel = to_vec2(self_state.get("velocity", [0.0, 0.0]))
-    opp_vel = to_vec2(opp_state.get("velocity", [0.0, 0.0]))
-
-    wins = match_state.get("wins", {}) if isinstance(match_state.get("wins"), dict) else {}
-
-    features = [
-        delta_x / POS_SCALE,
-        delta_y / POS_SCALE,
-        distance / POS_SCALE,
-        self_pos[0] / POS_SCALE,
-        self_pos[1] / POS_SCALE,
-        self_vel[0] / VEL_SCALE,
-        self_vel[1] / VEL_SCALE,
-        float(self_state.get("facing", 1)),
-        _bool(self_state.get("on_floor", False)),
-        _bool(self_state.get("on_wall", False)),
-        float(self_state.get("arrows", 0)),
-        _bool(self_state.get("is_dead", False)),
-        opp_pos[0] / POS_SCALE,
-        opp_pos[1] / POS_SCALE,
-        opp_vel[0] / VEL_SCALE,
-        opp_vel[1] / VEL_SCALE,
-        float(opp_state.get("facing", 1)),
-        _bool(opp_state.get("on_floor", False)),
-        _bool(opp_state.get("on_wall", False)),
-        float(opp_state.get("arrows", 0)),
-        _bool(opp_state.get("is_dead", False)),
-        _bool(match_state.get("round_active", False)),
-        _bool(match_state.get("match_over", False)),
-        float(wins.get("1", 0)),
-        float(wins.get("2", 0)),
-    ]
-    return torch.tensor(features, dtype=torch.float32)
+    return torch.from_numpy(get_extractor(obs_version_of(obs)).extract(obs))
 
 
 def compute_aim(obs: Dict[str, Any]) -> Tuple[float, float]:
@@ -211,18 +167,14 @@ def update_policy(
     }
 
 
-def send_message(sock_file, payload: Dict[str, Any]) -> None:
-    sock_file.write((json.dumps(payload) + "\n").encode("utf-8"))
-    sock_file.flush()
-
-
 def main() -> int:
     parser = argparse.ArgumentParser(description="Torch A2C trainer for Project PVP")
     parser.add_argument("--host", default="127.0.0.1")
     parser.add_argument("--port", default=9009, type=int)
     parser.add_argument("--watch", action="store_true", help="Disable training speed-up")
     parser.add_argument("--time-scale", default=6.0, type=float)
-    parser.add_argument("--gamma", default=0.99, type=float)
+    parser.add_argument("--gamma", default=0.99, type=float, help="Desconto por step recebido (com --action-repeat, por janela de K frames)")
+    parser.add_argument("--action-repeat", default=1, type=int, help="Frame-skip: repete cada ação por K frames no Godot")
     parser.add_argument("--lr", default=3e-4, type=float)
     parser.add_argument("--value-coef", default=0.5, type=float)
     parser.add_argument("--entropy-coef", default=0.01, type=float)
@@ -247,6 +199,7 @@ def main() -> int:
         "type": "config",
         "watch_mode": bool(args.watch),
         "time_scale": float(args.time_scale),
+        "action_repeat": max(1, int(args.action_repeat)),
     }
 
     episode = 0
@@ -255,85 +208,93 @@ def main() -> int:
     ep_reward_p1 = 0.0
     ep_reward_p2 = 0.0
 
-    with socket.create_connection((args.host, args.port)) as sock:
-        sock_file = sock.makefile("rwb")
-        send_message(sock_file, config)
-
-        while True:
-            line = sock_file.readline()
-            if not line:
-                break
-            message = json.loads(line.decode("utf-8"))
-            msg_type = message.get("type")
-
-            if msg_type == "hello":
-                send_message(sock_file, config)
-                continue
-
-            if msg_type != "step":
-                continue
-
-            obs = message.get("obs", {})
-            rewards = message.get("reward", {}) if isinstance(message.get("reward"), dict) else {}
-            done = bool(message.get("done", False))
-
-            obs_p1 = obs.get("1", {}) if isinstance(obs.get("1"), dict) else {}
-            obs_p2 = obs.get("2", {}) if isinstance(obs.get("2"), dict) else {}
-
-            action_p1, logprob1, value1, entropy1 = model.act(obs_p1, device)
-            action_p2, logprob2, value2, entropy2 = model.act(obs_p2, device)
-
-            reward_p1 = float(rewards.get("1", 0.0))
-            reward_p2 = float(rewards.get("2", 0.0))
-
-            traj_p1.append({
-                "log_prob": logprob1,
-                "value": value1,
-                "entropy": entropy1,
-                "reward": torch.tensor(reward_p1, dtype=torch.float32),
-            })
-            traj_p2.append({
-                "log_prob": logprob2,
-                "value": value2,
-                "entropy": entropy2,
-                "reward": torch.tensor(reward_p2, dtype=torch.float32),
-            })
-
-            ep_reward_p1 += reward_p1
-            ep_reward_p2 += reward_p2
-
-            response = {"type": "action", "actions": {"1": action_p1, "2": action_p2}}
-            send_message(sock_file, response)
-
-            if done:
-                episode += 1
-                combined = traj_p1 + traj_p2
-                stats = update_policy(
-                    optimizer,
-                    combined,
-                    args.gamma,
-                    args.value_coef,
-                    args.entropy_coef,
-                    device,
-                )
-                print(
-                    f"episode {episode} | reward_p1 {ep_reward_p1:.3f} | reward_p2 {ep_reward_p2:.3f} "
-                    f"| loss {stats['loss']:.4f} | entropy {stats['entropy']:.4f}"
-                )
-                sys.stdout.flush()
-
-                traj_p1.clear()
-                traj_p2.clear()
-                ep_reward_p1 = 0.0
-                ep_reward_p2 = 0.0
-
-                if args.save_path:
-                    torch.save(
-                        {"model": model.state_dict(), "optimizer": optimizer.state_dict()},
-                        args.save_path,
+    layout: Optional[ObsLayout] = None
+    with BridgeClient(args.host, [args.port], connect_retries=1) as client:
+        client.connect()
+        client.send(config)
+
+        while not client.closed:
+            for _, message in client.poll(1.0):
+                msg_type = message.get("type")
+
+                if msg_type == "hello":
+                    # O A2C só usa obs/reward: com o Godot novo pede steps sem metrics.
+                    if supports(message, CAP_LEAN_STEPS):
+                        config["step_mode"] = "lean"
+                    if supports(message, CAP_OBS_VECTOR):
+                        config["obs_format"] = "vector"
+                    layout = None
+                    client.send(config)
+                    continue
+
+                if msg_type == "obs_schema":
+                    layout = layout_from_schema(message, A2C_OBS_KEYS)
+                    continue
+
+                if msg_type != "step":
+                    continue
+
+                obs = message.get("obs", {})
+                rewards = message.get("reward", {}) if isinstance(message.get("reward"), dict) else {}
+                done = bool(message.get("done", False))
+
+                obs_p1 = decode_obs(obs.get("1"), layout)
+                obs_p2 = decode_obs(obs.get("2"), layout)
+
+                action_p1, logprob1, value1, entropy1 = model.act(obs_p1, device)
+                action_p2, logprob2, value2, entropy2 = model.act(obs_p2, device)
+
+                reward_p1 = float(rewards.get("1", 0.0))
+                reward_p2 = float(rewards.get("2", 0.0))
+
+                traj_p1.append({
+                    "log_prob": logprob1,
+                    "value": value1,
+                    "entropy": entropy1,
+                    "reward": torch.tensor(reward_p1, dtype=torch.float32),
+                })
+                traj_p2.append({
+                    "log_prob": logprob2,
+                    "value": value2,
+                    "entropy": entropy2,
+                    "reward": torch.tensor(reward_p2, dtype=torch.float32),
+                })
+
+                ep_reward_p1 += reward_p1
+                ep_reward_p2 += reward_p2
+
+                response = {"type": "action", "actions": {"1": action_p1, "2": action_p2}}
+                client.send(response)
+
+                if done:
+                    episode += 1
+                    combined = traj_p1 + traj_p2
+                    stats = update_policy(
+                        optimizer,
+                        combined,
+                        args.gamma,
+                        args.value_coef,
+                        args.entropy_coef,
+                        device,
+                    )
+                    print(
+                        f"episode {episode} | reward_p1 {ep_reward_p1:.3f} | reward_p2 {ep_reward_p2:.3f} "
+                        f"| loss {stats['loss']:.4f} | entropy {stats['entropy']:.4f}"
                     )
+                    sys.stdout.flush()
+
+                    traj_p1.clear()
+                    traj_p2.clear()
+                    ep_reward_p1 = 0.0
+                    ep_reward_p2 = 0.0
+
+                    if args.save_path:
+                        torch.save(
+                            {"model": model.state_dict(), "optimizer": optimizer.state_dict()},
+                            args.save_path,
+                        )
 
-                send_message(sock_file, {"type": "reset"})
+                    client.send({"type": "reset"})
 
     return 0
 